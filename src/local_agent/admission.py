@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: requests are not queued
+    fcntl = None  # type: ignore[assignment]
+
+from .utils import file_digest
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITY_ENV = "LOCAL_AGENT_PRIORITY"  # overrides a command's priority (e.g. scripts calling `ask`)
+
+POLL_S = 0.05  # first retry delay while queued, doubled up to POLL_MAX_S
+POLL_MAX_S = 0.5
+NOTICE_S = 1.0  # waits longer than this are announced (on_queued)
+
+
+def default_slot_dir() -> Path:
+    return Path.home() / ".local-agent" / "slots"
+
+
+def resolve_priority(default: str) -> str:
+    value = os.environ.get(PRIORITY_ENV, "").strip().lower()
+    return value if value in (INTERACTIVE, BATCH) else default
+
+
+class Admission:
+    """
+    Limits requests in flight to one Ollama endpoint across every local-agent
+    process of the user, and admits interactive requests before batch ones.
+
+    Slots are lock files in ~/.local-agent/slots/<endpoint hash>/, held with
+    flock for the length of a request. The kernel drops a lock when its
+    process dies, so a crash never leaks a slot. A queued interactive request
+    holds a shared lock on `interactive.wait`; batch requests only take a free
+    slot while nobody holds it. A batch request already running is not
+    interrupted.
+    """
+
+    def __init__(self, endpoint: str, slots: int, priority: str = INTERACTIVE, root: Optional[Path] = None) -> None:
+        self.endpoint = endpoint
+        self.slots = max(1, slots)
+        self.priority = priority
+        self.dir = (root or default_slot_dir()) / file_digest(endpoint.encode("utf-8"))[:12]
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.last_wait_s = 0.0
+        self.total_wait_s = 0.0
+        self._lock = threading.Lock()
+
+    def _open(self, name: str) -> int:
+        return os.open(str(self.dir / name), os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _try_slot(self) -> Optional[int]:
+        """
+        fd of a slot lock this call now holds, or None if all are taken.
+        """
+        for i in range(self.slots):
+            fd = self._open(f"slot-{i}.lock")
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    def interactive_waiting(self) -> bool:
+        fd = self._open("interactive.wait")
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except OSError:
+            return True
+        finally:
+            os.close(fd)  # also releases the probe lock
+
+    def in_flight(self) -> int:
+        """
+        Slots currently held (by any process).
+        """
+        if fcntl is None:
+            return 0
+        held = 0
+        for i in range(self.slots):
+            fd = self._open(f"slot-{i}.lock")
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                held += 1
+            finally:
+                os.close(fd)
+        return held
+
+    @contextmanager
+    def slot(self, on_queued: Optional[Callable[[], None]] = None) -> Iterator[float]:
+        """
+        Waits for a slot and holds it for the `with` block; yields the time
+        spent queued. `on_queued` is called once if the wait passes NOTICE_S.
+        If the lock files cannot be opened, the block runs without a slot.
+        """
+        if fcntl is None:
+            yield 0.0
+            return
+        t0 = time.monotonic()
+        fd: Optional[int] = None
+        waiter: Optional[int] = None
+        delay, noticed = POLL_S, False
+        try:
+            while True:
+                if self.priority == INTERACTIVE or not self.interactive_waiting():
+                    fd = self._try_slot()
+                if fd is not None:
+                    break
+                if self.priority == INTERACTIVE and waiter is None:
+                    waiter = self._open("interactive.wait")
+                    fcntl.flock(waiter, fcntl.LOCK_SH)  # held while queued: batch requests step aside
+                if not noticed and on_queued is not None and time.monotonic() - t0 >= NOTICE_S:
+                    noticed = True
+                    on_queued()
+                time.sleep(delay)
+                delay = min(delay * 2, POLL_MAX_S)
+        except OSError:
+            fd = None  # slot dir removed or unwritable mid-session: run unqueued, like __init__ failing
+        finally:
+            if waiter is not None:
+                os.close(waiter)
+        if fd is None:
+            yield 0.0
+            return
+        waited = time.monotonic() - t0
+        with self._lock:
+            self.last_wait_s = waited
+            self.total_wait_s += waited
+        try:
+            yield waited
+        finally:
+            os.close(fd)
+
+
+class AdmissionGroup:
+    """
+    One Admission per host of an OllamaPool, so every endpoint gets its own
+    `slots`. The pool picks a host first and then waits for that host's slot
+    (slot(endpoint)); waits and slots in use are reported for the group.
+    """
+
+    def __init__(self, endpoints: List[str], slots: int, priority: str = INTERACTIVE, root: Optional[Path] = None) -> None:
+        self.members = {e: Admission(e, slots, priority, root) for e in dict.fromkeys(endpoints)}
+        self.slots = sum(a.slots for a in self.members.values())
+        self.priority = priority
+        self.last_wait_s = 0.0
+        self.total_wait_s = 0.0
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        return sum(a.in_flight() for a in self.members.values())
+
+    @contextmanager
+    def slot(self, endpoint: str, on_queued: Optional[Callable[[], None]] = None) -> Iterator[float]:
+        with self.members[endpoint].slot(on_queued) as waited:
+            with self._lock:
+                self.last_wait_s = waited
+                self.total_wait_s += waited
+            yield waited
+
+
+class GatedClient:
+    """
+    Drop-in wrapper for OllamaClient / OllamaPool whose chat requests first wait
+    for an Admission slot. Everything else is passed through.
+    """
+
+    def __init__(self, client: Any, admission: Admission, on_queued: Optional[Callable[[], None]] = None) -> None:
+        self.client = client
+        self.admission = admission
+        self.on_queued = on_queued
+
+    def chat(self, messages: List[Dict[str, Any]], **kwargs: Any) -> str:
+        with self.admission.slot(self.on_queued):
+            return self.client.chat(messages, **kwargs)
+
+    def chat_message(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        with self.admission.slot(self.on_queued):
+            return self.client.chat_message(messages, **kwargs)
+
+    @property
+    def last_wait_s(self) -> float:
+        return self.admission.last_wait_s
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
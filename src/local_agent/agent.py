@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .context import RepoContext
+from .utils import DEFAULT_EXCLUDES, is_state_path
+
+TOOL_MAX_CHARS = 8_000  # per tool result; the model is told when output was cut
+READ_MAX_LINES = 200
+SEARCH_MAX_HITS = 40
+SEARCH_MAX_FILE_BYTES = 1_000_000
+SEARCH_DEADLINE_S = 3.0
+
+TOOL_SPECS: List[Dict[str, Any]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search",
+            "description": "Search the repository's files for a regular expression (case-insensitive). "
+            "Returns matching lines as path:line: text.",
+            "parameters": {
+                "type": "object",
+                "properties": {"pattern": {"type": "string", "description": "Regex or plain text to look for."}},
+                "required": ["pattern"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read",
+            "description": f"Read lines of a repository file, with line numbers (at most {READ_MAX_LINES} lines per call).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {"type": "string", "description": "Repo-relative file path."},
+                    "start": {"type": "integer", "description": "First line (1-based, default 1)."},
+                    "end": {"type": "integer", "description": "Last line (inclusive)."},
+                },
+                "required": ["path"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_symbol",
+            "description": "Find where a function, class or other symbol is defined, and which files use it.",
+            "parameters": {
+                "type": "object",
+                "properties": {"name": {"type": "string", "description": "Exact symbol name."}},
+                "required": ["name"],
+            },
+        },
+    },
+]
+
+
+def _cap(text: str, max_chars: int = TOOL_MAX_CHARS) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + f"\n... (output cut at {max_chars} chars; narrow the request)"
+
+
+class RepoTools:
+    """
+    The tools offered to the model, backed by a RepoContext. Every result is
+    plain text, capped at TOOL_MAX_CHARS; bad arguments come back as an
+    "error: ..." result for the model to correct, never as an exception.
+    `grep(pattern)` returns rg-style `path:line:text` lines; without it files
+    are scanned in Python. Excluded directories, local-agent state and junk
+    files are neither searched nor read.
+    """
+
+    def __init__(
+        self,
+        repo: RepoContext,
+        extra_excludes: set[str],
+        grep: Optional[Callable[[str], str]] = None,
+        symbols: bool = True,
+    ) -> None:
+        self.repo = repo
+        self.extra_excludes = extra_excludes
+        self.grep = grep
+        self.symbols = symbols
+        self.log: List[str] = []  # "name(args)" per call, for the UI
+        self.chars = 0  # tool output handed to the model
+
+    def call(self, name: str, args: Dict[str, Any]) -> str:
+        try:
+            if name == "search":
+                out = self.search(str(args["pattern"]))
+                self.log.append(f"search({args['pattern']!r})")
+            elif name == "read":
+                start, end = int(args.get("start") or 1), int(args.get("end") or 0) or None
+                out = self.read(str(args["path"]), start, end)
+                self.log.append(f"read({args['path']}:{start}-{end or ''})")
+            elif name == "find_symbol":
+                out = self.find_symbol(str(args["name"]))
+                self.log.append(f"find_symbol({args['name']!r})")
+            else:
+                out = f"error: unknown tool {name!r}; use search, read or find_symbol"
+        except (KeyError, TypeError, ValueError) as e:
+            out = f"error: bad arguments for {name}: {e}"
+        except OSError as e:
+            out = f"error: {e}"
+        out = _cap(out)
+        self.chars += len(out)
+        return out
+
+    def search(self, pattern: str) -> str:
+        if not pattern.strip():
+            return "error: empty pattern"
+        if self.grep is not None:
+            prefix = str(self.repo.root) + "/"
+            rows = [ln[len(prefix) :] if ln.startswith(prefix) else ln for ln in self.grep(pattern).splitlines()]
+            rows = [r for r in rows if self.hidden(r.split(":", 1)[0]) is None]
+        else:
+            rows = self._scan(pattern)
+        rows = [r if len(r) <= 240 else r[:240] + "..." for r in rows[:SEARCH_MAX_HITS] if r.strip()]
+        if not rows:
+            return f"no matches for {pattern!r}"
+        return "\n".join(rows)
+
+    def _scan(self, pattern: str) -> List[str]:
+        try:
+            rx = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            rx = re.compile(re.escape(pattern), re.IGNORECASE)
+        deadline = time.monotonic() + SEARCH_DEADLINE_S
+        rows: List[str] = []
+        for rel in self.repo.iter_repo_files(self.extra_excludes):
+            if len(rows) >= SEARCH_MAX_HITS or time.monotonic() > deadline:
+                break
+            if self.hidden(rel) is not None:
+                continue
+            p = self.repo.root / rel
+            try:
+                if p.stat().st_size > SEARCH_MAX_FILE_BYTES:
+                    continue
+                text = p.read_text(encoding="utf-8", errors="replace")
+            except OSError:
+                continue
+            for n, line in enumerate(text.splitlines(), start=1):
+                if rx.search(line):
+                    rows.append(f"{rel}:{n}:{line.strip()}")
+                    if len(rows) >= SEARCH_MAX_HITS:
+                        break
+        return rows
+
+    def read(self, path: str, start: int = 1, end: Optional[int] = None) -> str:
+        rel = path.strip()
+        if rel.startswith("./"):
+            rel = rel[2:]
+        root = self.repo.root.resolve()
+        p = (root / rel).resolve()
+        try:
+            rel = p.relative_to(root).as_posix()
+        except ValueError:
+            return f"error: {path} is outside the repository"
+        if not p.is_file():
+            return f"error: no such file: {path} (use search to find files)"
+        reason = self.hidden(rel)
+        if reason is not None:
+            return f"error: {rel} is not available to the tools ({reason})"
+        lines = p.read_text(encoding="utf-8", errors="replace").splitlines()
+        start = max(1, start)
+        if start > len(lines):
+            return f"error: {rel} has only {len(lines)} lines"
+        end = min(len(lines), end or len(lines), start + READ_MAX_LINES - 1)
+        body = "\n".join(f"{n:>4} | {lines[n - 1]}" for n in range(start, end + 1))
+        return f"{rel} (lines {start}-{end} of {len(lines)})\n{body}"
+
+    def hidden(self, rel: str) -> Optional[str]:
+        """
+        Why `rel` is kept from the model, or None if it may be searched and read.
+        """
+        parts = tuple(rel.split("/"))
+        if (DEFAULT_EXCLUDES | self.extra_excludes).intersection(parts):
+            return "excluded directory"
+        if is_state_path(parts):
+            return "local-agent state"
+        if self.repo.junk_filter:
+            return self.repo.junk_files(self.extra_excludes).get(rel)
+        return None
+
+    def find_symbol(self, name: str) -> str:
+        if not self.symbols:
+            return "error: the symbol index is disabled; use search"
+        try:
+            idx = self.repo.symbol_index(self.extra_excludes)
+            defs = idx.definitions(name)[:5]
+            callers = idx.callers(name, limit=5)
+        except (sqlite3.Error, OSError) as e:
+            return f"error: symbol index unavailable ({e}); use search"
+        if not defs:
+            return f"no definition of {name!r} found (try search)"
+        out = [f"{s.name} ({s.kind}) {s.path}:{s.line}-{s.end_line}" for s in defs]
+        if callers:
+            out.append("referenced in: " + ", ".join(f"{p} ({n})" for p, n in callers))
+        return "\n".join(out)
+
+
+@dataclass
+class AgentResult:
+    answer: str
+    turns: int
+    tool_calls: List[str] = field(default_factory=list)
+    tool_chars: int = 0
+    capped: bool = False  # the turn cap was reached before the model answered
+
+
+def _arguments(raw: Any) -> Dict[str, Any]:
+    if isinstance(raw, dict):
+        return raw
+    try:
+        parsed = json.loads(raw or "{}")
+    except (TypeError, ValueError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def run_agent(
+    client,
+    messages: List[Dict[str, Any]],
+    tools: RepoTools,
+    max_turns: int,
+    options: Optional[Callable[[List[Dict[str, Any]]], Dict[str, Any]]] = None,
+    on_call: Optional[Callable[[str], None]] = None,
+) -> AgentResult:
+    """
+    Lets the model call `tools` until it answers without a tool call, for at
+    most `max_turns` requests; then asks once more for an answer with tools
+    withheld. `messages` is extended in place with the whole exchange.
+    `options(messages)` gives the model options for each request.
+    """
+    turns = 0
+    while turns < max_turns:
+        turns += 1
+        msg = client.chat_message(messages, options=options(messages) if options else None, tools=TOOL_SPECS)
+        content, calls = str(msg.get("content") or ""), msg.get("tool_calls") or []
+        if not calls:
+            messages.append({"role": "assistant", "content": content})
+            return AgentResult(content, turns, tools.log, tools.chars)
+        messages.append({"role": "assistant", "content": content, "tool_calls": calls})
+        for call in calls:
+            fn = call.get("function") or {}
+            name = str(fn.get("name") or "")
+            logged = len(tools.log)
+            out = tools.call(name, _arguments(fn.get("arguments")))
+            if on_call is not None and len(tools.log) > logged:
+                on_call(tools.log[-1])
+            messages.append({"role": "tool", "content": out, "tool_name": name})
+
+    messages.append({"role": "user", "content": "Tool budget used up. Answer now with what you have found."})
+    answer = client.chat(messages, options=options(messages) if options else None)
+    messages.append({"role": "assistant", "content": answer})
+    return AgentResult(answer, turns + 1, tools.log, tools.chars, capped=True)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import random
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from .ollama_client import OllamaError
+
+_WORDS = (
+    "def return class import self value index cache query token parse config file path "
+    "request response error retry timeout buffer stream chunk model prompt context line"
+).split()
+
+
+@dataclass
+class BenchResult:
+    model: str
+    kind: str  # "cold" | "warm" | "run"
+    num_ctx: int
+    prompt_tokens: int
+    load_s: float
+    ttft_s: float
+    prompt_tps: Optional[float]  # prompt-eval tokens/sec
+    gen_tps: Optional[float]  # generation tokens/sec
+    wall_s: float
+
+    def to_json(self) -> dict:
+        return asdict(self)
+
+
+def synthetic_prompt(tokens: int, seed: int = 0) -> str:
+    """
+    Roughly `tokens` tokens of code-like filler. A random nonce leads the
+    prompt so Ollama's prompt cache cannot reuse an earlier run.
+    """
+    rnd = random.Random(seed)
+    body = " ".join(rnd.choice(_WORDS) for _ in range(tokens))
+    return f"[{uuid.uuid4().hex}] Summarize the following in one sentence.\n\n{body}"
+
+
+def _rate(tokens: float, seconds: float) -> Optional[float]:
+    return tokens / seconds if tokens and seconds > 0 else None
+
+
+def _result(model: str, kind: str, num_ctx: int, t: Dict[str, float]) -> BenchResult:
+    return BenchResult(
+        model=model,
+        kind=kind,
+        num_ctx=num_ctx,
+        prompt_tokens=int(t["prompt_tokens"]),
+        load_s=t["load_s"],
+        ttft_s=t["ttft_s"],
+        prompt_tps=_rate(t["prompt_tokens"], t["prompt_eval_s"]),
+        gen_tps=_rate(t["eval_tokens"], t["eval_s"]),
+        wall_s=t["wall_s"],
+    )
+
+
+def run_bench(
+    client_for: Callable[[str], object],
+    models: List[str],
+    sizes: List[int],
+    ctxs: List[int],
+    num_predict: int = 64,
+    on_step: Optional[Callable[[str], None]] = None,
+) -> List[BenchResult]:
+    """
+    Per model: a cold load (model evicted first), a warm load, then one run
+    per (num_ctx, prompt size) that fits. Note that the first run at a new
+    num_ctx includes a reload; its load_s column shows it.
+    """
+    results: List[BenchResult] = []
+    step = on_step or (lambda _msg: None)
+    for model in models:
+        client = client_for(model)
+        ctx0 = ctxs[0]
+        try:
+            client.unload()
+        except OllamaError:
+            pass  # not loaded, or an older server: the "cold" row is then just a first call
+        for kind in ("cold", "warm"):
+            step(f"{model}: {kind} load")
+            t = client.generate_timed(synthetic_prompt(8), options={"num_ctx": ctx0, "num_predict": 8})
+            results.append(_result(model, kind, ctx0, t))
+        for num_ctx in ctxs:
+            for size in sizes:
+                if size + num_predict > num_ctx:
+                    continue
+                step(f"{model}: num_ctx={num_ctx}, ~{size} prompt tokens")
+                opts = {"num_ctx": num_ctx, "num_predict": num_predict, "temperature": 0}
+                t = client.generate_timed(synthetic_prompt(size, seed=size), options=opts)
+                results.append(_result(model, "run", num_ctx, t))
+    return results
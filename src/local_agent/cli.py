@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import io
+import json
 import sys
 import shutil
 from pathlib import Path
+from typing import Optional
 
 import typer
 from rich.console import Console
@@ -11,42 +14,228 @@ from rich.table import Table
 from rich.prompt import Confirm
 
 from .config import load_config
-from .context import RepoContext
+from .context import RepoContext, query_terms
 from .ollama_client import OllamaClient, OllamaError, OllamaTimeoutError, OllamaConnectionError
-from .prompts import SYSTEM_ASK, SYSTEM_EDIT
+from .pool import OllamaPool
+from .agent import SEARCH_MAX_HITS, RepoTools, run_agent
+from .admission import BATCH, INTERACTIVE, Admission, AdmissionGroup, GatedClient, resolve_priority
+from .options import estimate_messages_tokens, estimate_tokens, resolve_options
+from .prompts import SYSTEM_AGENT, SYSTEM_ASK, SYSTEM_EDIT
 from .safety import safe_apply
-from .commands import discover_commands, resolve_command, render_template
+from .commands import CommandDirectives, LoadedCommand, expand_pinned, render_template
+from .mapreduce import condense_stream, iter_chunks, iter_lines
+from .logcompact import compact_log, looks_like_log
+from .symbols import SymbolHit
+from .sessions import ChatSession
+from .profiling import Profiler
+from .tree import TREE_SCAN_LIMIT, render_tree
+from .routing import Route, log_route, route_query
+from .retrieval import Retrieval
+from .repomap import RepoMap, build_repo_map, render_repo_map
+from .bench import run_bench
+from .evaluation import load_cases, run_eval, visible_lines
+from .payload import NumberedText, Prompt, content_text
+from .skeleton import MAX_SKELETON_LINES, SKELETON_MAX_CHARS, render_skeleton, skeleton_lines
+from .utils import SNIP_MARKER, STATE_DIR, file_digest, find_repo_root, read_text_limited, state_dir
+from .graph import MANIFESTS, ImportGraph, entry_point_paths, named_modules
 
 import re
+import sqlite3
 import subprocess
+import tempfile
+import threading
+import time
 
 app = typer.Typer(add_completion=False, help="local-agent: local terminal coding assistant (via Ollama).")
 console = Console()
 
+QUEUE_REPORT_S = 0.1  # admission waits at least this long are shown with the answer
+
 @app.callback(invoke_without_command=True)
 def _main(
     ctx: typer.Context,
     version: bool = typer.Option(False, "--version", help="Show version and exit."),
+    profile: bool = typer.Option(
+        False, "--profile", help="Profile the command (cProfile + tracemalloc) into .local-agent/profiles/."
+    ),
 ):
     if version:
         from . import __version__
         console.print(__version__)
         raise typer.Exit(0)
 
+    if profile and ctx.invoked_subcommand is not None:
+        profiler = Profiler(root=find_repo_root(), command=ctx.invoked_subcommand)
+
+        def _write_profile() -> None:
+            report = profiler.stop()
+            console.print(f"[dim]Profile written to {report} (+ .pstats)[/dim]")
+
+        profiler.start()
+        ctx.call_on_close(_write_profile)
+
     # If user runs just `local-agent`, show help instead of "Missing command"
     if ctx.invoked_subcommand is None:
         console.print(ctx.get_help())
         raise typer.Exit(0)
 
+def _make_client(cfg, model: str, timeout_s: float | None = None, priority: str | None = None):
+    """
+    OllamaClient for a single configured host, OllamaPool for several.
+    With a `priority`, chat requests first queue for one of the
+    `ollama_max_inflight` slots of the host they go to, shared by all
+    local-agent processes (a pool picks the host, then queues for it).
+    """
+    kwargs = {} if timeout_s is None else {"timeout_s": timeout_s}
+    admission = None
+    if priority is not None and cfg.ollama_max_inflight > 0:
+        try:
+            if len(cfg.ollama_hosts) > 1:
+                admission = AdmissionGroup(cfg.ollama_hosts, cfg.ollama_max_inflight, priority=resolve_priority(priority))
+            else:
+                admission = Admission(cfg.ollama_hosts[0], cfg.ollama_max_inflight, priority=resolve_priority(priority))
+        except OSError:
+            pass  # e.g. read-only home: run unqueued
+    on_queued = (lambda: _queue_notice(admission)) if admission is not None else None
+    if len(cfg.ollama_hosts) > 1:
+        return OllamaPool(
+            cfg.ollama_hosts,
+            model,
+            health_interval_s=cfg.health_interval_s,
+            client_factory=OllamaClient,
+            admission=admission,
+            on_queued=on_queued,
+            **kwargs,
+        )
+    client = OllamaClient(host=cfg.ollama_hosts[0], model=model, **kwargs)
+    if admission is None:
+        return client
+    return GatedClient(client, admission, on_queued=on_queued)
+
+def _queue_notice(admission: Admission | AdmissionGroup) -> None:
+    ahead = "interactive requests" if admission.priority == BATCH else "other requests"
+    console.print(f"[dim]Ollama is busy with {ahead}; queued...[/dim]")
+
+def _admission(client):
+    if isinstance(client, (GatedClient, OllamaPool)):
+        return client.admission
+    return None
+
+def _queue_status(client) -> str:
+    a = _admission(client)
+    if a is None:
+        return "off (ollama_max_inflight = 0)"
+    return (
+        f"{a.in_flight()}/{a.slots} slot(s) in use, {a.priority} priority; "
+        f"last wait {a.last_wait_s:.1f}s, total {a.total_wait_s:.1f}s"
+    )
+
+def _queued_s(client) -> float:
+    """
+    Time the last chat request waited for an admission slot.
+    """
+    a = _admission(client)
+    return a.last_wait_s if a is not None else 0.0
+
 def _read_stdin_if_piped(max_chars: int = 80_000) -> str:
     if sys.stdin is None or sys.stdin.isatty():
         return ""
     data = sys.stdin.read()
     if not data:
         return ""
+    return _snip(data, max_chars)
+
+def _snip(data: str, max_chars: int) -> str:
     if len(data) <= max_chars:
         return data
-    return data[: max_chars // 2] + "\n\n...<snip>...\n\n" + data[-max_chars // 2 :]
+    return data[: max_chars // 2] + SNIP_MARKER + data[-max_chars // 2 :]
+
+def _read_piped_stdin(client, question: str, cfg) -> tuple[str, str]:
+    """
+    Reads piped stdin for `ask`. Returns (text, label) for the prompt.
+
+    - Input that fits in cfg.stdin_max_chars is sent verbatim, unless it is
+      a log (looks_like_log) larger than cfg.stdin_compact_min_chars.
+    - Logs are compacted locally into line templates with counts; lines
+      mentioning the question's terms are kept verbatim. Other input is
+      never compacted.
+    - Whatever is still larger than cfg.stdin_max_chars is streamed through a
+      map-reduce pass instead of being snipped in the middle.
+    """
+    label = "STDIN (piped input)"
+    if sys.stdin is None or sys.stdin.isatty():
+        return "", label
+    if not cfg.stdin_map_reduce and not cfg.stdin_compact:
+        return _read_stdin_if_piped(cfg.stdin_max_chars), label
+
+    stream, head = sys.stdin, sys.stdin.read(cfg.stdin_max_chars + 1)
+    is_log = cfg.stdin_compact and len(head) > cfg.stdin_compact_min_chars and looks_like_log(head)
+    if len(head) <= cfg.stdin_max_chars and not is_log:
+        return head, label  # code, diffs and prose that fit are sent verbatim
+    if is_log:  # templating would mangle code and diffs; they go to map-reduce as they are
+        compacted = compact_log(iter_lines(stream, prefix=head), keep_terms=query_terms(question))
+        label = f"STDIN (compacted log: {compacted.lines_in} lines -> {compacted.templates} templates)"
+        if len(compacted.text) <= cfg.stdin_max_chars:
+            return compacted.text, label
+        stream, head = io.StringIO(compacted.text), ""
+
+    if not cfg.stdin_map_reduce:
+        return _snip(head + stream.read(), cfg.stdin_max_chars), label
+
+    chunks = iter_chunks(stream, cfg.stdin_chunk_chars, prefix=head)
+    with console.status("Reading piped input in chunks...") as status:
+        notes = condense_stream(
+            client,
+            question,
+            chunks,
+            parallelism=cfg.stdin_parallelism,
+            max_chars=cfg.stdin_max_chars,
+            on_progress=lambda n: status.update(f"Extracted {n} chunk(s) of piped input..."),
+            options=cfg.options_for("stdin"),
+        )
+    return notes, f"{label} — notes extracted from each chunk"
+
+def _repo_map_overview(repo: RepoContext, all_files: list[str], rels: list[str], question: str, cfg) -> str | None:
+    """
+    REPO MAP block from stored file summaries (see `local-agent map`), ordered
+    retrieved files first, then by question-term matches. None if no map exists.
+    """
+    if not (repo.root / STATE_DIR / "index" / "repomap.sqlite").exists():
+        return None
+    try:
+        rmap = RepoMap(repo.root)
+        summaries = rmap.summaries_for(all_files)
+        rmap.close()
+    except sqlite3.Error:
+        return None
+    if not summaries:
+        return None
+    terms = query_terms(question)
+    others = sorted(
+        (r for r in all_files if r not in rels), key=lambda r: -sum(t in r.lower() for t in terms)
+    )
+    return render_repo_map(rels + others, summaries, cfg.repo_map_max_chars)
+
+def _answer_title(label: str, route: Route, queued_s: float = 0.0) -> str:
+    queued = f"; queued {queued_s:.1f}s" if queued_s >= QUEUE_REPORT_S else ""
+    if route.reason and route.reason != "no fast_model configured":
+        return f"{label} ({route.model} — {route.tier}: {route.reason}{queued})"
+    return f"{label} ({route.model}{queued})"
+
+def _retrieval_status(r: Retrieval) -> str:
+    out = f"{r.elapsed_s * 1000:.0f} ms, {len(r.ranked)} files ({', '.join(r.finished) or 'no strategy finished'})"
+    if r.cut:
+        out += f"; cut at the deadline: {', '.join(r.cut)}"
+    return out
+
+def _routing_status(cfg, pinned: bool, override: Optional[str]) -> str:
+    if not cfg.fast_model:
+        return "off (set fast_model to enable)"
+    if pinned:
+        return "off (model pinned with /model; /route auto to re-enable)"
+    if override:
+        return f"always {override}"
+    return f"auto ({cfg.fast_model} / {cfg.model})"
 
 def _with_line_numbers(text: str, start_line: int = 1, max_lines: int = 400) -> tuple[str, int]:
     lines = text.splitlines()
@@ -58,27 +247,45 @@ def _with_line_numbers(text: str, start_line: int = 1, max_lines: int = 400) ->
         ln += 1
     return "\n".join(out), (ln - 1)
 
-def _force_include_paths(repo_root: Path, question: str) -> list[str]:
+def _symbol_snippets(repo: RepoContext, hits: list[SymbolHit], max_lines: int = 80) -> list[tuple[str, str]]:
+    """
+    (header, line-numbered source) for each symbol definition found for the question.
+    """
+    out: list[tuple[str, str]] = []
+    for h in hits:
+        sym = h.symbol
+        try:
+            lines = (repo.root / sym.path).read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            continue
+        end = min(sym.end_line, sym.line + max_lines - 1)
+        numbered, _ = _with_line_numbers("\n".join(lines[sym.line - 1 : end]), start_line=sym.line, max_lines=max_lines)
+        header = f"{sym.name} ({sym.kind}) {sym.path}:{sym.line}-{end}"
+        if h.callers:
+            header += "; referenced in: " + ", ".join(f"{p} ({n})" for p, n in h.callers)
+        out.append((header, numbered))
+    return out
+
+def _force_include_paths(repo_root: Path, question: str, graph: ImportGraph | None = None) -> list[str]:
     q = question.lower()
     candidates: list[str] = []
 
     if any(k in q for k in ["entry point", "entrypoint", "cli entry", "typer", "console_scripts", "__main__"]):
-        candidates += [
-            "src/local_agent/cli.py",
-            "src/local_agent/__main__.py",
-            "pyproject.toml",
-        ]
+        if graph is not None:
+            candidates += entry_point_paths(repo_root, graph)
+        else:
+            candidates += MANIFESTS
 
     if any(k in q for k in ["config", "configuration", "settings", "model", "ollama_host"]):
-        candidates += [
-            "src/local_agent/config.py",
-            ".local-agent/config.toml",
-        ]
+        candidates.append(".local-agent/config.toml")
+        if graph is not None:
+            candidates += named_modules(graph, ("config", "configuration", "settings"))[:2]
 
-    if any(k in q for k in ["commands", "slash", "custom commands"]):
-        candidates += [
-            "src/local_agent/commands.py",
-        ]
+    if graph is not None:
+        # Modules literally named after a question term ("how do commands work").
+        terms = tuple(query_terms(question))
+        terms += tuple(t[:-1] for t in terms if t.endswith("s"))
+        candidates += named_modules(graph, terms)[:2]
 
     out: list[str] = []
     for rel in candidates:
@@ -86,6 +293,51 @@ def _force_include_paths(repo_root: Path, question: str) -> list[str]:
             out.append(rel)
     return out
 
+def _select_context_files(
+    repo: RepoContext,
+    question: str,
+    cfg,
+    max_files: int,
+    hits: list[SymbolHit],
+    expand: int,
+) -> list[str]:
+    """
+    Retrieved files, then forced includes, then import-graph neighbors of
+    those (ranked by centrality) up to `expand` extra files.
+    """
+    graph = repo.import_graph(cfg.extra_excludes)
+    rels = repo.select_relevant_files(question, max_files=max_files, extra_excludes=cfg.extra_excludes, symbol_hits=hits)
+    rels += [r for r in _force_include_paths(repo.root, question, graph) if r not in rels]
+    if graph is not None and expand > 0:
+        rels += graph.expand(rels, budget=expand)
+    return rels
+
+def _read_context_files(
+    repo: RepoContext, rels: list[str], question: str, cfg, max_chars: int
+) -> tuple[list[tuple[str, str]], dict[str, str]]:
+    """
+    (rel, text) for each file, plus rendered skeletons for the files past the
+    top `full_context_files` (except files the question names). Files without
+    a useful skeleton are sent in full.
+    """
+    q = question.lower()
+    candidates = set(rels[cfg.full_context_files :]) if cfg.skeleton_context else set()
+    files: list[tuple[str, str]] = []
+    skeletons: dict[str, str] = {}
+    for rel in rels:
+        if rel in candidates and Path(rel).name.lower() not in q:
+            # the whole file, so the skeleton's line numbers are the real ones
+            text = repo.read_file(rel, max_chars=SKELETON_MAX_CHARS)[1]
+            skeleton = render_skeleton(rel, text)
+            if skeleton is not None:
+                skeletons[rel] = skeleton
+                files.append((rel, text))
+                continue
+            files.append((rel, _snip(text, max_chars)))
+            continue
+        files.append(repo.read_file(rel, max_chars=max_chars))
+    return files, skeletons
+
 def _is_quote_mode(question: str) -> bool:
     q = question.lower()
     triggers = [
@@ -133,12 +385,38 @@ def _quote_patterns(question: str) -> list[str]:
     return tokens[:6]
 
 
-def _rg_search(root: Path, patterns: list[str], extra_excludes: set[str], max_lines: int = 200) -> str:
+def _rg_search(
+    root: Path,
+    patterns: list[str],
+    extra_excludes: set[str],
+    max_lines: int = 200,
+    max_count: int = 20,
+    max_filesize: str = "1M",
+    context: int = 0,
+    deadline_s: float = 5.0,
+    paths: Optional[list[Path]] = None,
+    ignore_case: bool = False,
+    raise_errors: bool = False,
+) -> str:
+    """
+    Streams rg's output and stops (kills rg) once `max_lines` matches are in
+    or `deadline_s` has passed, so quote mode stays fast on big repos.
+    With `context` > 0 the output is grouped by file with -C context lines.
+    With `raise_errors`, an rg error without output (exit code 2, e.g. an
+    invalid regex) raises ValueError with rg's message instead of "".
+    """
     rg = shutil.which("rg")
     if not rg:
         return ""
 
-    cmd: list[str] = [rg, "-n", "--hidden", "--no-heading", "--color", "never", "--glob", "!.git/*"]
+    cmd: list[str] = [rg, "-n", "--hidden", "--color", "never", "--glob", "!.git/*"]
+    cmd += ["--max-count", str(max_count), "--max-filesize", max_filesize]
+    if ignore_case:
+        cmd.append("--ignore-case")
+    if context > 0:
+        cmd += ["--heading", "-C", str(context)]
+    else:
+        cmd.append("--no-heading")
 
     # ignore common build artifacts + user excludes
     for ex in sorted(extra_excludes):
@@ -148,19 +426,57 @@ def _rg_search(root: Path, patterns: list[str], extra_excludes: set[str], max_li
     for pat in patterns:
         cmd += ["-e", pat]
 
-    cmd.append(str(root))
+    cmd += [str(p) for p in paths or [root]]
 
-    r = subprocess.run(cmd, capture_output=True, text=True, check=False)
-    out = (r.stdout or "").strip()
-    if not out:
+    # stderr goes to a file, not a pipe: a full pipe would stall rg while stdout is read
+    err = tempfile.TemporaryFile("w+", encoding="utf-8", errors="replace") if raise_errors else subprocess.DEVNULL
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, text=True, errors="replace")
+    except OSError:
+        if raise_errors:
+            err.close()
         return ""
-    lines = out.splitlines()[:max_lines]
-    return "\n".join(lines)
-
-
-def _quote_mode_response(repo: RepoContext, question: str, extra_excludes: set[str]) -> str:
+    timer = threading.Timer(deadline_s, proc.kill)
+    timer.start()
+    lines: list[str] = []
+    matches = 0
+    try:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            lines.append(line)
+            # grouped output: "12:match", "11-context", file headings, "--"
+            if context <= 0 or re.match(r"\d+:", line):
+                matches += 1
+                if matches >= max_lines:
+                    break
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+        if raise_errors:
+            err.seek(0)
+            message = err.read().strip()
+            err.close()
+    if raise_errors and proc.returncode == 2 and not lines:
+        raise ValueError(message or "rg failed")
+    return "\n".join(lines).strip()
+
+
+def _quote_mode_response(repo: RepoContext, question: str, extra_excludes: set[str], cfg=None) -> str:
     patterns = _quote_patterns(question)
-    hits = _rg_search(repo.root, patterns, extra_excludes=extra_excludes)
+    limits = {}
+    if cfg is not None:
+        limits = {
+            "max_lines": cfg.quote_max_lines,
+            "max_count": cfg.quote_max_count,
+            "max_filesize": cfg.quote_max_filesize,
+            "context": cfg.quote_context,
+            "deadline_s": cfg.quote_deadline_s,
+        }
+    hits = _rg_search(repo.root, patterns, extra_excludes=extra_excludes, paths=repo.search_roots(), **limits)
 
     if not hits:
         pats = "|".join(patterns)
@@ -179,25 +495,49 @@ def _quote_mode_response(repo: RepoContext, question: str, extra_excludes: set[s
         "\nIf you want, tell me which one to explain and I’ll walk through it."
     )
 
-def build_ask_messages(tree: list[str], files: list[tuple[str, str]], question: str, stdin_text: str = ""):
-    blob: list[str] = []
-    blob.append("REPO FILE TREE (partial):")
-    blob.extend(f"- {p}" for p in tree)
+def build_ask_messages(
+    tree: list[str] | str,
+    files: list[tuple[str, str]],
+    question: str,
+    stdin_text: str = "",
+    stdin_label: str = "STDIN (piped input)",
+    definitions: list[tuple[str, str]] | None = None,
+    unchanged: set[str] | None = None,
+    skeletons: dict[str, str] | None = None,
+):
+    blob: list[str | NumberedText] = []
+    # a list of paths is rendered here; callers may pass an already rendered tree
+    blob.append(render_tree(tree) if isinstance(tree, list) else tree)
+
+    if definitions:
+        blob.append("\nSYMBOL DEFINITIONS:")
+        for header, numbered in definitions:
+            blob.append(f"\n--- SYMBOL: {header} ---\n{numbered}")
 
     blob.append("\nRELEVANT FILES:")
     for rel, text in files:
-        numbered, end_line = _with_line_numbers(text, start_line=1)
-        blob.append(f"\n--- FILE: {rel} (lines 1-{end_line}) ---\n{numbered}")
+        if unchanged and rel in unchanged:
+            blob.append(f"\n--- FILE: {rel} (unchanged; content was sent earlier in this conversation) ---")
+            continue
+        if skeletons and rel in skeletons:
+            total = len(text.splitlines())
+            blob.append(f"\n--- FILE: {rel} (skeleton: signatures only, {total} lines; ... = omitted) ---")
+            blob.append(skeletons[rel])
+            continue
+        numbered = NumberedText(text, start_line=1)
+        blob.append(f"\n--- FILE: {rel} (lines 1-{numbered.end_line}) ---")
+        blob.append(numbered)
 
     if stdin_text.strip():
-        blob.append("\nSTDIN (piped input):")
+        blob.append(f"\n{stdin_label}:")
         blob.append(stdin_text)
 
     blob.append(f"\nUSER QUESTION:\n{question}")
 
+    # Parts are joined (and files line-numbered) only while the request body is encoded.
     return [
         {"role": "system", "content": SYSTEM_ASK},
-        {"role": "user", "content": "\n".join(blob)},
+        {"role": "user", "content": Prompt(blob)},
     ]
 
 
@@ -215,15 +555,26 @@ def build_edit_messages(file_path: str, file_content: str, instruction: str):
     ]
 
 @app.command()
-def doctor():
+def doctor(
+    bench: bool = typer.Option(False, "--bench", help="Benchmark load time, TTFT and tokens/sec."),
+    bench_models: Optional[str] = typer.Option(
+        None, "--models", help="Comma-separated models to benchmark (default: model)."
+    ),
+    sizes: str = typer.Option("512,2048,8192", "--sizes", help="Prompt sizes (tokens) for --bench."),
+    ctx: str = typer.Option("4096,16384", "--ctx", help="num_ctx values for --bench."),
+    json_out: Optional[Path] = typer.Option(None, "--json", help="Where to write --bench results (default: .local-agent/bench/)."),
+):
     """
     Environment checks (Claude Code-style 'am I ready to run?').
     """
     cfg = load_config()
-    repo = RepoContext.from_cwd()
+    repo = RepoContext.from_config(cfg)
 
-    client = OllamaClient(host=cfg.ollama_host, model=cfg.model, timeout_s=5.0)
+    client = _make_client(cfg, cfg.model, timeout_s=5.0)
     ok, msg = client.healthcheck()
+    if isinstance(client, OllamaPool):
+        for _ in range(2):  # a few more probes for the latency columns
+            client.refresh(force=True)
 
     models: list[str] = []
     model_present = False
@@ -240,7 +591,20 @@ def doctor():
     table.add_column("Details", overflow="fold")
 
     table.add_row("Repo root", "OK", str(repo.root))
+    table.add_row("Scope", "OK", ", ".join(repo.scope) if repo.scope else "whole repo")
     table.add_row("Ollama reachable", "OK" if ok else "FAIL", msg)
+    if isinstance(client, OllamaPool):
+        for st in client.stats():
+            if st.healthy:
+                probes = list(st.probe_ms)
+                has_model = st.models is not None and cfg.model in st.models
+                details = (
+                    f"/api/tags {min(probes):.0f}/{sum(probes) / len(probes):.0f} ms (min/avg); "
+                    f"model {'present' if has_model else 'missing'}"
+                )
+                table.add_row(f"  host {st.host}", "OK" if has_model else "WARN", details)
+            else:
+                table.add_row(f"  host {st.host}", "FAIL", st.last_error)
     table.add_row("Configured model present", "OK" if model_present else ("WARN" if ok else "SKIP"), cfg.model)
 
     rg = shutil.which("rg")
@@ -261,13 +625,59 @@ def doctor():
             )
         )
 
+    if bench:
+        if not ok:
+            console.print(Panel("Ollama is not reachable; skipping the benchmark.", title="Bench", border_style="red"))
+            raise typer.Exit(1)
+        _doctor_bench(cfg, repo, bench_models, sizes, ctx, json_out)
+
+def _int_list(text: str) -> list[int]:
+    return [int(x) for x in text.replace(" ", "").split(",") if x]
+
+def _doctor_bench(cfg, repo: RepoContext, models: Optional[str], sizes: str, ctx: str, json_out: Optional[Path]) -> None:
+    names = [m.strip() for m in (models or cfg.model).split(",") if m.strip()]
+    host = cfg.ollama_hosts[0]
+    try:
+        with console.status("Benchmarking...") as status:
+            results = run_bench(
+                lambda m: OllamaClient(host=host, model=m),
+                names,
+                _int_list(sizes),
+                sorted(_int_list(ctx)),
+                on_step=lambda msg: status.update(f"Benchmarking {msg}..."),
+            )
+    except OllamaError as e:
+        console.print(Panel(f"[red]Ollama Error:[/red] {e}", title="Bench", border_style="red"))
+        raise typer.Exit(1)
+
+    def num(v: Optional[float], fmt: str) -> str:
+        return "-" if v is None else format(v, fmt)
+
+    table = Table(title=f"local-agent bench ({host})")
+    for col in ("Model", "Run", "num_ctx", "Prompt tok", "Load s", "TTFT s", "Prompt tok/s", "Gen tok/s"):
+        table.add_column(col, justify="left" if col in ("Model", "Run") else "right")
+    for r in results:
+        table.add_row(
+            r.model, r.kind, str(r.num_ctx), str(r.prompt_tokens), f"{r.load_s:.2f}", f"{r.ttft_s:.2f}",
+            num(r.prompt_tps, ".0f"), num(r.gen_tps, ".1f"),
+        )
+    console.print(table)
+
+    out = json_out or state_dir(repo.root, "bench") / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.write_text(
+        json.dumps({"host": host, "ts": time.time(), "results": [r.to_json() for r in results]}, indent=2),
+        encoding="utf-8",
+    )
+    console.print(f"Results written to {out}")
+
 @app.command()
 def commands():
     """
     List available custom slash commands.
     """
     repo = RepoContext.from_cwd()
-    specs = discover_commands(repo.root)
+    registry = repo.command_registry()
+    specs = registry.specs()
 
     if not specs:
         console.print(
@@ -286,36 +696,72 @@ def commands():
     t.add_column("Invoke as")
     t.add_column("Scope")
     t.add_column("File")
+    t.add_column("Directives")
 
     for s in specs:
         invoke = f"/{s.name}"  # if unique; chat will require project:/user: if conflicts
-        t.add_row(invoke, s.scope, str(s.path))
+        t.add_row(invoke, s.scope, str(s.path), registry.load(s).directives.describe())
 
     console.print(t)
 
 
 @app.command()
-def ask(question: str = typer.Argument(..., help="Your coding question.")):
+def ask(
+    question: str = typer.Argument(..., help="Your coding question."),
+    fast: bool = typer.Option(False, "--fast", help="Use fast_model regardless of routing."),
+    heavy: bool = typer.Option(False, "--heavy", help="Use the main model regardless of routing."),
+    scope: Optional[str] = typer.Option(
+        None, "--scope", help='Limit retrieval: "auto" (current package + deps), "repo", or dir[,dir...].'
+    ),
+    agent: Optional[bool] = typer.Option(
+        None, "--agent/--no-agent", help="Let the model fetch context with tools (default: agent_mode)."
+    ),
+):
     cfg = load_config()
-    repo = RepoContext.from_cwd()
+    repo = RepoContext.from_config(cfg, scope=scope)
 
     # ✅ Quote Mode: deterministic, no hallucinated quotes
     if _is_quote_mode(question):
-        msg = _quote_mode_response(repo, question, extra_excludes=cfg.extra_excludes)
+        msg = _quote_mode_response(repo, question, extra_excludes=cfg.extra_excludes, cfg=cfg)
         console.print(Panel(msg, title="Quote mode", expand=True))
         raise typer.Exit(0)
 
-    client = OllamaClient(host=cfg.ollama_host, model=cfg.model)
-
-    stdin_text = _read_stdin_if_piped()
-    tree = repo.file_tree(max_files=cfg.max_tree_files, extra_excludes=cfg.extra_excludes)
-    rels = repo.select_relevant_files(question, max_files=cfg.max_context_files, extra_excludes=cfg.extra_excludes)
-    rels = sorted(set(rels + _force_include_paths(repo.root, question)))
-    files = [repo.read_file(r, max_chars=cfg.max_file_chars) for r in rels]
+    client = _make_client(cfg, cfg.model, priority=INTERACTIVE)
+    override = "heavy" if heavy else "fast" if fast else None
+    piped: Optional[tuple[str, str]] = None
+    if cfg.agent_mode if agent is None else agent:
+        piped = _ask_agent(repo, client, question, cfg, override)  # returns only if the model has no tools
+
+    hits = repo.symbol_hits(question, extra_excludes=cfg.extra_excludes) if cfg.symbol_index else []
+    rels = _select_context_files(repo, question, cfg, cfg.max_context_files, hits, expand=cfg.graph_expand_files)
+    all_files = repo.file_tree(max_files=TREE_SCAN_LIMIT, extra_excludes=cfg.extra_excludes)
+    tree = None
+    if cfg.repo_map and len(rels) < cfg.repo_map_min_hits:
+        tree = _repo_map_overview(repo, all_files, rels, question, cfg)
+    if tree is None:
+        tree = render_tree(all_files, relevant=rels, terms=query_terms(question), max_lines=cfg.max_tree_files)
+    files, skeletons = _read_context_files(repo, rels, question, cfg, cfg.max_file_chars)
+    definitions = _symbol_snippets(repo, hits)
 
     try:
-        out = client.chat(build_ask_messages(tree, files, question, stdin_text=stdin_text))
-        console.print(Panel(out, title=f"Answer ({cfg.model})", expand=True))
+        stdin_text, stdin_label = piped or _read_piped_stdin(client, question, cfg)
+        messages = build_ask_messages(
+            tree, files, question, stdin_text=stdin_text, stdin_label=stdin_label, definitions=definitions,
+            skeletons=skeletons,
+        )
+        context_chars = sum(len(m["content"]) for m in messages)
+        route = route_query(question, context_chars, cfg, override=override)
+        if route.model != cfg.model:
+            client = _make_client(cfg, route.model, priority=INTERACTIVE)
+        t0, ok = time.perf_counter(), False
+        try:
+            out = client.chat(messages, options=resolve_options(cfg.options_for("ask"), messages))
+            ok = True
+        finally:
+            if cfg.fast_model:
+                latency = time.perf_counter() - t0 - _queued_s(client)
+                log_route(repo.root, "ask", route, len(question), context_chars, latency, ok)
+        console.print(Panel(out, title=_answer_title("Answer", route, _queued_s(client)), expand=True))
     except OllamaTimeoutError as e:
         console.print(Panel(f"[yellow]Timeout:[/yellow] {e}", title="Error", border_style="red"))
         raise typer.Exit(1)
@@ -327,26 +773,136 @@ def ask(question: str = typer.Argument(..., help="Your coding question.")):
         raise typer.Exit(1)
 
 
+def _ask_agent(repo: RepoContext, client, question: str, cfg, override: Optional[str]) -> tuple[str, str]:
+    """
+    Agent mode of `ask`: the model starts from the compact tree and fetches
+    what it needs with search / read / find_symbol, for at most
+    `agent_max_turns` requests. Exits once answered. If the model has no tool
+    support, returns the piped input so the upfront path can answer instead.
+    """
+    ex = cfg.extra_excludes
+    all_files = repo.file_tree(max_files=TREE_SCAN_LIMIT, extra_excludes=ex)
+    tree = render_tree(all_files, terms=query_terms(question), max_lines=cfg.max_tree_files)
+
+    def grep(pattern: str) -> str:
+        return _rg_search(
+            repo.root,
+            [pattern],
+            ex,
+            max_lines=SEARCH_MAX_HITS,
+            paths=repo.search_roots(),
+            ignore_case=True,
+            raise_errors=True,  # e.g. an invalid regex goes back to the model to fix
+        )
+
+    tools = RepoTools(repo, ex, grep=grep if shutil.which("rg") else None, symbols=cfg.symbol_index)
+
+    stdin_text, stdin_label = "", ""
+    route = Route(cfg.model, "heavy", "")
+    ctx_floor = 0
+
+    def options(messages: list[dict]) -> dict:
+        nonlocal ctx_floor  # num_ctx only grows, so the model is not reloaded between tool calls
+        opts = resolve_options(cfg.options_for("ask"), messages, floor=ctx_floor)
+        ctx_floor = opts.get("num_ctx", ctx_floor)
+        return opts
+
+    try:
+        stdin_text, stdin_label = _read_piped_stdin(client, question, cfg)
+        user = f"{tree}\n"
+        if stdin_text.strip():
+            user += f"\n{stdin_label}:\n{stdin_text}\n"
+        user += f"\nUSER QUESTION:\n{question}"
+        messages: list[dict] = [{"role": "system", "content": SYSTEM_AGENT}, {"role": "user", "content": user}]
+        route = route_query(question, len(user), cfg, override=override)
+        if route.model != cfg.model:
+            client = _make_client(cfg, route.model, priority=INTERACTIVE)
+        t0, ok = time.perf_counter(), False
+        try:
+            with console.status("Thinking...") as status:
+                result = run_agent(
+                    client, messages, tools, cfg.agent_max_turns, options=options,
+                    on_call=lambda call: status.update(f"Looking up {call}..."),
+                )
+            ok = True
+        finally:
+            if cfg.fast_model:
+                context_chars = sum(len(str(m["content"])) for m in messages)
+                latency = time.perf_counter() - t0 - _queued_s(client)
+                log_route(repo.root, "ask", route, len(question), context_chars, latency, ok)
+    except OllamaTimeoutError as e:
+        console.print(Panel(f"[yellow]Timeout:[/yellow] {e}", title="Error", border_style="red"))
+        raise typer.Exit(1)
+    except OllamaConnectionError as e:
+        console.print(Panel(f"[red]Connection Error:[/red] {e}", title="Error", border_style="red"))
+        raise typer.Exit(1)
+    except OllamaError as e:
+        if "does not support tools" not in str(e):
+            console.print(Panel(f"[red]Ollama Error:[/red] {e}", title="Error", border_style="red"))
+            raise typer.Exit(1)
+        console.print(f"[dim]{route.model} does not support tool calling; sending context upfront instead.[/dim]")
+        return stdin_text, stdin_label
+
+    console.print(Panel(result.answer, title=_answer_title("Answer", route, _queued_s(client)), expand=True))
+    summary = (
+        f"agent: {len(result.tool_calls)} tool call(s) in {result.turns} request(s), "
+        f"{result.tool_chars:,} chars fetched" + ("; turn cap reached" if result.capped else "")
+    )
+    if result.tool_calls:
+        summary += "\n" + ", ".join(result.tool_calls)
+    console.print(summary, style="dim", markup=False, highlight=False)
+    raise typer.Exit(0)
+
+
 @app.command()
-def chat():
+def chat(
+    resume: bool = typer.Option(False, "--resume", help="Continue the most recent chat session in this repo."),
+    session_id: Optional[str] = typer.Option(None, "--session", help="Continue a specific session by id."),
+    scope: Optional[str] = typer.Option(
+        None, "--scope", help='Limit retrieval: "auto" (current package + deps), "repo", or dir[,dir...].'
+    ),
+):
     """
     Interactive chat (repo-aware each turn) + slash commands.
     """
     cfg = load_config()
-    repo = RepoContext.from_cwd()
+    repo = RepoContext.from_config(cfg, scope=scope)
+    if cfg.session_cache_mb > 0:
+        repo.enable_cache(max_bytes=cfg.session_cache_mb * 1024 * 1024)
     model_name = cfg.model
-    client = OllamaClient(host=cfg.ollama_host, model=model_name)
 
-    history = [{"role": "system", "content": SYSTEM_ASK}]
+    session: Optional[ChatSession] = None
+    if resume or session_id:
+        session = ChatSession.load(repo.root, session_id)
+        if session is None:
+            console.print(Panel(f"No chat session found{f' with id {session_id}' if session_id else ''}.", title="Error"))
+            raise typer.Exit(1)
+        model_name = session.model or model_name
+    elif cfg.chat_sessions:
+        session = ChatSession.create(repo.root, model_name)
 
-    console.print(
-        Panel(
-            "Type your question.\n"
-            "Slash commands: /help /status /model <name> /config /exit\n"
-            "Custom commands: put .md files in ./.local-agent/commands/ or ~/.local-agent/commands/\n",
-            title="local-agent chat",
-        )
+    clients = {model_name: _make_client(cfg, model_name, priority=INTERACTIVE)}
+    # Routing applies while the model is not pinned (by /model or a resumed session's model).
+    pinned = model_name != cfg.model
+    route_override: Optional[str] = None
+
+    history = [{"role": "system", "content": SYSTEM_ASK}]
+    sent_tree = ""  # hash of the last tree rendering the model has seen
+    ctx_floor = 0  # num_ctx only grows within a chat, so the model is not reloaded every turn
+    sent_files: dict[str, str] = {}  # rel path -> hash of the content the model has seen
+    if session is not None:
+        history += session.history
+        sent_files.update(session.sent_files)
+        sent_tree = session.sent_tree
+
+    banner = (
+        "Type your question.\n"
+        "Slash commands: /help /status /model <name> /route fast|heavy|auto /config /exit\n"
+        "Custom commands: put .md files in ./.local-agent/commands/ or ~/.local-agent/commands/\n"
     )
+    if session is not None and session.history:
+        banner += f"\nResumed session {session.id} ({len(session.history) // 2} turn(s)).\n"
+    console.print(Panel(banner, title="local-agent chat"))
 
     while True:
         try:
@@ -357,6 +913,7 @@ def chat():
 
         if not raw.strip():
             continue
+        command: Optional[LoadedCommand] = None  # set when a custom command produced this turn
 
         # Slash commands
         if raw.lstrip().startswith("/"):
@@ -369,12 +926,13 @@ def chat():
                 raise typer.Exit(0)
 
             if cmd == "help":
-                specs = discover_commands(repo.root)
+                specs = repo.commands()
                 msg = [
                     "Built-in:",
                     "  /help",
                     "  /status",
                     "  /model <name>",
+                    "  /route fast|heavy|auto",
                     "  /config",
                     "  /exit",
                     "",
@@ -395,9 +953,15 @@ def chat():
                 console.print(
                     Panel(
                         f"Repo: {repo.root}\n"
+                        f"Scope: {', '.join(repo.scope) if repo.scope else 'whole repo'}\n"
                         f"Model: {model_name}\n"
-                        f"Ollama host: {cfg.ollama_host}\n"
-                        f"Excludes: {sorted(cfg.extra_excludes)}",
+                        f"Routing: {_routing_status(cfg, pinned, route_override)}\n"
+                        f"Ollama host: {', '.join(cfg.ollama_hosts)}\n"
+                        f"Excludes: {sorted(cfg.extra_excludes)}\n"
+                        f"Session: {session.id if session else '(not saved)'}"
+                        + (f"\nRepo cache: {repo.cache.hits} hits, {repo.cache.misses} misses" if repo.cache else "")
+                        + (f"\nLast search: {_retrieval_status(repo.last_retrieval)}" if repo.last_retrieval else "")
+                        + (f"\nOllama queue: {_queue_status(clients[model_name])}" if model_name in clients else ""),
                         title="Status",
                     )
                 )
@@ -406,7 +970,7 @@ def chat():
             if cmd == "config":
                 console.print(
                     Panel(
-                        f"ollama_host = {cfg.ollama_host}\n"
+                        f"ollama_hosts = {cfg.ollama_hosts}\n"
                         f"model = {model_name}\n"
                         f"max_file_chars = {cfg.max_file_chars}\n"
                         f"max_context_files = {cfg.max_context_files}\n"
@@ -425,45 +989,97 @@ def chat():
                     console.print(Panel("Usage: /model <ollama-model-name>", title="Model"))
                     continue
                 model_name = args.strip()
-                client = OllamaClient(host=cfg.ollama_host, model=model_name)
+                pinned = True
+                if session is not None:
+                    session.record_model(model_name)
                 console.print(Panel(f"Model set to: {model_name}", title="Model"))
                 continue
 
-            # Custom markdown commands
-            specs = discover_commands(repo.root)
-            spec = resolve_command(specs, cmd)
-            if spec is None:
-                # allow "project:cmd" / "user:cmd"
-                spec = resolve_command(specs, f"{cmd}")  # already without leading slash
-            if spec is None and ":" in cmd:
-                spec = resolve_command(specs, cmd)
+            if cmd == "route":
+                choice = args.strip().lower()
+                if choice not in ("fast", "heavy", "auto"):
+                    console.print(Panel("Usage: /route fast|heavy|auto", title="Route"))
+                    continue
+                route_override = None if choice == "auto" else choice
+                model_name, pinned = cfg.model, False
+                console.print(Panel(f"Routing: {_routing_status(cfg, pinned, route_override)}", title="Route"))
+                continue
 
+            # Custom markdown commands ("review", or "project:review" / "user:review")
+            registry = repo.command_registry()
+            spec = registry.resolve(cmd)
             if spec is None:
                 console.print(Panel(f"Unknown command: /{cmd}\nTry /help", title="Error"))
                 continue
 
-            template = spec.path.read_text(encoding="utf-8", errors="replace")
-            prompt = render_template(template, args)
-            raw = prompt  # treat as user query and fall through
+            command = registry.load(spec)
+            raw = render_template(command.template, args)  # treat as user query and fall through
 
         # Normal question turn
         if _is_quote_mode(raw):
-            msg = _quote_mode_response(repo, raw, extra_excludes=cfg.extra_excludes)
+            msg = _quote_mode_response(repo, raw, extra_excludes=cfg.extra_excludes, cfg=cfg)
             console.print(Panel(msg, title="Quote mode", expand=True))
             continue
 
-        tree = repo.file_tree(max_files=min(150, cfg.max_tree_files), extra_excludes=cfg.extra_excludes)
-        rels = repo.select_relevant_files(raw, max_files=min(12, cfg.max_context_files), extra_excludes=cfg.extra_excludes)
-        rels = sorted(set(rels + _force_include_paths(repo.root, raw)))
-        files = [repo.read_file(r, max_chars=min(40_000, cfg.max_file_chars)) for r in rels]
-
-        turn = build_ask_messages(tree, files, raw)[1]["content"]
+        # Relevance-free so it stays identical across turns and is only re-sent when the repo changes.
+        tree = render_tree(
+            repo.file_tree(max_files=TREE_SCAN_LIMIT, extra_excludes=cfg.extra_excludes),
+            max_lines=min(150, cfg.max_tree_files),
+        )
+        tree_hash = file_digest(tree.encode("utf-8"))
+        if tree_hash == sent_tree:
+            tree = "REPO FILE TREE: unchanged (sent earlier in this conversation)."
+        directives = command.directives if command is not None else CommandDirectives()
+        max_files = min(12, cfg.max_context_files)
+        if directives.max_context_files is not None:
+            max_files = directives.max_context_files
+        pinned_files = expand_pinned(
+            directives.files, repo.file_tree(max_files=TREE_SCAN_LIMIT, extra_excludes=cfg.extra_excludes)
+        )
+        hits: list[SymbolHit] = []
+        rels = list(pinned_files)
+        if directives.retrieval and len(rels) < max_files:
+            if cfg.symbol_index:
+                hits = repo.symbol_hits(raw, extra_excludes=cfg.extra_excludes, max_hits=3)
+            found = _select_context_files(
+                repo, raw, cfg, max_files - len(rels), hits, expand=min(4, cfg.graph_expand_files)
+            )
+            rels += [r for r in found if r not in rels]
+            if directives.max_context_files is not None:
+                rels = rels[: max(max_files, len(pinned_files))]
+        files, skeletons = _read_context_files(repo, rels, raw, cfg, min(40_000, cfg.max_file_chars))
+
+        hashes = {rel: file_digest(text.encode("utf-8")) for rel, text in files}
+        unchanged = {rel for rel, h in hashes.items() if sent_files.get(rel) == h}
+        turn = build_ask_messages(
+            tree, files, raw, definitions=_symbol_snippets(repo, hits), unchanged=unchanged, skeletons=skeletons
+        )[1]["content"]
+        # a skeleton does not count as having seen the file
+        hashes = {rel: h for rel, h in hashes.items() if rel not in skeletons or rel in unchanged}
         history.append({"role": "user", "content": turn})
 
+        context_chars = sum(len(m["content"]) for m in history)
+        if directives.model:
+            route = Route(directives.model, "command", f"set by /{command.spec.name}")
+        elif pinned:
+            route = Route(model_name, "heavy", "")
+        else:
+            route = route_query(raw, context_chars, cfg, override=route_override)
+        if route.model not in clients:
+            clients[route.model] = _make_client(cfg, route.model, priority=INTERACTIVE)
+        t0, ok = time.perf_counter(), False
+
         try:
-            out = client.chat(history)
+            options = resolve_options(cfg.options_for("chat"), history, floor=ctx_floor)
+            ctx_floor = options.get("num_ctx", ctx_floor)
+            out = clients[route.model].chat(history, options=options)
+            ok = True
             history.append({"role": "assistant", "content": out})
-            console.print(Panel(out, title=f"Assistant ({model_name})", expand=True))
+            sent_files.update(hashes)
+            sent_tree = tree_hash
+            if session is not None:
+                session.record_turn(content_text(turn), out, hashes, tree=sent_tree)
+            console.print(Panel(out, title=_answer_title("Assistant", route, _queued_s(clients[route.model])), expand=True))
         except OllamaTimeoutError as e:
             console.print(Panel(f"[yellow]Timeout:[/yellow] {e}\n\nTry again with a shorter message or wait for the model to finish loading.", title="Error", border_style="red"))
             # Remove the user message from history since we didn't get a response
@@ -474,6 +1090,161 @@ def chat():
         except OllamaError as e:
             console.print(Panel(f"[red]Ollama Error:[/red] {e}", title="Error", border_style="red"))
             history.pop()
+        finally:
+            if cfg.fast_model and not pinned and not directives.model:
+                latency = time.perf_counter() - t0 - _queued_s(clients[route.model])
+                log_route(repo.root, "chat", route, len(raw), context_chars, latency, ok)
+
+
+@app.command("map")
+def map_(
+    background: bool = typer.Option(False, "--background", help="Build in a detached process and return immediately."),
+    limit: Optional[int] = typer.Option(None, "--limit", help="Summarize at most N files this run."),
+    scope: Optional[str] = typer.Option(
+        None, "--scope", help='Limit retrieval: "auto" (current package + deps), "repo", or dir[,dir...].'
+    ),
+):
+    """
+    Summarize repo files (one paragraph each) for the repo map used when retrieval is weak.
+    Only files whose content changed since the last run are sent to the model.
+    """
+    cfg = load_config()
+    repo = RepoContext.from_config(cfg, scope=scope)
+
+    if background:
+        log_path = state_dir(repo.root, "index") / "repomap.log"
+        cmd = [sys.executable, "-m", "local_agent", "map", "--scope", ",".join(repo.scope) or "repo"]
+        cmd += ["--limit", str(limit)] if limit else []
+        with log_path.open("ab") as log:
+            proc = subprocess.Popen(
+                cmd, cwd=repo.root, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        console.print(Panel(f"Building repo map in the background (pid {proc.pid}).\nLog: {log_path}", title="Repo map"))
+        raise typer.Exit(0)
+
+    model = cfg.fast_model or cfg.model
+    client = _make_client(cfg, model, priority=BATCH)
+    rmap = RepoMap(repo.root, shared=repo.shared_cache())
+    files = repo.file_tree(max_files=TREE_SCAN_LIMIT, extra_excludes=cfg.extra_excludes)
+    try:
+        with console.status("Summarizing files...") as status:
+            done = build_repo_map(
+                rmap, client, model, files,
+                parallelism=cfg.repo_map_parallelism,
+                limit=limit,
+                on_progress=lambda n, total: status.update(f"Summarized {n}/{total} file(s)..."),
+            )
+    except OllamaError as e:
+        console.print(Panel(f"[red]Ollama Error:[/red] {e}\nSummaries made so far are kept.", title="Error", border_style="red"))
+        raise typer.Exit(1)
+    finally:
+        covered = len(rmap.summaries_for(files))
+        rmap.close()
+    console.print(Panel(f"Summarized {done} file(s) with {model}; {covered}/{len(files)} files covered.", title="Repo map"))
+
+
+EVAL_STRATEGIES = ("content", "path", "symbols", "fused", "ask")
+
+
+@app.command("eval")
+def eval_(
+    questions: Path = typer.Argument(..., help="JSONL (or YAML) file of questions with expected files/line ranges."),
+    strategies: str = typer.Option(",".join(EVAL_STRATEGIES), "--strategy", help="Comma-separated strategies to run."),
+    ks: str = typer.Option("1,5,10", "--k", help="Cutoffs for recall@k."),
+    scope: Optional[str] = typer.Option(
+        None, "--scope", help='Limit retrieval: "auto" (current package + deps), "repo", or dir[,dir...].'
+    ),
+    json_out: Optional[Path] = typer.Option(None, "--json", help="Where to write per-question results (default: .local-agent/eval/)."),
+):
+    """
+    Measure retrieval: recall@k, MRR, prompt tokens and wall time per strategy.
+    Strategies: content, path, symbols (each alone, run to completion), fused
+    (all three under retrieval_deadline_ms) and ask (the full ask pipeline).
+    No model is called.
+    """
+    cfg = load_config()
+    repo = RepoContext.from_config(cfg, scope=scope)
+    try:
+        cases = load_cases(questions)
+    except (OSError, ValueError) as e:
+        console.print(Panel(f"[red]{e}[/red]", title="Eval", border_style="red"))
+        raise typer.Exit(1)
+    names = [n.strip() for n in strategies.split(",") if n.strip()]
+    unknown = [n for n in names if n not in EVAL_STRATEGIES]
+    if unknown or not cases:
+        msg = f"Unknown strategy: {', '.join(unknown)} (choose from {', '.join(EVAL_STRATEGIES)})" if unknown else "No questions."
+        console.print(Panel(f"[red]{msg}[/red]", title="Eval", border_style="red"))
+        raise typer.Exit(1)
+    cutoffs = _int_list(ks)
+    depth = max(cutoffs + [cfg.max_context_files])
+    ex = cfg.extra_excludes
+
+    # index builds are a one-time cost, not query latency
+    if cfg.symbol_index:
+        try:
+            repo.symbol_index(ex)
+        except (sqlite3.Error, OSError):
+            pass
+    repo.import_graph(ex)
+    all_files = repo.file_tree(max_files=TREE_SCAN_LIMIT, extra_excludes=ex)
+
+    def ranker(name: str):
+        if name == "ask":
+            def ask_pipeline(q: str) -> list[str]:
+                hits = repo.symbol_hits(q, extra_excludes=ex) if cfg.symbol_index else []
+                return _select_context_files(repo, q, cfg, cfg.max_context_files, hits, expand=cfg.graph_expand_files)
+            return ask_pipeline
+        if name == "fused":
+            return lambda q: repo.search(q, ex).ranked[:depth]
+        return lambda q: repo.search(q, ex, strategies=(name,), deadline_ms=0).ranked[:depth]
+
+    def context(name: str, q: str, ranked: list[str]) -> tuple[int, dict[str, set[int]]]:
+        rels = ranked if name == "ask" else ranked[: cfg.max_context_files]
+        hits = repo.symbol_hits(q, extra_excludes=ex) if name == "ask" and cfg.symbol_index else []
+        files, skeletons = _read_context_files(repo, rels, q, cfg, cfg.max_file_chars)
+        tree = render_tree(all_files, relevant=rels, terms=query_terms(q), max_lines=cfg.max_tree_files)
+        messages = build_ask_messages(tree, files, q, definitions=_symbol_snippets(repo, hits), skeletons=skeletons)
+        visible: dict[str, set[int]] = {}
+        for rel, text in files:
+            if rel in skeletons:
+                visible[rel] = set(sorted(skeleton_lines(rel, text) or ())[:MAX_SKELETON_LINES])
+            else:
+                total = len(text.splitlines())
+                if SNIP_MARKER in text:
+                    total = len(read_text_limited(repo.root / rel, max_chars=SKELETON_MAX_CHARS).splitlines())
+                visible[rel] = visible_lines(text, total)
+        return estimate_messages_tokens(messages), visible
+
+    with console.status("Evaluating...") as status:
+        reports = run_eval(
+            cases,
+            {n: ranker(n) for n in names},
+            context,
+            on_progress=lambda n, i, total: status.update(f"Evaluating {n}: question {i}/{total}..."),
+        )
+
+    table = Table(title=f"local-agent eval ({len(cases)} questions)")
+    cols = ["Strategy"] + [f"R@{k}" for k in cutoffs] + ["MRR", "Lines", "Prompt tok", "ms", "p95 ms"]
+    for col in cols:
+        table.add_column(col, justify="left" if col == "Strategy" else "right")
+    for r in reports:
+        lines = r.line_recall()
+        table.add_row(
+            r.name, *(f"{r.recall(k):.2f}" for k in cutoffs), f"{r.mrr():.2f}",
+            "-" if lines is None else f"{lines:.2f}", f"{r.tokens():.0f}", f"{r.ms():.1f}", f"{r.ms(95):.1f}",
+        )
+    console.print(table)
+
+    out = json_out or state_dir(repo.root, "eval") / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.write_text(
+        json.dumps(
+            {"questions": str(questions), "ts": time.time(), "results": [r.to_json(cutoffs) for r in reports]},
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    console.print(f"Results written to {out}")
 
 
 @app.command()
@@ -485,8 +1256,8 @@ def edit(
     yes: bool = typer.Option(False, "--yes", help="Skip confirmation prompt when applying."),
 ):
     cfg = load_config()
-    repo = RepoContext.from_cwd()
-    client = OllamaClient(host=cfg.ollama_host, model=cfg.model)
+    repo = RepoContext.from_config(cfg)
+    client = _make_client(cfg, cfg.model, priority=BATCH)
 
     rel = path.strip().lstrip("./")
     abs_path = (repo.root / rel).resolve()
@@ -495,7 +1266,10 @@ def edit(
 
     current = abs_path.read_text(encoding="utf-8", errors="replace")
     try:
-        updated = client.chat(build_edit_messages(rel, current, instruction))
+        messages = build_edit_messages(rel, current, instruction)
+        # the reply is the whole file again
+        options = resolve_options(cfg.options_for("edit"), messages, expected_output=estimate_tokens(current) + 256)
+        updated = client.chat(messages, options=options)
     except OllamaTimeoutError as e:
         console.print(Panel(f"[yellow]Timeout:[/yellow] {e}", title="Error", border_style="red"))
         raise typer.Exit(1)
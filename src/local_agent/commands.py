@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import fnmatch
+import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .repocache import dir_signature
 
 
 @dataclass(frozen=True)
@@ -20,6 +24,10 @@ def _user_commands_dir() -> Path:
     return Path.home() / ".local-agent" / "commands"
 
 
+def command_dirs(repo_root: Path) -> List[Path]:
+    return [_project_commands_dir(repo_root), _user_commands_dir()]
+
+
 def discover_commands(repo_root: Path) -> List[CommandSpec]:
     """
     Discover project + user markdown commands.
@@ -90,3 +98,146 @@ def render_template(markdown_text: str, arguments: str) -> str:
     Supports $ARGUMENTS replacement like Claude Code best-practices describes. :contentReference[oaicite:7]{index=7}
     """
     return markdown_text.replace("$ARGUMENTS", arguments.strip())
+
+
+@dataclass(frozen=True)
+class CommandDirectives:
+    """
+    Front-matter settings of a command template:
+
+        ---
+        files: src/app.py, docs/*.md   # pinned into the context (fnmatch globs)
+        max_context_files: 4
+        model: qwen2.5-coder:14b
+        retrieval: off                 # only the pinned files
+        ---
+    """
+
+    files: Tuple[str, ...] = ()
+    max_context_files: Optional[int] = None
+    model: Optional[str] = None
+    retrieval: bool = True
+
+    def describe(self) -> str:
+        out = []
+        if self.files:
+            out.append("files=" + ",".join(self.files))
+        if self.max_context_files is not None:
+            out.append(f"max_context_files={self.max_context_files}")
+        if self.model:
+            out.append(f"model={self.model}")
+        if not self.retrieval:
+            out.append("retrieval off")
+        return " ".join(out)
+
+
+@dataclass(frozen=True)
+class LoadedCommand:
+    spec: CommandSpec
+    directives: CommandDirectives
+    template: str  # body without front matter
+
+
+_FRONT_MATTER_RE = re.compile(r"\A---[ \t]*\r?\n(.*?)^---[ \t]*(?:\r?\n|\Z)", re.DOTALL | re.MULTILINE)
+_FALSE = {"off", "false", "no", "0", "none"}
+
+
+def _values(raw: str) -> List[str]:
+    raw = raw.strip().strip("[]")
+    return [v.strip().strip("'\"") for v in raw.split(",") if v.strip().strip("'\"")]
+
+
+def parse_command(text: str) -> Tuple[CommandDirectives, str]:
+    """
+    Splits optional `---` front matter (simple `key: value` lines; lists as
+    `a, b`, `[a, b]` or `- a` lines) from the template body.
+    Unknown keys and malformed values are ignored.
+    """
+    m = _FRONT_MATTER_RE.match(text)
+    if not m:
+        return CommandDirectives(), text
+    fields: Dict[str, List[str]] = {}
+    key = None
+    for line in m.group(1).splitlines():
+        line = line.split(" #", 1)[0].rstrip()
+        if not line.strip():
+            continue
+        if line.lstrip().startswith("- ") and key is not None:
+            fields[key] += _values(line.lstrip()[2:])
+            continue
+        if ":" not in line:
+            continue
+        key, value = (part.strip() for part in line.split(":", 1))
+        key = key.lower().replace("-", "_")
+        fields[key] = _values(value)
+    d: Dict[str, object] = {}
+    if fields.get("files"):
+        d["files"] = tuple(fields["files"])
+    if fields.get("max_context_files"):
+        try:
+            d["max_context_files"] = max(0, int(fields["max_context_files"][0]))
+        except ValueError:
+            pass
+    if fields.get("model"):
+        d["model"] = fields["model"][0]
+    if fields.get("retrieval"):
+        d["retrieval"] = fields["retrieval"][0].lower() not in _FALSE
+    return CommandDirectives(**d), text[m.end() :]
+
+
+def expand_pinned(patterns: Iterable[str], rel_paths: Iterable[str]) -> List[str]:
+    """
+    Repo-relative files matching the pinned `patterns`, in pattern order.
+    """
+    rels = list(rel_paths)
+    out: List[str] = []
+    for pat in patterns:
+        pat = pat[2:] if pat.startswith("./") else pat
+        if any(ch in pat for ch in "*?["):
+            out += [r for r in rels if fnmatch.fnmatchcase(r, pat)]
+        elif pat in rels:
+            out.append(pat)
+        else:  # a directory: everything below it
+            out += [r for r in rels if r.startswith(pat.rstrip("/") + "/")]
+    return list(dict.fromkeys(out))
+
+
+class CommandRegistry:
+    """
+    Project + user commands, discovered once and re-scanned only when a
+    command directory (or a subdirectory) changes mtime. Templates are parsed
+    once per file version (mtime, size).
+    """
+
+    def __init__(self, repo_root: Path) -> None:
+        self.repo_root = repo_root
+        self._sig: Optional[tuple] = None
+        self._specs: List[CommandSpec] = []
+        self._unique: Dict[str, CommandSpec] = {}
+        self._loaded: Dict[Path, Tuple[Tuple[int, int], LoadedCommand]] = {}
+
+    def specs(self) -> List[CommandSpec]:
+        sig = dir_signature(command_dirs(self.repo_root))
+        if sig != self._sig:
+            self._specs = discover_commands(self.repo_root)
+            self._unique, _ = index_commands(self._specs)
+            self._sig = sig
+        return self._specs
+
+    def resolve(self, token: str) -> Optional[CommandSpec]:
+        specs = self.specs()
+        token = token.strip().lstrip("/")
+        if ":" in token:
+            return resolve_command(specs, token)
+        return self._unique.get(token)
+
+    def load(self, spec: CommandSpec) -> LoadedCommand:
+        st = spec.path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        hit = self._loaded.get(spec.path)
+        if hit is not None and hit[0] == key:
+            return hit[1]
+        directives, template = parse_command(spec.path.read_text(encoding="utf-8", errors="replace"))
+        loaded = LoadedCommand(spec=spec, directives=directives, template=template)
+        self._loaded[spec.path] = (key, loaded)
+        return loaded
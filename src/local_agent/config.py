@@ -14,15 +14,64 @@ from .utils import find_repo_root
 @dataclass
 class AppConfig:
     ollama_host: str = "http://localhost:11434"
+    ollama_hosts: list[str] = None  # type: ignore  # several hosts -> pooled with failover
+    health_interval_s: float = 30.0
+    ollama_max_inflight: int = 2  # per host, across all local-agent processes; interactive first (0 = no limit)
     model: str = "qwen2.5-coder:7b"
     max_file_chars: int = 120_000
     max_context_files: int = 35
     max_tree_files: int = 250
+    skeleton_context: bool = True  # files past the top `full_context_files` are sent as signatures only
+    full_context_files: int = 6
     extra_excludes: set[str] = None  # type: ignore
+    file_source: str = "auto"  # "auto" (git ls-files when in a git repo) | "git" | "walk"
+    recent_commits: int = 50  # boost files touched by the last N commits (0 = off)
+    symbol_index: bool = True  # .local-agent/index/symbols.sqlite
+    junk_filter: bool = True  # skip generated files / lockfiles, down-rank near-duplicates
+    retrieval_deadline_ms: int = 500  # content/path/symbol search budget before ranking what was found
+    scope: str = "auto"  # "auto" (package containing cwd + its deps) | "repo" | "dir[,dir...]"
+    graph_expand_files: int = 6  # import-graph neighbors added to retrieved files
+    chat_sessions: bool = True  # persist chat turns under .local-agent/sessions/
+    session_cache_mb: int = 64  # chat: in-memory repo cache (file contents cap), 0 = off
+    shared_cache_mb: int = 512  # ~/.local-agent/cache: symbols/summaries shared by all clones, 0 = off
+    stdin_max_chars: int = 80_000  # piped input larger than this is map-reduced
+    stdin_chunk_chars: int = 24_000
+    stdin_parallelism: int = 4
+    stdin_map_reduce: bool = True
+    stdin_compact: bool = True  # cluster repetitive log lines into templates
+    stdin_compact_min_chars: int = 8_000
+    quote_max_lines: int = 200  # quote mode: stop rg after this many matches
+    quote_max_count: int = 20  # rg --max-count (matches per file)
+    quote_max_filesize: str = "1M"  # rg --max-filesize
+    quote_context: int = 0  # rg -C; > 0 groups output by file
+    quote_deadline_s: float = 5.0
+    fast_model: str = ""  # small model for simple lookups; "" = always use `model`
+    route_max_question_chars: int = 200  # longer questions go to `model`
+    route_max_context_chars: int = 48_000  # bigger prompts go to `model`
+    repo_map: bool = True  # use `local-agent map` summaries when retrieval finds little
+    repo_map_min_hits: int = 3  # fewer retrieved files than this = weak match
+    repo_map_max_chars: int = 12_000
+    repo_map_parallelism: int = 2
+    agent_mode: bool = False  # ask: the model fetches context with tools instead of getting files upfront
+    agent_max_turns: int = 6  # tool-calling requests per question before an answer is demanded
+    ollama_options: dict = None  # type: ignore  # [options] table; [options.<command>] overrides
 
     def __post_init__(self) -> None:
         if self.extra_excludes is None:
             self.extra_excludes = set()
+        if self.ollama_hosts is None:
+            self.ollama_hosts = [self.ollama_host]
+        if self.ollama_options is None:
+            self.ollama_options = {}
+
+    def options_for(self, command: str) -> dict:
+        """
+        Ollama options for `command` ("ask", "chat", "edit", "stdin"):
+        top-level [options] keys overridden by [options.<command>].
+        """
+        opts = {k: v for k, v in self.ollama_options.items() if not isinstance(v, dict)}
+        opts.update(self.ollama_options.get(command) or {})
+        return opts
 
 
 def load_config() -> AppConfig:
@@ -45,10 +94,54 @@ def load_config() -> AppConfig:
             continue
         data = tomllib.loads(f.read_text(encoding="utf-8"))
         cfg.ollama_host = str(data.get("ollama_host", cfg.ollama_host))
+        hosts = data.get("ollama_hosts")
+        if isinstance(hosts, list) and hosts:
+            cfg.ollama_hosts = [str(h) for h in hosts]
+            if "ollama_host" not in data:
+                cfg.ollama_host = cfg.ollama_hosts[0]
+        elif "ollama_host" in data:
+            cfg.ollama_hosts = [cfg.ollama_host]
+        cfg.health_interval_s = float(data.get("health_interval_s", cfg.health_interval_s))
+        cfg.ollama_max_inflight = int(data.get("ollama_max_inflight", cfg.ollama_max_inflight))
         cfg.model = str(data.get("model", cfg.model))
         cfg.max_file_chars = int(data.get("max_file_chars", cfg.max_file_chars))
         cfg.max_context_files = int(data.get("max_context_files", cfg.max_context_files))
         cfg.max_tree_files = int(data.get("max_tree_files", cfg.max_tree_files))
+        cfg.skeleton_context = bool(data.get("skeleton_context", cfg.skeleton_context))
+        cfg.full_context_files = int(data.get("full_context_files", cfg.full_context_files))
+        cfg.file_source = str(data.get("file_source", cfg.file_source))
+        cfg.recent_commits = int(data.get("recent_commits", cfg.recent_commits))
+        cfg.symbol_index = bool(data.get("symbol_index", cfg.symbol_index))
+        cfg.junk_filter = bool(data.get("junk_filter", cfg.junk_filter))
+        cfg.scope = str(data.get("scope", cfg.scope))
+        cfg.retrieval_deadline_ms = int(data.get("retrieval_deadline_ms", cfg.retrieval_deadline_ms))
+        cfg.graph_expand_files = int(data.get("graph_expand_files", cfg.graph_expand_files))
+        cfg.chat_sessions = bool(data.get("chat_sessions", cfg.chat_sessions))
+        cfg.session_cache_mb = int(data.get("session_cache_mb", cfg.session_cache_mb))
+        cfg.shared_cache_mb = int(data.get("shared_cache_mb", cfg.shared_cache_mb))
+        cfg.stdin_max_chars = int(data.get("stdin_max_chars", cfg.stdin_max_chars))
+        cfg.stdin_chunk_chars = int(data.get("stdin_chunk_chars", cfg.stdin_chunk_chars))
+        cfg.stdin_parallelism = int(data.get("stdin_parallelism", cfg.stdin_parallelism))
+        cfg.stdin_map_reduce = bool(data.get("stdin_map_reduce", cfg.stdin_map_reduce))
+        cfg.stdin_compact = bool(data.get("stdin_compact", cfg.stdin_compact))
+        cfg.stdin_compact_min_chars = int(data.get("stdin_compact_min_chars", cfg.stdin_compact_min_chars))
+        cfg.quote_max_lines = int(data.get("quote_max_lines", cfg.quote_max_lines))
+        cfg.quote_max_count = int(data.get("quote_max_count", cfg.quote_max_count))
+        cfg.quote_max_filesize = str(data.get("quote_max_filesize", cfg.quote_max_filesize))
+        cfg.quote_context = int(data.get("quote_context", cfg.quote_context))
+        cfg.quote_deadline_s = float(data.get("quote_deadline_s", cfg.quote_deadline_s))
+        cfg.fast_model = str(data.get("fast_model", cfg.fast_model))
+        cfg.route_max_question_chars = int(data.get("route_max_question_chars", cfg.route_max_question_chars))
+        cfg.route_max_context_chars = int(data.get("route_max_context_chars", cfg.route_max_context_chars))
+        cfg.repo_map = bool(data.get("repo_map", cfg.repo_map))
+        cfg.repo_map_min_hits = int(data.get("repo_map_min_hits", cfg.repo_map_min_hits))
+        cfg.repo_map_max_chars = int(data.get("repo_map_max_chars", cfg.repo_map_max_chars))
+        cfg.repo_map_parallelism = int(data.get("repo_map_parallelism", cfg.repo_map_parallelism))
+        cfg.agent_mode = bool(data.get("agent_mode", cfg.agent_mode))
+        cfg.agent_max_turns = int(data.get("agent_max_turns", cfg.agent_max_turns))
+        options = data.get("options")
+        if isinstance(options, dict):
+            cfg.ollama_options = dict(options)
         excludes = data.get("extra_excludes", [])
         if isinstance(excludes, list):
             cfg.extra_excludes = set(map(str, excludes))
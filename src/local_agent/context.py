@@ -1,26 +1,144 @@
 from __future__ import annotations
 
+import json
+import shutil
+import sqlite3
 import subprocess
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
-from .utils import find_repo_root, iter_files, read_text_limited
+from .gitutils import GitState, changed_paths, current_state, dirty_files, is_git_repo, ls_files, recent_files
+from .commands import CommandRegistry, CommandSpec
+from .graph import ImportGraph, load_import_graph
+from .junk import JunkIndex
+from .repocache import RepoCache
+from .retrieval import Retrieval, retrieve
+from .sharedcache import SharedCache
+from .symbols import SymbolHit, SymbolIndex, lookup_question
+from .utils import (
+    DEFAULT_EXCLUDES,
+    STATE_DIR,
+    STATE_SUBDIRS,
+    file_digest,
+    find_repo_root,
+    is_state_path,
+    iter_files,
+    query_terms,
+    read_text_limited,
+    state_dir,
+)
+from .workspace import resolve_scope
 
-import re
+SEARCH_STRATEGIES = ("content", "path", "symbols")
 
 @dataclass
 class RepoContext:
     root: Path
+    file_source: str = "auto"  # "auto" | "git" | "walk"
+    recent_commits: int = 50  # git history window for the recency boost (0 = off)
+    junk_filter: bool = True  # keep generated files and near-duplicates out of retrieval
+    scope: Tuple[str, ...] = ()  # repo-relative dirs retrieval is limited to; () = whole repo
+    retrieval_deadline_ms: int = 500  # search strategies still running then are cut off (0 = wait)
+    shared_cache_mb: int = 0  # user-level cache of per-file derived data (0 = off)
+    last_retrieval: Optional[Retrieval] = field(default=None, init=False, repr=False, compare=False)
+    _symbols: Optional[SymbolIndex] = field(default=None, init=False, repr=False, compare=False)
+    _graph: Optional[ImportGraph] = field(default=None, init=False, repr=False, compare=False)
+    _cache: Optional[RepoCache] = field(default=None, init=False, repr=False, compare=False)
+    _commands: Optional[CommandRegistry] = field(default=None, init=False, repr=False, compare=False)
+    _shared: Optional[SharedCache] = field(default=None, init=False, repr=False, compare=False)
 
     @staticmethod
     def from_cwd() -> "RepoContext":
         return RepoContext(root=find_repo_root())
 
+    @staticmethod
+    def from_config(cfg, scope: Optional[str] = None) -> "RepoContext":
+        """
+        `scope` overrides cfg.scope ("auto" | "repo" | "dir[,dir...]").
+        """
+        ctx = RepoContext(
+            root=find_repo_root(),
+            file_source=cfg.file_source,
+            recent_commits=cfg.recent_commits,
+            junk_filter=cfg.junk_filter,
+            retrieval_deadline_ms=cfg.retrieval_deadline_ms,
+            shared_cache_mb=cfg.shared_cache_mb,
+        )
+        ctx.scope = resolve_scope(
+            ctx.root, Path.cwd(), scope or cfg.scope, lambda: ctx._scan_files(cfg.extra_excludes)
+        )
+        return ctx
+
+    def index_dir(self) -> Path:
+        """
+        Where the on-disk indexes live: .local-agent/index, or a per-scope
+        subdirectory so packages of a monorepo do not evict each other.
+        """
+        d = state_dir(self.root, "index")
+        if not self.scope:
+            return d
+        d = d / "scopes" / file_digest("\n".join(self.scope).encode("utf-8"))[:12]
+        d.mkdir(parents=True, exist_ok=True)
+        return d
+
+    def search_roots(self) -> List[Path]:
+        return [self.root / d for d in self.scope] or [self.root]
+
+    def enable_cache(self, max_bytes: int = 64 * 1024 * 1024) -> RepoCache:
+        """
+        Memoizes listings, rankings, index refreshes and file contents for the
+        lifetime of this object (a chat session), revalidated with stat calls.
+        """
+        if self._cache is None:
+            self._cache = RepoCache(self.root, max_bytes=max_bytes)
+        return self._cache
+
+    @property
+    def cache(self) -> Optional[RepoCache]:
+        return self._cache
+
+    def _memo(self, key: tuple, compute):
+        return compute() if self._cache is None else self._cache.get(key, compute)
+
+    def uses_git(self) -> bool:
+        return self._memo(("uses_git",), lambda: self.file_source != "walk" and is_git_repo(self.root))
+
+    def iter_repo_files(self, extra_excludes: set[str]) -> Iterator[str]:
+        """
+        Repo-relative paths: from `git ls-files` (already gitignore-filtered)
+        when available, otherwise from a filesystem walk.
+        """
+        if self._cache is None:
+            yield from self._scan_files(extra_excludes)
+            return
+        cache = self._cache
+
+        def scan() -> List[str]:
+            rels = list(self._scan_files(extra_excludes))
+            cache.track(rels)
+            return rels
+
+        yield from cache.get(("files", frozenset(extra_excludes)), scan)
+
+    def _scan_files(self, extra_excludes: set[str]) -> Iterator[str]:
+        rels = ls_files(self.root, paths=self.scope) if self.uses_git() else None
+        if rels is None:
+            for base in self.search_roots():
+                for p in iter_files(base, excludes=extra_excludes):
+                    yield p.relative_to(self.root).as_posix()
+            return
+        skip = DEFAULT_EXCLUDES | extra_excludes
+        for rel in rels:
+            parts = tuple(rel.split("/"))
+            if skip.intersection(parts) or is_state_path(parts):
+                continue
+            yield rel
+
     def file_tree(self, max_files: int, extra_excludes: set[str]) -> List[str]:
         files: list[str] = []
-        for p in iter_files(self.root, excludes=extra_excludes):
-            rel = p.relative_to(self.root).as_posix()
+        for rel in self.iter_repo_files(extra_excludes):
             files.append(rel)
             if len(files) >= max_files:
                 break
@@ -30,103 +148,287 @@ class RepoContext:
         p = (self.root / rel_path).resolve()
         if not p.exists() or not p.is_file():
             return rel_path, ""
+        if self._cache is not None:
+            return rel_path, self._cache.read(rel_path, max_chars, lambda: read_text_limited(p, max_chars=max_chars))
         return rel_path, read_text_limited(p, max_chars=max_chars)
 
+    def shared_cache(self) -> Optional[SharedCache]:
+        """
+        The user-level cache shared with other clones, or None when disabled
+        or unusable (e.g. a read-only home directory).
+        """
+        if self._shared is None and self.shared_cache_mb > 0:
+            try:
+                self._shared = SharedCache(max_bytes=self.shared_cache_mb * 1024 * 1024)
+            except (OSError, sqlite3.Error):
+                self.shared_cache_mb = 0
+        return self._shared
+
+    def command_registry(self) -> CommandRegistry:
+        if self._commands is None:
+            self._commands = CommandRegistry(self.root)
+        return self._commands
+
+    def commands(self) -> List[CommandSpec]:
+        """
+        Project + user markdown commands (re-scanned only when their dirs change).
+        """
+        return self.command_registry().specs()
+
+    def symbol_index(self, extra_excludes: set[str]) -> SymbolIndex:
+        """
+        Opens the repo's symbol index and refreshes it for changed files.
+        """
+        if self._symbols is None:
+            self._symbols = SymbolIndex(
+                self.root, db_path=self.index_dir() / "symbols.sqlite", shared=self.shared_cache()
+            )
+        idx = self._symbols
+        key = ("symbols", frozenset(extra_excludes))
+        if self._cache is not None and self._cache.is_fresh(key):
+            return idx
+        cur = current_state(self.root) if self.uses_git() else None
+        prev = GitState.from_json(json.loads(idx.get_meta("git") or "null"))
+        idx.update(self._all_files(extra_excludes), candidates=changed_paths(self.root, prev, cur))
+        idx.set_meta("git", json.dumps(cur.to_json() if cur else None))
+        if self._cache is not None:
+            self._cache.mark(key)
+        return idx
+
+    def import_graph(self, extra_excludes: set[str]) -> Optional[ImportGraph]:
+        """
+        Module dependency graph of the repo (cached on disk per file).
+        Returns None if it cannot be built.
+        """
+        return self._memo(("graph", frozenset(extra_excludes)), lambda: self._load_graph(extra_excludes))
+
+    def _load_graph(self, extra_excludes: set[str]) -> Optional[ImportGraph]:
+        cur = current_state(self.root) if self.uses_git() else None
+        try:
+            self._graph = load_import_graph(
+                self.root,
+                self._all_files(extra_excludes),
+                changed=lambda prev: changed_paths(self.root, GitState.from_json(prev), cur),
+                git_state=cur.to_json() if cur else None,
+                index_dir=self.index_dir(),
+            )
+        except OSError:
+            return None
+        return self._graph
+
+    def junk_files(self, extra_excludes: set[str]) -> Dict[str, str]:
+        """
+        Generated files, lockfiles, minified bundles and near-duplicates
+        (rel path -> reason), from the cached analysis in the index.
+        """
+        return self._memo(("junk", frozenset(extra_excludes)), lambda: self._scan_junk(extra_excludes))
+
+    def _scan_junk(self, extra_excludes: set[str]) -> Dict[str, str]:
+        try:
+            idx = JunkIndex(self.root, db_path=self.index_dir() / "junk.sqlite")
+            try:
+                idx.update(self._all_files(extra_excludes))
+                return idx.flagged()
+            finally:
+                idx.close()
+        except (sqlite3.Error, OSError):
+            return {}
+
+    def _all_files(self, extra_excludes: set[str]) -> List[str]:
+        return list(self.iter_repo_files(extra_excludes))
+
+    def recency_boost(self) -> Dict[str, float]:
+        """
+        Ranking boost from git: 2.0 for uncommitted files, up to 1.0 for files
+        touched by recent commits (newer = higher). Empty without git.
+        """
+        return self._memo(("recency",), self._recency_boost)
+
+    def _recency_boost(self) -> Dict[str, float]:
+        if not self.uses_git() or self.recent_commits <= 0:
+            return {}
+        boost = {
+            rel: 1.0 - age / self.recent_commits
+            for rel, age in recent_files(self.root, self.recent_commits).items()
+        }
+        for rel in dirty_files(self.root) or ():
+            boost[rel] = 2.0
+        return boost
+
+    def symbol_hits(self, query: str, extra_excludes: set[str], max_hits: int = 5) -> List[SymbolHit]:
+        """
+        Definitions (and top callers) of identifiers named in `query`.
+        Returns [] if the index cannot be used (e.g. read-only checkout).
+        """
+        try:
+            return lookup_question(self.symbol_index(extra_excludes), query, max_hits=max_hits)
+        except (sqlite3.Error, OSError):
+            return []
+
     def select_relevant_files(
     self,
     query: str,
     max_files: int,
     extra_excludes: set[str],
+    symbol_hits: Sequence[SymbolHit] = (),
     ) -> List[str]:
         """
         Best-effort relevance:
-        - if ripgrep exists, use it
-        - if rg finds nothing (or errors), fallback to filename/path keyword match
+        - files defining symbols named in the query come first, then their top callers
+        - then content (rg), filename/path and symbol-name matches, searched
+          concurrently for at most `retrieval_deadline_ms` and fused by rank
+        """
+        pinned: list[str] = [h.symbol.path for h in symbol_hits]
+        for h in symbol_hits:
+            pinned += [p for p, _ in h.callers[:3]]
+        pinned = [p for p in dict.fromkeys(pinned) if not any(part in extra_excludes for part in Path(p).parts)]
+        key = ("select", query, max_files, frozenset(extra_excludes), tuple(pinned))
+        return list(self._memo(key, lambda: self._select(query, max_files, extra_excludes, pinned)))
+
+    def _select(self, query: str, max_files: int, extra_excludes: set[str], pinned: List[str]) -> List[str]:
+        out = pinned[:max_files]
+        junk = self.junk_files(extra_excludes) if self.junk_filter else {}
+        found = self._search_files(query, max_files * 2 if junk else max_files, extra_excludes)
+        for rel in _demote_junk(found, junk, query):
+            if len(out) >= max_files:
+                break
+            if rel not in out:
+                out.append(rel)
+        return out
+
+    def _search_files(self, query: str, max_files: int, extra_excludes: set[str]) -> List[str]:
+        result = self.search(query, extra_excludes)
+        self.last_retrieval = result
+        return result.ranked[:max_files]
+
+    def search(
+        self,
+        query: str,
+        extra_excludes: set[str],
+        strategies: Sequence[str] = SEARCH_STRATEGIES,
+        deadline_ms: Optional[int] = None,
+    ) -> Retrieval:
+        """
+        Runs the named search strategies ("content": rg, "path": file names,
+        "symbols": the index as last built) and fuses their rankings.
+        `deadline_ms` overrides retrieval_deadline_ms (0 = wait for all).
         """
         query = query.strip()
         if not query:
-            return []
+            return Retrieval(ranked=[])
+        terms = query_terms(query.lower()) or [query.lower()]
+        tokens = [t.lower() for t in query.replace("/", " ").split() if t]
+        # the listing is usually cached already (chat); otherwise it is streamed in the path strategy
+        listing = self._all_files(extra_excludes) if self._cache is not None else None
+
+        available = {
+            "content": lambda out, stop: self._content_matches(terms, extra_excludes, out, stop),
+            "path": lambda out, stop: self._path_matches(tokens, extra_excludes, listing, out, stop),
+        }
+        db = self.index_dir() / "symbols.sqlite"
+        if db.exists():
+            available["symbols"] = lambda out, stop: self._symbol_matches(db, terms, extra_excludes, out)
+        chosen = {name: fn for name, fn in available.items() if name in strategies}
+        deadline = self.retrieval_deadline_ms if deadline_ms is None else deadline_ms
+        # recency only breaks ties between equally good matches of one strategy
+        return retrieve(chosen, deadline / 1000.0, tiebreak=self.recency_boost())
+
+    def _content_matches(
+        self, terms: List[str], extra_excludes: set[str], out: List[Tuple[str, float]], stop: threading.Event
+    ) -> None:
+        """
+        rg match counts per file, streamed; rg is killed when `stop` is set.
+        """
+        rg = shutil.which("rg")
+        if not rg:
+            return
+        cmd = [rg, "--count-matches", "--ignore-case", "--hidden", "--no-messages", "--glob", "!.git/*"]
+        for sub in sorted(STATE_SUBDIRS):
+            cmd += ["--glob", f"!{STATE_DIR}/{sub}/**"]
+        for t in terms:
+            cmd += ["-e", t]
+        cmd += [str(p) for p in self.search_roots()]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors="replace")
+
+        def kill_on_stop() -> None:
+            stop.wait()  # retrieve() always sets it when it returns
+            if proc.poll() is None:
+                proc.kill()
 
-        # 1) Try ripgrep first (content search)
+        threading.Thread(target=kill_on_stop, daemon=True).start()
         try:
-            q = query.lower()
-            tokens = re.findall(r"[a-zA-Z_][a-zA-Z0-9_]{2,}", q)
-            stop = {
-                "the", "and", "or", "to", "of", "in", "on", "for", "with", "a", "an",
-                "is", "are", "was", "were", "be", "does", "do", "did", "what", "where",
-                "which", "how", "why", "show", "quote", "relevant", "lines", "exact",
-            }
-            terms = [t for t in tokens if t not in stop][:6]
-            if not terms:
-                terms = [q]
-
-            cmd = ["rg", "--files-with-matches", "--hidden", "--glob", "!.git/*"]
-            for t in terms:
-                cmd += ["-e", t]
-            cmd.append(str(self.root))
-
-            rg = subprocess.run(cmd, capture_output=True, text=True, check=False)
-
-            hits: list[str] = []
-            for path in (rg.stdout or "").splitlines():
-                p = Path(path)
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                path, _, count = line.rstrip("\n").rpartition(":")
                 try:
-                    rel = p.relative_to(self.root).as_posix()
-                except Exception:
+                    rel = Path(path).relative_to(self.root).as_posix()
+                except ValueError:
                     continue
                 if any(part in extra_excludes for part in Path(rel).parts):
                     continue
-                hits.append(rel)
+                out.append((rel, float(count or 0)))
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
 
-            seen: set[str] = set()
-            out: list[str] = []
-            for h in hits:
-                if h not in seen:
-                    seen.add(h)
-                    out.append(h)
-                if len(out) >= max_files:
-                    break
-
-            if out:
-                return out
-
-        except Exception:
-            pass
-
-        # 2) Fallback: filename/path match (works when rg returns 0 hits)
-        tokens = [t.lower() for t in query.replace("/", " ").split() if t]
-        candidates: list[tuple[int, str]] = []
-
-        for p in self.root.rglob("*"):
-            if not p.is_file():
-                continue
-
-            rel = p.relative_to(self.root).as_posix()
+    def _path_matches(
+        self,
+        tokens: List[str],
+        extra_excludes: set[str],
+        listing: Optional[List[str]],
+        out: List[Tuple[str, float]],
+        stop: threading.Event,
+    ) -> None:
+        """
+        Filename/path keyword matches; a filename hit scores over a directory hit.
+        """
+        for rel in listing if listing is not None else self._scan_files(extra_excludes):
+            if stop.is_set():
+                return
             parts = Path(rel).parts
-
-            # basic ignores
-            if parts and parts[0] == ".git":
-                continue
-            if rel.startswith(("dist/", "build/")):
+            if rel.startswith(("dist/", "build/")) or ".egg-info" in parts or "__pycache__" in parts:
                 continue
-            if ".egg-info" in parts or "__pycache__" in parts:
-                continue
-
             if any(part in extra_excludes for part in parts):
                 continue
-
             rlow = rel.lower()
-            nlow = p.name.lower()
-
+            nlow = parts[-1].lower()
             score = 0
             for t in tokens:
                 if t in nlow:
                     score += 2  # filename match strongest
                 elif t in rlow:
                     score += 1  # path match weaker
-
             if score > 0:
-                candidates.append((score, rel))
+                out.append((rel, float(score)))
+
+    def _symbol_matches(self, db: Path, terms: List[str], extra_excludes: set[str], out: List[Tuple[str, float]]) -> None:
+        """
+        Files defining symbols whose names contain a query term, from the index
+        as last built (its own connection: this runs on a worker thread).
+        """
+        idx = SymbolIndex(self.root, db_path=db)
+        try:
+            for rel, n in idx.files_defining(terms):
+                if not any(part in extra_excludes for part in Path(rel).parts):
+                    out.append((rel, float(n)))
+        finally:
+            idx.close()
+
 
-        candidates.sort(key=lambda x: (x[0], x[1]), reverse=True)
-        return [rel for _, rel in candidates[:max_files]]
+def _demote_junk(rels: List[str], junk: Dict[str, str], query: str) -> List[str]:
+    """
+    Drops generated files (unless the query names them) and moves
+    near-duplicates behind everything else.
+    """
+    if not junk:
+        return rels
+    q = query.lower()
+    keep, later = [], []
+    for rel in rels:
+        reason = junk.get(rel)
+        if reason is None or Path(rel).name.lower() in q:
+            keep.append(rel)
+        elif reason.startswith("near-duplicate"):
+            later.append(rel)
+    return keep + later
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .utils import SNIP_MARKER
+
+DEFAULT_KS = (1, 5, 10)
+
+_RANGE_RE = re.compile(r"(\d+)(?:-(\d+))?")
+
+
+@dataclass(frozen=True)
+class Target:
+    path: str
+    start: int = 0  # 1-based, inclusive; 0 = the file as a whole
+    end: int = 0
+
+    def lines(self) -> Set[int]:
+        return set(range(self.start, self.end + 1)) if self.start else set()
+
+
+@dataclass
+class EvalCase:
+    name: str
+    question: str
+    expected: List[Target]
+
+    def paths(self) -> List[str]:
+        return list(dict.fromkeys(t.path for t in self.expected))
+
+
+def parse_target(spec: Any) -> Target:
+    """
+    "path", "path:12", "path:10-40" or {"path": ..., "lines": [10, 40]}.
+    """
+    if isinstance(spec, dict):
+        lines = spec.get("lines") or 0
+        if isinstance(lines, int):
+            lines = [lines, lines]
+        path, start, end = str(spec["path"]), int(lines[0]), int(lines[-1])
+    else:
+        path, sep, rng = str(spec).strip().rpartition(":")
+        m = _RANGE_RE.fullmatch(rng) if sep else None
+        if m:
+            start, end = int(m.group(1)), int(m.group(2) or m.group(1))
+        else:
+            path, start, end = str(spec).strip(), 0, 0
+    if path.startswith("./"):
+        path = path[2:]
+    return Target(path, start, max(start, end))
+
+
+def load_cases(path: Path) -> List[EvalCase]:
+    """
+    Questions from a JSONL file (one {"question", "expected"} object per line;
+    blank and `#` lines are skipped) or, with PyYAML installed, a YAML list of
+    the same objects. `expected` is a target or a list of them (parse_target);
+    an optional `id` names the case in reports.
+    """
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path.name}: YAML question files need PyYAML (pip install pyyaml); JSONL works without it")
+        raw = yaml.safe_load(text) or []
+        if isinstance(raw, dict):
+            raw = raw.get("questions") or []
+    else:
+        raw = []
+        for n, line in enumerate(text.splitlines(), start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            try:
+                raw.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path.name}:{n}: {e.msg}")
+
+    cases: List[EvalCase] = []
+    for i, item in enumerate(raw, start=1):
+        if not isinstance(item, dict) or not str(item.get("question") or "").strip():
+            raise ValueError(f"{path.name}: entry {i} has no question")
+        expected = item.get("expected") or []
+        if isinstance(expected, (str, dict)):
+            expected = [expected]
+        if not expected:
+            raise ValueError(f"{path.name}: entry {i} has no expected files")
+        cases.append(EvalCase(str(item.get("id", i)), str(item["question"]), [parse_target(e) for e in expected]))
+    return cases
+
+
+def recall_at(ranked: Sequence[str], expected: Sequence[str], k: int) -> float:
+    want = set(expected)
+    return len(want.intersection(ranked[:k])) / len(want) if want else 0.0
+
+
+def reciprocal_rank(ranked: Sequence[str], expected: Sequence[str]) -> float:
+    want = set(expected)
+    for i, rel in enumerate(ranked, start=1):
+        if rel in want:
+            return 1.0 / i
+    return 0.0
+
+
+def visible_lines(sent: str, total_lines: int) -> Set[int]:
+    """
+    Line numbers of a file whose text is complete in `sent`: the whole file,
+    or the head and tail around a `...<snip>...` cut (read_text_limited).
+    """
+    if SNIP_MARKER not in sent:
+        return set(range(1, total_lines + 1))
+    head, _, tail = sent.partition(SNIP_MARKER)
+    n_head = head.count("\n")  # the last head line may be cut short
+    tail_lines = tail.split("\n")[1:]  # and the first tail line
+    if tail_lines and tail_lines[-1] == "":
+        tail_lines.pop()
+    return set(range(1, n_head + 1)) | set(range(total_lines - len(tail_lines) + 1, total_lines + 1))
+
+
+@dataclass
+class CaseResult:
+    case: str
+    ranked: List[str]
+    seconds: float
+    tokens: int  # estimated prompt tokens for the context this ranking produces
+    lines_found: int  # line-range targets whose lines all reach the prompt
+    lines_total: int
+
+    def to_json(self) -> dict:
+        return {
+            "case": self.case, "ranked": self.ranked, "ms": round(self.seconds * 1000, 2), "tokens": self.tokens,
+            "lines_found": self.lines_found, "lines_total": self.lines_total,
+        }
+
+
+@dataclass
+class StrategyReport:
+    name: str
+    cases: List[EvalCase]
+    results: List[CaseResult] = field(default_factory=list)
+
+    def recall(self, k: int) -> float:
+        return _mean([recall_at(r.ranked, c.paths(), k) for c, r in zip(self.cases, self.results)])
+
+    def mrr(self) -> float:
+        return _mean([reciprocal_rank(r.ranked, c.paths()) for c, r in zip(self.cases, self.results)])
+
+    def line_recall(self) -> Optional[float]:
+        total = sum(r.lines_total for r in self.results)
+        return sum(r.lines_found for r in self.results) / total if total else None
+
+    def tokens(self) -> float:
+        return _mean([r.tokens for r in self.results])
+
+    def ms(self, pct: Optional[float] = None) -> float:
+        """
+        Mean wall time, or the `pct` percentile (nearest rank).
+        """
+        times = sorted(r.seconds * 1000 for r in self.results)
+        if pct is None or not times:
+            return _mean(times)
+        return times[min(len(times) - 1, max(0, round(pct / 100 * len(times)) - 1))]
+
+    def to_json(self, ks: Sequence[int]) -> dict:
+        return {
+            "strategy": self.name,
+            **{f"recall@{k}": round(self.recall(k), 4) for k in ks},
+            "mrr": round(self.mrr(), 4),
+            "line_recall": self.line_recall(),
+            "tokens": round(self.tokens(), 1),
+            "ms": round(self.ms(), 2),
+            "p95_ms": round(self.ms(95), 2),
+            "cases": [r.to_json() for r in self.results],
+        }
+
+
+def _mean(xs: Sequence[float]) -> float:
+    return sum(xs) / len(xs) if xs else 0.0
+
+
+def run_eval(
+    cases: List[EvalCase],
+    strategies: Dict[str, Callable[[str], List[str]]],
+    context: Callable[[str, str, List[str]], Tuple[int, Dict[str, Set[int]]]],
+    on_progress: Optional[Callable[[str, int, int], None]] = None,
+) -> List[StrategyReport]:
+    """
+    Ranks files for every case with every strategy. Only the strategy call
+    is timed; `context(strategy, question, ranked)` then gives the estimated
+    prompt tokens and the lines of each file that would reach the prompt.
+    No model is called.
+    """
+    reports: List[StrategyReport] = []
+    for name, rank in strategies.items():
+        report = StrategyReport(name, cases)
+        for i, case in enumerate(cases, start=1):
+            if on_progress is not None:
+                on_progress(name, i, len(cases))
+            t0 = time.perf_counter()
+            ranked = list(rank(case.question))
+            seconds = time.perf_counter() - t0
+            tokens, visible = context(name, case.question, ranked)
+            ranged = [t for t in case.expected if t.start]
+            found = sum(1 for t in ranged if t.lines() <= visible.get(t.path, set()))
+            report.results.append(CaseResult(case.name, ranked, seconds, tokens, found, len(ranged)))
+        reports.append(report)
+    return reports
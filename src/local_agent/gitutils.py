@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+
+def _git(root: Path, *args: str, timeout: float = 10.0) -> Optional[str]:
+    git = shutil.which("git")
+    if not git:
+        return None
+    try:
+        r = subprocess.run(
+            [git, "-C", str(root), *args],
+            capture_output=True,
+            text=True,
+            check=False,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if r.returncode != 0:
+        return None
+    return r.stdout
+
+
+def is_git_repo(root: Path) -> bool:
+    return (root / ".git").exists() and shutil.which("git") is not None
+
+
+def ls_files(root: Path, paths: Sequence[str] = ()) -> Optional[List[str]]:
+    """
+    Tracked plus untracked-but-not-ignored files, straight from git's index
+    (no filesystem walk). Files deleted from the working tree are dropped.
+    `paths` limits the listing to those repo-relative directories.
+    """
+    args = ["ls-files", "-z", "-t", "--cached", "--others", "--exclude-standard", "--deleted"]
+    if paths:
+        args += ["--", *paths]
+    out = _git(root, *args)
+    if out is None:
+        return None
+    files: list[str] = []
+    deleted: set[str] = set()
+    for entry in out.split("\0"):
+        if len(entry) < 3:
+            continue
+        tag, rel = entry[0], entry[2:]
+        if tag == "R":
+            deleted.add(rel)
+        else:
+            files.append(rel)
+    return [f for f in dict.fromkeys(files) if f not in deleted]
+
+
+def head_commit(root: Path) -> Optional[str]:
+    out = _git(root, "rev-parse", "HEAD")
+    return out.strip() if out else None
+
+
+def dirty_files(root: Path) -> Optional[Set[str]]:
+    """
+    Paths with uncommitted changes (staged, unstaged or untracked).
+    """
+    out = _git(root, "status", "--porcelain", "-z", "--untracked-files=all")
+    if out is None:
+        return None
+    paths: set[str] = set()
+    entries = out.split("\0")
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if len(entry) < 4:
+            continue
+        status, rel = entry[:2], entry[3:]
+        paths.add(rel)
+        if "R" in status or "C" in status:
+            # -z renames: "R  new\0old\0"
+            if i < len(entries) and entries[i]:
+                paths.add(entries[i])
+            i += 1
+    return paths
+
+
+def changed_between(root: Path, old: str, new: str) -> Optional[Set[str]]:
+    out = _git(root, "diff", "--name-only", "-z", old, new)
+    if out is None:
+        return None
+    return {p for p in out.split("\0") if p}
+
+
+def recent_files(root: Path, commits: int) -> Dict[str, int]:
+    """
+    Files touched by the last `commits` commits -> age rank (0 = most recent).
+    """
+    if commits <= 0:
+        return {}
+    out = _git(root, "log", f"-n{commits}", "--name-only", "--format=%x00", "--no-renames")
+    if out is None:
+        return {}
+    ranks: dict[str, int] = {}
+    for age, block in enumerate(out.split("\0")[1:]):
+        for rel in block.splitlines():
+            rel = rel.strip()
+            if rel and rel not in ranks:
+                ranks[rel] = age
+    return ranks
+
+
+@dataclass
+class GitState:
+    """
+    Snapshot an index was built against: HEAD plus the then-dirty paths.
+    """
+
+    commit: str
+    dirty: List[str] = field(default_factory=list)
+
+    def to_json(self) -> dict:
+        return {"commit": self.commit, "dirty": sorted(self.dirty)}
+
+    @staticmethod
+    def from_json(data: object) -> Optional["GitState"]:
+        if not isinstance(data, dict) or not isinstance(data.get("commit"), str):
+            return None
+        return GitState(commit=data["commit"], dirty=list(data.get("dirty") or []))
+
+
+def current_state(root: Path) -> Optional[GitState]:
+    commit = head_commit(root)
+    dirty = dirty_files(root)
+    if commit is None or dirty is None:
+        return None
+    return GitState(commit=commit, dirty=sorted(dirty))
+
+
+def changed_paths(root: Path, prev: Optional[GitState], cur: Optional[GitState]) -> Optional[Set[str]]:
+    """
+    Paths that may differ between two snapshots, or None if unknown (then
+    the caller must re-check everything). Files dirty in either snapshot
+    are included: an edit may since have been committed or reverted.
+    """
+    if prev is None or cur is None:
+        return None
+    changed: set[str] = set(prev.dirty) | set(cur.dirty)
+    if prev.commit != cur.commit:
+        diff = changed_between(root, prev.commit, cur.commit)
+        if diff is None:
+            return None
+        changed |= diff
+    return changed
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import ast
+import json
+import re
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .utils import atomic_write, state_dir
+
+PY_EXTS = {".py"}
+JS_EXTS = {".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs"}
+JS_RESOLVE_EXTS = [".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".d.ts"]
+
+_JS_IMPORT_RE = re.compile(
+    r"""(?:\bimport\s+(?:[\w*${}\s,]+\s+from\s+)?|\bexport\s+[\w*${}\s,]+\s+from\s+|\brequire\s*\(\s*|\bimport\s*\(\s*)['"]([^'"]+)['"]"""
+)
+
+CACHE_VERSION = 2
+
+
+def extract_python_imports(text: str) -> List[str]:
+    """
+    Import specs of a Python module. Relative imports keep their leading dots;
+    `from a import b` yields "a.b" (b may be a submodule or just a name, the
+    resolver falls back to "a").
+    """
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return []
+    out: list[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            out += [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base = "." * node.level + (node.module or "")
+            sep = "" if base.endswith(".") or not base else "."
+            names = [f"{base}{sep}{a.name}" for a in node.names if a.name != "*"]
+            out += names or [base]
+    return out
+
+
+def extract_js_imports(text: str) -> List[str]:
+    return [m.group(1) for m in _JS_IMPORT_RE.finditer(text)]
+
+
+def extract_imports(rel_path: str, text: str) -> List[str]:
+    ext = PurePosixPath(rel_path).suffix.lower()
+    if ext in PY_EXTS:
+        return extract_python_imports(text)
+    if ext in JS_EXTS:
+        return extract_js_imports(text)
+    return []
+
+
+def _python_module_names(rel: str, init_dirs: Set[str]) -> List[str]:
+    """
+    Dotted names a .py file can be imported as: relative to the outermost
+    package that contains it (so src/ layouts work), plus the full path.
+    """
+    parts = list(PurePosixPath(rel).with_suffix("").parts)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+        pkg_dirs = len(parts)
+    else:
+        pkg_dirs = len(parts) - 1
+    if not parts:
+        return []
+    start = pkg_dirs
+    while start > 0 and "/".join(parts[:start]) in init_dirs:
+        start -= 1
+    names = [".".join(parts[start:])] if parts[start:] else []
+    full = ".".join(parts)
+    if full not in names:
+        names.append(full)
+    return names
+
+
+class ImportGraph:
+    """
+    File-level dependency graph of a repo, built from Python imports and JS/TS
+    import/require statements. Raw import specs are cached per file in
+    <repo>/.local-agent/index/graph.json keyed by (mtime, size), so only
+    changed files are re-read; edges are resolved against the current file list.
+    """
+
+    def __init__(self, root: Path, cache_path: Optional[Path] = None) -> None:
+        self.root = root
+        self.cache_path = cache_path
+        self.edges: Dict[str, Set[str]] = {}
+        self.redges: Dict[str, Set[str]] = {}
+        self.modules: Dict[str, str] = {}  # dotted python module -> rel path
+        self._rank: Optional[Dict[str, float]] = None
+        self.git_state: Optional[dict] = None  # snapshot the cache was built against
+        self._cache: Optional[Dict[str, list]] = None
+
+    # -- building -----------------------------------------------------------
+
+    def _load_cache(self) -> Dict[str, list]:
+        if self._cache is not None:
+            return self._cache
+        self._cache = {}
+        if self.cache_path is None or not self.cache_path.exists():
+            return self._cache
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return self._cache
+        if data.get("version") != CACHE_VERSION:
+            return self._cache
+        self.git_state = data.get("git")
+        self._cache = data.get("files") or {}
+        return self._cache
+
+    def cached_git_state(self) -> Optional[dict]:
+        self._load_cache()
+        return self.git_state
+
+    def build(
+        self,
+        rel_paths: Iterable[str],
+        candidates: Optional[Set[str]] = None,
+        git_state: Optional[dict] = None,
+    ) -> "ImportGraph":
+        """
+        If `candidates` is given (e.g. from git), cached files outside it are
+        reused without a stat call. `git_state` is stored alongside the cache.
+        """
+        cache = self._load_cache()
+        fresh: Dict[str, list] = {}
+        specs: Dict[str, List[str]] = {}
+        dirty = False
+
+        rels = [r for r in rel_paths if PurePosixPath(r).suffix.lower() in PY_EXTS | JS_EXTS]
+        for rel in rels:
+            prev = cache.get(rel)
+            if prev and candidates is not None and rel not in candidates:
+                fresh[rel] = prev
+                specs[rel] = prev[2]
+                continue
+            try:
+                st = (self.root / rel).stat()
+            except OSError:
+                continue
+            if prev and prev[0] == st.st_mtime_ns and prev[1] == st.st_size:
+                fresh[rel] = prev
+            else:
+                try:
+                    text = (self.root / rel).read_text(encoding="utf-8", errors="replace")
+                except OSError:
+                    continue
+                fresh[rel] = [st.st_mtime_ns, st.st_size, extract_imports(rel, text)]
+                dirty = True
+            specs[rel] = fresh[rel][2]
+        if set(cache) != set(fresh) or git_state != self.git_state:
+            dirty = True
+        self.git_state = git_state
+        self._cache = fresh
+
+        if dirty and self.cache_path is not None:
+            try:
+                data = {"version": CACHE_VERSION, "git": git_state, "files": fresh}
+                atomic_write(self.cache_path, json.dumps(data))
+            except OSError:
+                pass
+
+        self._resolve(specs)
+        return self
+
+    def _resolve(self, specs: Dict[str, List[str]]) -> None:
+        files = set(specs)
+        init_dirs = {str(PurePosixPath(r).parent) for r in files if PurePosixPath(r).name == "__init__.py"}
+        self.modules = {}
+        for rel in sorted(files):
+            if rel.endswith(".py"):
+                for name in _python_module_names(rel, init_dirs):
+                    self.modules.setdefault(name, rel)
+
+        self.edges = {r: set() for r in files}
+        self.redges = {r: set() for r in files}
+        for rel, imports in specs.items():
+            for spec in imports:
+                target = self._resolve_spec(rel, spec, files)
+                if target and target != rel:
+                    self.edges[rel].add(target)
+                    self.redges[target].add(rel)
+        self._rank = None
+
+    def _resolve_spec(self, rel: str, spec: str, files: Set[str]) -> Optional[str]:
+        if rel.endswith(".py"):
+            if spec.startswith("."):
+                level = len(spec) - len(spec.lstrip("."))
+                pkg = list(PurePosixPath(rel).parent.parts)
+                if level > 1:
+                    pkg = pkg[: len(pkg) - (level - 1)]
+                rest = spec[level:].split(".") if spec[level:] else []
+                while True:
+                    cand = "/".join(pkg + rest)
+                    for path in (f"{cand}.py", f"{cand}/__init__.py".lstrip("/")):
+                        if path in files:
+                            return path
+                    if not rest:
+                        return None
+                    rest = rest[:-1]
+            return self.module_path(spec)
+
+        if not spec.startswith("."):
+            return None  # bare package import
+        base = PurePosixPath(rel).parent / spec
+        norm: list[str] = []
+        for part in base.parts:
+            if part == "..":
+                if norm:
+                    norm.pop()
+            elif part != ".":
+                norm.append(part)
+        cand = "/".join(norm)
+        if cand in files:
+            return cand
+        for ext in JS_RESOLVE_EXTS:
+            if f"{cand}{ext}" in files:
+                return f"{cand}{ext}"
+        for ext in JS_RESOLVE_EXTS:
+            if f"{cand}/index{ext}" in files:
+                return f"{cand}/index{ext}"
+        return None
+
+    # -- queries ------------------------------------------------------------
+
+    def neighbors(self, rel: str) -> Set[str]:
+        return self.edges.get(rel, set()) | self.redges.get(rel, set())
+
+    def centrality(self, iterations: int = 20, damping: float = 0.85) -> Dict[str, float]:
+        """
+        PageRank over import edges: modules imported by many (important)
+        modules rank highest.
+        """
+        if self._rank is not None:
+            return self._rank
+        nodes = list(self.edges)
+        n = len(nodes) or 1
+        rank = {r: 1.0 / n for r in nodes}
+        for _ in range(iterations):
+            sink = sum(rank[r] for r in nodes if not self.edges[r])
+            nxt = {r: (1.0 - damping) / n + damping * sink / n for r in nodes}
+            for r in nodes:
+                out = self.edges[r]
+                if out:
+                    share = damping * rank[r] / len(out)
+                    for t in out:
+                        nxt[t] += share
+            rank = nxt
+        self._rank = rank
+        return rank
+
+    def expand(self, seeds: Iterable[str], budget: int) -> List[str]:
+        """
+        Up to `budget` 1-hop neighbors of `seeds` (imports and importers),
+        ranked by how many seeds they touch, then by centrality.
+        """
+        seeds = list(seeds)
+        seen = set(seeds)
+        touches: Dict[str, int] = {}
+        for s in seeds:
+            for nb in self.neighbors(s):
+                if nb not in seen:
+                    touches[nb] = touches.get(nb, 0) + 1
+        rank = self.centrality()
+        ordered = sorted(touches, key=lambda r: (-touches[r], -rank.get(r, 0.0), r))
+        return ordered[: max(0, budget)]
+
+    def rank_files(self, rels: Iterable[str]) -> List[str]:
+        rank = self.centrality()
+        return sorted(rels, key=lambda r: (-rank.get(r, 0.0), r))
+
+    def module_path(self, dotted: str) -> Optional[str]:
+        """
+        File for a dotted Python name; `pkg.mod.attr` falls back to `pkg.mod`.
+        """
+        name = dotted
+        while name:
+            if name in self.modules:
+                return self.modules[name]
+            name = name.rpartition(".")[0]
+        return None
+
+
+def load_import_graph(
+    root: Path,
+    rel_paths: Iterable[str],
+    changed: Optional[Callable[[Optional[dict]], Optional[Set[str]]]] = None,
+    git_state: Optional[dict] = None,
+    index_dir: Optional[Path] = None,
+) -> ImportGraph:
+    """
+    `changed(previous_git_state)` may return the set of paths to re-check
+    (None = re-check everything).
+    """
+    graph = ImportGraph(root, cache_path=(index_dir or state_dir(root, "index")) / "graph.json")
+    candidates = changed(graph.cached_git_state()) if changed is not None else None
+    return graph.build(rel_paths, candidates=candidates, git_state=git_state)
+
+
+# -- entry points -------------------------------------------------------------
+
+MANIFESTS = [
+    "pyproject.toml", "setup.py", "setup.cfg", "package.json", "Cargo.toml", "go.mod",
+    "pom.xml", "build.gradle", "build.gradle.kts", "Gemfile", "composer.json", "Makefile",
+]
+
+_SCRIPT_RE = re.compile(r"""^\s*[\w.-]+\s*=\s*["']([\w.]+)(?::[\w.]+)?["']""", re.MULTILINE)
+
+
+def entry_point_paths(root: Path, graph: ImportGraph) -> List[str]:
+    """
+    Manifests plus the modules they name as entry points (pyproject scripts,
+    package.json main/bin), and any __main__.py / main.* files.
+    """
+    out: list[str] = [m for m in MANIFESTS if (root / m).is_file()]
+
+    pyproject = root / "pyproject.toml"
+    if pyproject.is_file():
+        text = pyproject.read_text(encoding="utf-8", errors="replace")
+        for section in re.findall(r"^\[(?:project\.scripts|project\.gui-scripts|tool\.poetry\.scripts)\]\s*\n((?:[^\[].*\n?)*)", text, re.MULTILINE):
+            for mod in _SCRIPT_RE.findall(section):
+                path = graph.module_path(mod)
+                if path:
+                    out.append(path)
+
+    package_json = root / "package.json"
+    if package_json.is_file():
+        try:
+            data = json.loads(package_json.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        targets: list[str] = []
+        if isinstance(data.get("main"), str):
+            targets.append(data["main"])
+        bins = data.get("bin")
+        if isinstance(bins, str):
+            targets.append(bins)
+        elif isinstance(bins, dict):
+            targets += [v for v in bins.values() if isinstance(v, str)]
+        for t in targets:
+            t = t.removeprefix("./")
+            if (root / t).is_file():
+                out.append(t)
+
+    for rel in graph.edges:
+        p = PurePosixPath(rel)
+        if p.name == "__main__.py" or (p.stem in ("main", "index") and len(p.parts) <= 3):
+            out.append(rel)
+
+    return list(dict.fromkeys(out))
+
+
+def named_modules(graph: ImportGraph, stems: Tuple[str, ...]) -> List[str]:
+    """
+    Source files whose stem matches one of `stems`, most central first.
+    """
+    hits = [r for r in graph.edges if PurePosixPath(r).stem.lower() in stems]
+    return graph.rank_files(hits)
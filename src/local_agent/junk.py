@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .utils import CODE_EXTS, state_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    generated TEXT,        -- reason, NULL if the file looks hand-written
+    simhash INTEGER        -- NULL if too small to compare
+);
+"""
+
+LOCKFILE_NAMES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb",
+    "poetry.lock", "Pipfile.lock", "uv.lock", "pdm.lock", "Cargo.lock", "Gemfile.lock",
+    "composer.lock", "go.sum", "packages.lock.json", "flake.lock", "mix.lock", "pubspec.lock",
+}
+_GENERATED_NAME_RE = re.compile(
+    r"(\.min\.(js|css)|\.bundle\.js|\.chunk\.js|_pb2(_grpc)?\.py|\.pb\.go|\.pb\.(cc|h)|\.g\.dart|\.designer\.cs|\.map)$"
+)
+_GENERATED_MARKER_RE = re.compile(
+    r"@generated|DO NOT EDIT|Code generated by|auto-?generated|automatically generated|"
+    r"generated by the protocol buffer compiler",
+    re.IGNORECASE,
+)
+_COMMENT_PREFIXES = ("#", "//", "/*", "*", "<!--", "--", ";", "%", '"""')
+_TOKEN_RE = re.compile(r"\w+")
+
+SAMPLE_BYTES = 64 * 1024  # classification only looks at the head of a file
+MIN_SIMHASH_TOKENS = 50
+MAX_SIMHASH_TOKENS = 5000
+NEAR_DUP_BITS = 3  # max Hamming distance between SimHashes of near-duplicates
+
+
+def generated_reason(rel: str, head: str) -> Optional[str]:
+    """
+    Why `rel` looks generated or machine-written, from its name and the first
+    SAMPLE_BYTES of content; None if it looks hand-written.
+    """
+    name = PurePosixPath(rel).name
+    if name in LOCKFILE_NAMES:
+        return "lockfile"
+    if _GENERATED_NAME_RE.search(name):
+        return "generated name"
+    lines = head.splitlines()
+    for ln in lines[:30]:
+        # only in comments near the top: mentioning the phrase in code is fine
+        if ln.lstrip().startswith(_COMMENT_PREFIXES) and _GENERATED_MARKER_RE.search(ln):
+            return "generated marker"
+    if lines:
+        longest = max(len(ln) for ln in lines)
+        avg = sum(len(ln) for ln in lines) / len(lines)
+        if longest > 2000 or (len(head) > 2000 and avg > 300):
+            return "minified"
+    return None
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over 3-token shingles (None for tiny files).
+    """
+    tokens = _TOKEN_RE.findall(text.lower())[:MAX_SIMHASH_TOKENS]
+    if len(tokens) < MIN_SIMHASH_TOKENS:
+        return None
+    shingles = {" ".join(tokens[i : i + 3]) for i in range(len(tokens) - 2)}
+    bits = [
+        format(int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for sh in shingles
+    ]
+    half = len(bits) / 2
+    # column-wise bit counts (zip keeps the per-bit loop in C)
+    value = int("".join("1" if col.count("1") > half else "0" for col in zip(*bits)), 2)
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & (2**64 - 1)).count("1")
+
+
+def near_duplicates(hashes: Dict[str, int], max_bits: int = NEAR_DUP_BITS) -> Dict[str, str]:
+    """
+    Maps each near-duplicate path to the copy that is kept (shortest path,
+    i.e. usually the original rather than a vendored copy).
+    Candidates are found by bucketing on 16-bit bands: with at most 3
+    differing bits, two similar hashes share at least one band.
+    """
+    buckets: Dict[Tuple[int, int], List[str]] = {}
+    for rel, h in hashes.items():
+        for band in range(4):
+            buckets.setdefault((band, (h >> (16 * band)) & 0xFFFF), []).append(rel)
+    dup_of: Dict[str, str] = {}
+    order = sorted(hashes, key=lambda r: (r.count("/"), len(r), r))
+    rank = {r: i for i, r in enumerate(order)}
+    for members in buckets.values():
+        if len(members) < 2 or len(members) > 200:  # huge buckets: degenerate hashes
+            continue
+        members.sort(key=rank.__getitem__)
+        for i, a in enumerate(members):
+            if a in dup_of:
+                continue
+            for b in members[i + 1 :]:
+                if b not in dup_of and _hamming(hashes[a], hashes[b]) <= max_bits:
+                    dup_of[b] = a
+    return dup_of
+
+
+class JunkIndex:
+    """
+    Per-file generated-code flags and SimHashes, cached in
+    <repo>/.local-agent/index/junk.sqlite and refreshed by (mtime, size).
+    """
+
+    def __init__(self, root: Path, db_path: Optional[Path] = None) -> None:
+        self.root = root
+        self.db_path = db_path or (state_dir(root, "index") / "junk.sqlite")
+        self.db = sqlite3.connect(str(self.db_path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def update(self, rel_paths: Iterable[str]) -> int:
+        """
+        Re-analyzes files whose (mtime, size) changed; drops vanished ones.
+        Returns the number of files analyzed.
+        """
+        known = {p: (m, s) for p, m, s in self.db.execute("SELECT path, mtime_ns, size FROM files")}
+        seen: set[str] = set()
+        analyzed = 0
+        with self.db:
+            for rel in rel_paths:
+                name = PurePosixPath(rel).name
+                if PurePosixPath(rel).suffix.lower() not in CODE_EXTS and name not in LOCKFILE_NAMES:
+                    continue
+                seen.add(rel)
+                try:
+                    st = (self.root / rel).stat()
+                except OSError:
+                    continue
+                if known.get(rel) == (st.st_mtime_ns, st.st_size):
+                    continue
+                try:
+                    with (self.root / rel).open("rb") as f:
+                        head = f.read(SAMPLE_BYTES).decode("utf-8", errors="replace")
+                except OSError:
+                    continue
+                self.db.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size, generated, simhash) VALUES (?, ?, ?, ?, ?)",
+                    (rel, st.st_mtime_ns, st.st_size, generated_reason(rel, head), simhash(head)),
+                )
+                analyzed += 1
+            for rel in set(known) - seen:
+                self.db.execute("DELETE FROM files WHERE path = ?", (rel,))
+        return analyzed
+
+    def flagged(self) -> Dict[str, str]:
+        """
+        rel path -> reason ("lockfile", "minified", ..., "near-duplicate of X").
+        """
+        out: Dict[str, str] = {}
+        hashes: Dict[str, int] = {}
+        for rel, reason, h in self.db.execute("SELECT path, generated, simhash FROM files"):
+            if reason:
+                out[rel] = reason
+            elif h is not None:
+                hashes[rel] = h
+        for rel, orig in near_duplicates(hashes).items():
+            out[rel] = f"near-duplicate of {orig}"
+        return out
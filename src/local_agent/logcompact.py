@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+WILDCARD = "<*>"
+
+# Order matters: the most specific patterns go first so e.g. a timestamp is
+# not chewed up into <NUM>:<NUM>:<NUM>.
+MASKS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<TS>"),
+    (re.compile(r"\b\d{4}[-/]\d{2}[-/]\d{2}\b"), "<DATE>"),
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<TIME>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<UUID>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{8,}\b"), "<HEX>"),
+    (re.compile(r"(?<![A-Za-z0-9_.])[-+]?\d+(?:\.\d+)?"), "<NUM>"),
+]
+
+
+# A log line starts with a timestamp or carries a level near its start.
+_LOG_LINE_RE = re.compile(
+    r"^\s*\[?(?:\d{4}[-/]\d{2}[-/]\d{2}|\d{1,2}:\d{2}:\d{2}|[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2})"
+    r"|^.{0,40}\b(?:TRACE|DEBUG|INFO|NOTICE|WARN|WARNING|ERROR|FATAL|CRITICAL|PANIC)\b"
+)
+LOG_LIKE_SHARE = 0.6  # share of sampled lines that must look like log lines
+LOG_SAMPLE_LINES = 200
+
+
+def looks_like_log(text: str) -> bool:
+    """
+    True if most of the first LOG_SAMPLE_LINES non-blank lines start with a
+    timestamp or carry a log level. Code, diffs and prose do not.
+    """
+    sample = [ln for ln in text.splitlines()[: LOG_SAMPLE_LINES * 2] if ln.strip()][:LOG_SAMPLE_LINES]
+    if not sample:
+        return False
+    hits = sum(1 for ln in sample if _LOG_LINE_RE.search(ln))
+    return hits >= LOG_LIKE_SHARE * len(sample)
+
+
+def mask_line(line: str) -> str:
+    for rx, token in MASKS:
+        line = rx.sub(token, line)
+    return line
+
+
+@dataclass
+class _Cluster:
+    tokens: List[str]
+    first_line: int
+    sample: str  # first original line, used verbatim when count == 1
+    count: int = 1
+
+    def similarity(self, tokens: Sequence[str]) -> float:
+        same = sum(1 for a, b in zip(self.tokens, tokens) if a == b or a == WILDCARD)
+        return same / max(1, len(tokens))
+
+    def absorb(self, tokens: Sequence[str]) -> None:
+        self.tokens = [a if a == b else WILDCARD for a, b in zip(self.tokens, tokens)]
+        self.count += 1
+
+
+@dataclass
+class CompactedLog:
+    text: str
+    lines_in: int
+    templates: int
+    kept: int
+    clusters: List[_Cluster] = field(default_factory=list, repr=False)
+
+
+class LogCompactor:
+    """
+    Streaming Drain-style template miner.
+
+    Lines are masked (timestamps, ids, numbers...), tokenized on whitespace and
+    bucketed by (token count, leading constant tokens). Inside a bucket a line
+    joins the most similar template if at least `similarity` of its tokens
+    match; differing positions become <*>. Memory is bounded by the number of
+    templates, not by the number of lines.
+    """
+
+    def __init__(
+        self,
+        keep_terms: Iterable[str] = (),
+        similarity: float = 0.5,
+        max_templates: int = 2_000,
+        max_kept: int = 200,
+        max_line_chars: int = 400,
+    ) -> None:
+        self.keep_terms = [t.lower() for t in keep_terms if t]
+        self.similarity = similarity
+        self.max_templates = max_templates
+        self.max_kept = max_kept
+        self.max_line_chars = max_line_chars
+        self._buckets: Dict[Tuple[int, str], List[_Cluster]] = {}
+        self._clusters: List[_Cluster] = []
+        self._kept: List[Tuple[int, str]] = []
+        self._overflow = 0
+        self.lines_in = 0
+
+    def _bucket_key(self, tokens: Sequence[str]) -> Tuple[int, str]:
+        # Tokens with digits are likely parameters even after masking.
+        lead = [t for t in tokens[:2] if not any(c.isdigit() for c in t)]
+        return len(tokens), " ".join(lead)
+
+    def add(self, line: str) -> None:
+        self.lines_in += 1
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            return
+        line = line[: self.max_line_chars]
+
+        low = line.lower()
+        if self.keep_terms and len(self._kept) < self.max_kept and any(t in low for t in self.keep_terms):
+            self._kept.append((self.lines_in, line))
+            return
+
+        tokens = mask_line(line).split()
+        bucket = self._buckets.setdefault(self._bucket_key(tokens), [])
+
+        best: Optional[_Cluster] = None
+        best_sim = 0.0
+        for c in bucket:
+            sim = c.similarity(tokens)
+            if sim > best_sim:
+                best, best_sim = c, sim
+        if best is not None and best_sim >= self.similarity:
+            best.absorb(tokens)
+            return
+
+        if len(self._clusters) >= self.max_templates:
+            if best is not None:
+                best.absorb(tokens)
+            else:
+                self._overflow += 1
+            return
+
+        c = _Cluster(tokens=list(tokens), first_line=self.lines_in, sample=line)
+        bucket.append(c)
+        self._clusters.append(c)
+
+    def feed(self, lines: Iterable[str]) -> "LogCompactor":
+        for line in lines:
+            self.add(line)
+        return self
+
+    def result(self) -> CompactedLog:
+        out: List[str] = [
+            f"LOG TEMPLATES ({self.lines_in} lines -> {len(self._clusters)} templates, "
+            "in order of first appearance; <TS>/<NUM>/<HEX>/... are masked fields, <*> varies):"
+        ]
+        for c in self._clusters:
+            if c.count == 1:
+                out.append(f"      1x L{c.first_line}: {c.sample}")
+            else:
+                out.append(f"{c.count:>7}x L{c.first_line}+: {' '.join(c.tokens)}")
+        if self._overflow:
+            out.append(f"{self._overflow:>7}x (lines not clustered: template limit reached)")
+
+        if self._kept:
+            out.append("")
+            out.append(f"LINES MATCHING QUESTION TERMS (verbatim, {len(self._kept)}):")
+            out.extend(f"L{n}: {line}" for n, line in self._kept)
+
+        return CompactedLog(
+            text="\n".join(out) + "\n",
+            lines_in=self.lines_in,
+            templates=len(self._clusters),
+            kept=len(self._kept),
+            clusters=list(self._clusters),
+        )
+
+
+def compact_log(lines: Iterable[str], keep_terms: Iterable[str] = (), **kwargs) -> CompactedLog:
+    return LogCompactor(keep_terms=keep_terms, **kwargs).feed(lines).result()
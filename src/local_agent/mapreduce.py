@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .options import resolve_options
+from .prompts import SYSTEM_STDIN_COMBINE, SYSTEM_STDIN_MAP
+
+
+@dataclass(frozen=True)
+class Chunk:
+    index: int       # 0-based chunk number
+    start_line: int  # 1-based line number of the first line in the chunk
+    end_line: int
+    text: str
+
+
+def iter_lines(stream: TextIO, prefix: str = "") -> Iterator[str]:
+    """
+    Lines of `stream` (with line endings), preceded by `prefix`: text already
+    read from the stream, e.g. while probing its size. The prefix may end
+    mid-line; it is glued to the rest of that line.
+    """
+    if prefix:
+        head = prefix.splitlines(keepends=True)
+        tail = head.pop() if head and not head[-1].endswith("\n") else ""
+        yield from head
+        if tail:
+            yield tail + (stream.readline() or "")
+    yield from stream
+
+
+def iter_chunks(stream: TextIO, chunk_chars: int, prefix: str = "") -> Iterator[Chunk]:
+    """
+    Split a text stream into line-aligned chunks of at most ~chunk_chars.
+    Only one chunk is held in memory at a time.
+    """
+    chunk_chars = max(1, chunk_chars)
+    buf: list[str] = []
+    size = 0
+    index = 0
+    line_no = 0
+    start = end = 1
+
+    for line in iter_lines(stream, prefix):
+        line_no += 1
+        # Hard-split pathological single lines (minified logs, binary noise).
+        while len(line) > chunk_chars:
+            if buf:
+                yield Chunk(index, start, end, "".join(buf))
+                index += 1
+                buf, size = [], 0
+            yield Chunk(index, line_no, line_no, line[:chunk_chars])
+            index += 1
+            line = line[chunk_chars:]
+        if not line:
+            continue
+        if buf and size + len(line) > chunk_chars:
+            yield Chunk(index, start, end, "".join(buf))
+            index += 1
+            buf, size = [], 0
+        if not buf:
+            start = line_no
+        buf.append(line)
+        size += len(line)
+        end = line_no
+
+    if buf:
+        yield Chunk(index, start, end, "".join(buf))
+
+
+def _is_empty_note(note: str) -> bool:
+    return note.strip().strip(".").upper() in ("", "NONE", "NOTHING RELEVANT")
+
+
+def _map_messages(question: str, chunk: Chunk):
+    return [
+        {"role": "system", "content": SYSTEM_STDIN_MAP},
+        {
+            "role": "user",
+            "content": (
+                f"USER QUESTION:\n{question}\n\n"
+                f"STDIN CHUNK {chunk.index + 1} (lines {chunk.start_line}-{chunk.end_line}):\n"
+                f"{chunk.text}"
+            ),
+        },
+    ]
+
+
+def _combine_messages(question: str, notes: str):
+    return [
+        {"role": "system", "content": SYSTEM_STDIN_COMBINE},
+        {"role": "user", "content": f"USER QUESTION:\n{question}\n\nNOTES:\n{notes}"},
+    ]
+
+
+def _batches(notes: List[str], max_chars: int) -> Iterator[str]:
+    buf: list[str] = []
+    size = 0
+    for n in notes:
+        if buf and size + len(n) > max_chars:
+            yield "\n\n".join(buf)
+            buf, size = [], 0
+        buf.append(n[:max_chars])
+        size += len(n) + 2
+    if buf:
+        yield "\n\n".join(buf)
+
+
+def condense_stream(
+    client,
+    question: str,
+    chunks: Iterable[Chunk],
+    parallelism: int = 4,
+    max_chars: int = 80_000,
+    on_progress: Optional[Callable[[int], None]] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Map step: ask the model to extract what is relevant to `question` from each
+    chunk, with at most `parallelism` requests in flight. Only the (small)
+    extracted notes are kept, so memory stays flat regardless of input size.
+
+    If the notes still exceed `max_chars`, they are combined in batches until
+    they fit. The caller runs the final (reduce) prompt on the result.
+    `options` is a config options table (see options.resolve_options).
+    """
+    parallelism = max(1, parallelism)
+    notes: dict[int, str] = {}
+    done = 0
+
+    def ask(messages: List[Dict[str, str]]) -> str:
+        if options is None:
+            return client.chat(messages)
+        return client.chat(messages, options=resolve_options(options, messages))
+
+    def run(chunk: Chunk) -> tuple[Chunk, str]:
+        return chunk, ask(_map_messages(question, chunk))
+
+    def collect(fut: Future) -> None:
+        nonlocal done
+        chunk, note = fut.result()
+        if not _is_empty_note(note):
+            notes[chunk.index] = f"[lines {chunk.start_line}-{chunk.end_line}]\n{note.strip()}"
+        done += 1
+        if on_progress is not None:
+            on_progress(done)
+
+    with ThreadPoolExecutor(max_workers=parallelism) as pool:
+        pending: deque[Future] = deque()
+        try:
+            for chunk in chunks:
+                # Bounded window: never read further ahead than the workers can use.
+                while len(pending) >= parallelism * 2:
+                    collect(pending.popleft())
+                pending.append(pool.submit(run, chunk))
+            while pending:
+                collect(pending.popleft())
+        except BaseException:
+            for fut in pending:
+                fut.cancel()  # do not wait for the rest of the window after a failure or Ctrl-C
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        ordered = [notes[i] for i in sorted(notes)]
+        while sum(len(n) + 2 for n in ordered) > max_chars and len(ordered) > 1:
+            batches = list(_batches(ordered, max_chars))
+            if len(batches) == len(ordered):
+                # Every note is a batch of its own: combine pairwise instead.
+                batches = ["\n\n".join(ordered[i : i + 2]) for i in range(0, len(ordered), 2)]
+            combined = pool.map(lambda b: ask(_combine_messages(question, b)), batches)
+            ordered = [c.strip() for c in combined if not _is_empty_note(c)]
+
+    out = "\n\n".join(ordered)
+    if len(out) > max_chars:
+        out = out[:max_chars] + "\n...<snip>..."
+    return out
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import json
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 
+from .payload import Prompt, iter_chat_body
+
 
 class OllamaError(Exception):
     """Base exception for Ollama client errors."""
@@ -27,20 +31,43 @@ class OllamaClient:
     model: str
     timeout_s: float = 300.0  # Increased default to 5 minutes for slower models
 
-    def chat(self, messages: List[Dict[str, str]]) -> str:
+    def chat(self, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None) -> str:
+        return str(self.chat_message(messages, options=options).get("content") or "")
+
+    def chat_message(
+        self,
+        messages: List[Dict[str, Any]],
+        options: Optional[Dict[str, Any]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        POST /api/chat and return the assistant message itself, including
+        any `tool_calls` the model made with `tools` offered.
+        """
         url = f"{self.host.rstrip('/')}/api/chat"
-        payload: Dict[str, Any] = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False,
-        }
+        if any(isinstance(m["content"], Prompt) for m in messages):
+            # lazily assembled prompt: encode and send it in chunks (chunked transfer)
+            request: Dict[str, Any] = {
+                "content": iter_chat_body(self.model, messages, options=options, tools=tools),
+                "headers": {"Content-Type": "application/json"},
+            }
+        else:
+            payload: Dict[str, Any] = {
+                "model": self.model,
+                "messages": messages,
+                "stream": False,
+            }
+            if options:
+                payload["options"] = options
+            if tools:
+                payload["tools"] = tools
+            request = {"json": payload}
         try:
             with httpx.Client(timeout=self.timeout_s) as client:
-                r = client.post(url, json=payload)
+                r = client.post(url, **request)
                 r.raise_for_status()
                 data = r.json()
-                msg = data.get("message") or {}
-                return str(msg.get("content") or "")
+                return data.get("message") or {}
         except httpx.TimeoutException as e:
             raise OllamaTimeoutError(
                 f"Request timed out after {self.timeout_s}s. "
@@ -57,6 +84,70 @@ class OllamaClient:
                 f"Ollama API error: {e.response.status_code} - {e.response.text}"
             ) from e
 
+    def generate_timed(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: Optional[str] = None,
+    ) -> Dict[str, float]:
+        """
+        Streams POST /api/generate and returns timings: client-side time to
+        first token and wall time, plus Ollama's own load / prompt-eval /
+        eval durations (seconds) and token counts from the final chunk.
+        """
+        url = f"{self.host.rstrip('/')}/api/generate"
+        payload: Dict[str, Any] = {"model": self.model, "prompt": prompt, "stream": True}
+        if options:
+            payload["options"] = options
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        t0 = time.perf_counter()
+        ttft: Optional[float] = None
+        final: Dict[str, Any] = {}
+        try:
+            with httpx.Client(timeout=self.timeout_s) as client:
+                with client.stream("POST", url, json=payload) as r:
+                    r.raise_for_status()
+                    for line in r.iter_lines():
+                        if not line.strip():
+                            continue
+                        chunk = json.loads(line)
+                        if ttft is None and chunk.get("response"):
+                            ttft = time.perf_counter() - t0
+                        if chunk.get("done"):
+                            final = chunk
+        except httpx.TimeoutException as e:
+            raise OllamaTimeoutError(f"Request timed out after {self.timeout_s}s.") from e
+        except httpx.ConnectError as e:
+            raise OllamaConnectionError(
+                f"Cannot connect to Ollama at {self.host}. "
+                f"Is Ollama running? Try: ollama serve"
+            ) from e
+        except httpx.HTTPStatusError as e:
+            raise OllamaError(f"Ollama API error: {e.response.status_code}") from e
+        wall = time.perf_counter() - t0
+        ns = 1e9
+        return {
+            "wall_s": wall,
+            "ttft_s": ttft if ttft is not None else wall,
+            "load_s": final.get("load_duration", 0) / ns,
+            "prompt_tokens": float(final.get("prompt_eval_count", 0)),
+            "prompt_eval_s": final.get("prompt_eval_duration", 0) / ns,
+            "eval_tokens": float(final.get("eval_count", 0)),
+            "eval_s": final.get("eval_duration", 0) / ns,
+        }
+
+    def unload(self) -> None:
+        """
+        Asks Ollama to evict the model from memory (generate with keep_alive=0).
+        """
+        url = f"{self.host.rstrip('/')}/api/generate"
+        try:
+            with httpx.Client(timeout=self.timeout_s) as client:
+                client.post(url, json={"model": self.model, "keep_alive": 0}).raise_for_status()
+        except httpx.HTTPError as e:
+            raise OllamaError(f"Could not unload {self.model}: {e}") from e
+
     def list_models(self) -> List[str]:
         """
         GET /api/tags returns locally available models.
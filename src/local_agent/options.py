@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, List, Optional
+
+# Options passed through to Ollama's /api/chat "options" object.
+OLLAMA_OPTION_KEYS = ("num_ctx", "num_predict", "num_thread", "temperature", "stop")
+
+# num_ctx is rounded up to one of these so that similar prompts reuse the
+# already-loaded model (Ollama reloads it whenever num_ctx changes).
+CTX_BUCKET_MIN = 4096
+DEFAULT_NUM_CTX_MAX = 32768
+DEFAULT_OUTPUT_TOKENS = 1536
+_MESSAGE_OVERHEAD_TOKENS = 8
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count without a tokenizer: ~3 chars per token, which errs on
+    the high side for code (identifiers and punctuation tokenize densely).
+    """
+    return (len(text) + 2) // 3
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(estimate_tokens(m.get("content", "")) + _MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def ctx_bucket(tokens: int, max_ctx: int = DEFAULT_NUM_CTX_MAX) -> int:
+    """
+    Smallest power-of-two bucket (>= CTX_BUCKET_MIN) holding `tokens`,
+    capped at `max_ctx`.
+    """
+    size = CTX_BUCKET_MIN
+    while size < tokens and size < max_ctx:
+        size *= 2
+    return min(size, max_ctx)
+
+
+def resolve_options(
+    opts: Dict[str, Any],
+    messages: List[Dict[str, str]],
+    expected_output: Optional[int] = None,
+    floor: int = 0,
+) -> Dict[str, Any]:
+    """
+    Turns a config options table into the Ollama "options" payload.
+
+    num_ctx = "auto" (the default) sizes the context to the estimated prompt
+    plus the expected output (num_predict if set, else `expected_output`,
+    else DEFAULT_OUTPUT_TOKENS), rounded up to a bucket, never below `floor`
+    and never above num_ctx_max (with a warning on stderr when the prompt
+    does not fit). num_ctx = 0 leaves the server default.
+    """
+    out = {k: opts[k] for k in OLLAMA_OPTION_KEYS if k in opts}
+    num_ctx = out.pop("num_ctx", "auto")
+    if num_ctx == "auto":
+        predict = int(out.get("num_predict") or 0)
+        output = predict if predict > 0 else (expected_output or DEFAULT_OUTPUT_TOKENS)
+        max_ctx = int(opts.get("num_ctx_max", DEFAULT_NUM_CTX_MAX))
+        need = estimate_messages_tokens(messages) + output
+        out["num_ctx"] = min(max(ctx_bucket(need, max_ctx), floor), max_ctx)
+        if need > out["num_ctx"]:
+            print(
+                f"warning: the prompt needs ~{need} tokens but num_ctx is capped at {out['num_ctx']} "
+                "(num_ctx_max); Ollama will drop the start of the prompt.",
+                file=sys.stderr,
+            )
+    elif int(num_ctx) > 0:
+        out["num_ctx"] = int(num_ctx)
+    return out
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+BODY_CHUNK_BYTES = 64 * 1024
+
+
+class NumberedText:
+    """
+    A file's text rendered as `  12 | line` rows, produced lazily in batches
+    instead of as one numbered copy of the whole file.
+    """
+
+    __slots__ = ("text", "start_line", "max_lines", "end_line")
+
+    def __init__(self, text: str, start_line: int = 1, max_lines: int = 400) -> None:
+        self.text = text
+        self.start_line = start_line
+        self.max_lines = max_lines
+        self.end_line = start_line - 1 + min(max_lines, len(text.splitlines()))
+
+    def iter_chunks(self, batch: int = 256) -> Iterator[str]:
+        lines = self.text.splitlines()[: self.max_lines]
+        ln = self.start_line
+        for i in range(0, len(lines), batch):
+            rows = []
+            for s in lines[i : i + batch]:
+                rows.append(f"{ln:>4} | {s}")
+                ln += 1
+            yield ("\n" if i else "") + "\n".join(rows)
+
+
+Part = Union[str, NumberedText]
+
+
+class Prompt:
+    """
+    Message content assembled from parts (plain strings and NumberedText),
+    joined with newlines only when encoded. Behaves enough like a string for
+    inspection (`in`, `len`, `str()`, `==`) but is never materialized on the
+    request path: see iter_chat_body().
+    """
+
+    __slots__ = ("parts", "_len")
+
+    def __init__(self, parts: Sequence[Part]) -> None:
+        self.parts = list(parts)
+        self._len: Optional[int] = None
+
+    def iter_chunks(self) -> Iterator[str]:
+        for i, part in enumerate(self.parts):
+            if i:
+                yield "\n"
+            if isinstance(part, str):
+                yield part
+            else:
+                yield from part.iter_chunks()
+
+    def __str__(self) -> str:
+        return "".join(self.iter_chunks())
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(len(c) for c in self.iter_chunks())
+        return self._len
+
+    def __contains__(self, needle: str) -> bool:
+        return needle in str(self)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (str, Prompt)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+def content_text(content: Union[str, Prompt]) -> str:
+    return content if isinstance(content, str) else str(content)
+
+
+def _content_chunks(content: Union[str, Prompt], size: int = BODY_CHUNK_BYTES) -> Iterable[str]:
+    if isinstance(content, Prompt):
+        return content.iter_chunks()
+    return (content[i : i + size] for i in range(0, len(content), size))
+
+
+def iter_chat_body(
+    model: str,
+    messages: List[Dict[str, Any]],
+    stream: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+    chunk_bytes: int = BODY_CHUNK_BYTES,
+    tools: Optional[List[Dict[str, Any]]] = None,
+) -> Iterator[bytes]:
+    """
+    The /api/chat JSON body, encoded piece by piece: each content chunk is
+    JSON-escaped on its own, and output is coalesced into ~chunk_bytes
+    writes. Other message keys (tool_calls, tool_name, images) are encoded
+    as they are. Peak memory is about one file's numbered rows, not the
+    prompt.
+    """
+    head: Dict[str, Any] = {"model": model, "stream": stream}
+    if options:
+        head["options"] = options
+    if tools:
+        head["tools"] = tools
+    buf: List[bytes] = [json.dumps(head)[:-1].encode() + b', "messages": [']
+    size = len(buf[0])
+    for i, m in enumerate(messages):
+        buf.append(b", {" if i else b"{")
+        for j, (key, value) in enumerate(m.items()):
+            # tool_calls, tool_name, images...: small, so encoded whole; only content streams
+            buf.append(((", " if j else "") + json.dumps(key) + ": ").encode())
+            if key != "content" or not isinstance(value, (str, Prompt)):
+                buf.append(json.dumps(value).encode())
+                continue
+            buf.append(b'"')
+            for chunk in _content_chunks(value):
+                data = json.dumps(chunk)[1:-1].encode()
+                buf.append(data)
+                size += len(data)
+                if size >= chunk_bytes:
+                    yield b"".join(buf)
+                    buf, size = [], 0
+            buf.append(b'"')
+        buf.append(b"}")
+    buf.append(b"]}")
+    yield b"".join(buf)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .ollama_client import OllamaClient, OllamaConnectionError, OllamaError, OllamaTimeoutError
+
+
+@dataclass
+class HostStats:
+    host: str
+    healthy: bool = True
+    models: Optional[List[str]] = None  # None = not checked yet
+    last_check: float = 0.0
+    check_ms: Optional[float] = None  # latency of the last /api/tags probe
+    probe_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=20))
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    last_error: str = ""
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=50))
+
+    def avg_latency_s(self) -> Optional[float]:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else None
+
+
+class OllamaPool:
+    """
+    Drop-in replacement for OllamaClient that spreads requests over several
+    Ollama hosts.
+
+    - Health and model presence are probed via /api/tags, at most every
+      `health_interval_s` per host.
+    - Each request goes to the healthy host with the model that has the
+      fewest outstanding requests (ties: lower average latency).
+    - On OllamaConnectionError / OllamaTimeoutError the host is marked
+      unhealthy and the request is retried on the next candidate.
+    - With an `admission` (AdmissionGroup), a request then waits for a slot
+      on the host it was sent to.
+    """
+
+    def __init__(
+        self,
+        hosts: List[str],
+        model: str,
+        timeout_s: float = 300.0,
+        health_interval_s: float = 30.0,
+        client_factory: Callable[..., Any] = OllamaClient,
+        admission: Optional[Any] = None,
+        on_queued: Optional[Callable[[], None]] = None,
+    ) -> None:
+        if not hosts:
+            raise ValueError("OllamaPool needs at least one host")
+        self.hosts = list(dict.fromkeys(hosts))
+        self.model = model
+        self.timeout_s = timeout_s
+        self.health_interval_s = health_interval_s
+        self._factory = client_factory
+        self.admission = admission
+        self.on_queued = on_queued
+        self._lock = threading.Lock()
+        self._stats: Dict[str, HostStats] = {h: HostStats(host=h) for h in self.hosts}
+
+    @property
+    def host(self) -> str:
+        return ", ".join(self.hosts)
+
+    def _client(self, host: str, timeout_s: Optional[float] = None):
+        return self._factory(host=host, model=self.model, timeout_s=timeout_s or self.timeout_s)
+
+    # -- health ---------------------------------------------------------------
+
+    def _probe(self, host: str) -> None:
+        st = self._stats[host]
+        t0 = time.perf_counter()
+        try:
+            models = self._client(host, timeout_s=min(5.0, self.timeout_s)).list_models()
+        except Exception as e:  # any probe failure just means "unhealthy"
+            with self._lock:
+                st.healthy, st.last_error = False, str(e)
+                st.last_check, st.check_ms = time.monotonic(), None
+            return
+        with self._lock:
+            st.healthy, st.models, st.last_error = True, models, ""
+            st.last_check, st.check_ms = time.monotonic(), (time.perf_counter() - t0) * 1000
+            st.probe_ms.append(st.check_ms)
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Re-probes hosts whose last check is older than health_interval_s
+        (all hosts if `force`), in parallel.
+        """
+        now = time.monotonic()
+        stale = [h for h, st in self._stats.items() if force or now - st.last_check >= self.health_interval_s]
+        threads = [threading.Thread(target=self._probe, args=(h,), daemon=True) for h in stale]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def _acquire(self, tried: set[str]) -> Optional[HostStats]:
+        """
+        Picks the least-loaded untried host and counts the request against it,
+        atomically so concurrent callers spread out.
+        """
+        with self._lock:
+            stats = [s for s in self._stats.values() if s.host not in tried]
+            if not stats:
+                return None
+            healthy = [s for s in stats if s.healthy]
+            with_model = [s for s in healthy if s.models is None or self.model in s.models]
+            pool = with_model or healthy or stats  # nothing healthy: try them anyway
+
+            def load(s: HostStats) -> Tuple[int, float]:
+                avg = s.avg_latency_s()
+                return s.outstanding, avg if avg is not None else 0.0
+
+            st = min(pool, key=load)
+            st.outstanding += 1
+            st.requests += 1
+            return st
+
+    # -- OllamaClient interface -------------------------------------------------
+
+    def chat(self, messages: List[Dict[str, Any]], **kwargs: Any) -> str:
+        return self._request(lambda client: client.chat(messages, **kwargs))
+
+    def chat_message(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        return self._request(lambda client: client.chat_message(messages, **kwargs))
+
+    def _slot(self, host: str):
+        if self.admission is None:
+            return nullcontext(0.0)
+        return self.admission.slot(host, self.on_queued)
+
+    def _request(self, call: Callable[[Any], Any]) -> Any:
+        """
+        Runs `call(client)` against the best host, failing over to the next
+        one on connection errors and timeouts.
+        """
+        self.refresh()
+        tried: set[str] = set()
+        last: Optional[OllamaError] = None
+        while (st := self._acquire(tried)) is not None:
+            tried.add(st.host)
+            try:
+                with self._slot(st.host):
+                    t0 = time.perf_counter()
+                    out = call(self._client(st.host))
+            except (OllamaConnectionError, OllamaTimeoutError) as e:
+                with self._lock:
+                    st.healthy, st.failures, st.last_error = False, st.failures + 1, str(e)
+                    st.last_check = time.monotonic()
+                last = e
+                continue
+            finally:
+                with self._lock:
+                    st.outstanding -= 1
+            with self._lock:
+                st.latencies.append(time.perf_counter() - t0)
+            return out
+        assert last is not None
+        raise type(last)(f"All Ollama hosts failed ({self.host}). Last error: {last}") from last
+
+    def list_models(self) -> List[str]:
+        self.refresh()
+        names: list[str] = []
+        for st in self._stats.values():
+            if st.healthy and st.models:
+                names += [m for m in st.models if m not in names]
+        if not any(st.healthy for st in self._stats.values()):
+            raise OllamaConnectionError(f"Cannot connect to any Ollama host ({self.host}).")
+        return names
+
+    def healthcheck(self) -> Tuple[bool, str]:
+        self.refresh(force=True)
+        up = [st.host for st in self._stats.values() if st.healthy]
+        if up:
+            return True, f"OK ({len(up)}/{len(self.hosts)} hosts up)"
+        errors = "; ".join(f"{st.host}: {st.last_error}" for st in self._stats.values())
+        return False, errors
+
+    def stats(self) -> List[HostStats]:
+        with self._lock:
+            return list(self._stats.values())
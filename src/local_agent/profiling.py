@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .utils import state_dir
+
+
+@dataclass
+class Profiler:
+    """
+    cProfile + tracemalloc around one CLI invocation.
+
+    stop() writes to <repo>/.local-agent/profiles/:
+      <stamp>-<command>.pstats  (load with `python -m pstats` or snakeviz)
+      <stamp>-<command>.txt     (top-N by cumulative time, memory peak and
+                                 top allocation sites)
+    """
+
+    root: Path
+    command: str
+    top: int = 30
+    _prof: Optional[cProfile.Profile] = field(default=None, init=False, repr=False)
+    _t0: float = field(default=0.0, init=False, repr=False)
+    _started_tracemalloc: bool = field(default=False, init=False, repr=False)
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+        self._t0 = time.perf_counter()
+        self._prof = cProfile.Profile()
+        self._prof.enable()
+
+    def stop(self) -> Path:
+        """
+        Stops profiling and writes the reports. Returns the .txt report path.
+        """
+        assert self._prof is not None, "start() was not called"
+        self._prof.disable()
+        wall = time.perf_counter() - self._t0
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        d = state_dir(self.root, "profiles")
+        base = d / f"{time.strftime('%Y%m%d-%H%M%S')}-{self.command or 'main'}"
+        self._prof.dump_stats(str(base.with_suffix(".pstats")))
+
+        buf = io.StringIO()
+        buf.write(f"command: {self.command}\nwall time: {wall:.3f}s\n\n")
+        buf.write(f"== top {self.top} by cumulative time ==\n")
+        pstats.Stats(self._prof, stream=buf).sort_stats("cumulative").print_stats(self.top)
+
+        buf.write("\n== memory (tracemalloc) ==\n")
+        buf.write(f"peak: {peak / 1024 / 1024:.1f} MiB, still allocated at exit: {current / 1024 / 1024:.1f} MiB\n\n")
+        snapshot = snapshot.filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+        )
+        for stat in snapshot.statistics("lineno")[: self.top]:
+            buf.write(f"{stat}\n")
+
+        report = base.with_suffix(".txt")
+        report.write_text(buf.getvalue(), encoding="utf-8")
+        return report
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Git files whose mtime moves on commit / checkout / add: a cheap proxy for
+# "history or index changed" (recency ranking, ls-files output).
+_GIT_MARKERS = (".git/index", ".git/HEAD", ".git/logs/HEAD")
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def dir_signature(bases: List[Path]) -> Tuple[Tuple[str, Optional[Tuple[int, int]]], ...]:
+    """
+    mtimes of `bases` and every directory below them: changes whenever a file
+    is added, removed or renamed anywhere in those trees.
+    """
+    sig = []
+    for base in bases:
+        sig.append((str(base), _stat_key(base)))
+        if base.is_dir():
+            for dirpath, dirnames, _ in os.walk(base):
+                for d in dirnames:
+                    path = os.path.join(dirpath, d)
+                    sig.append((path, _stat_key(Path(path))))
+    return tuple(sig)
+
+
+class RepoCache:
+    """
+    Session-scoped memo for RepoContext (used by `chat`).
+
+    Everything cached is tied to a *generation*. At most once per
+    `check_interval_s` the cache re-stats the directories and files it has
+    seen (no reads, no subprocesses); any change bumps the generation, which
+    invalidates derived results (file list, rankings, index refreshes).
+    File contents are cached by (path, mtime, size) in an LRU capped at
+    `max_bytes`.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 64 * 1024 * 1024, check_interval_s: float = 1.0) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.check_interval_s = check_interval_s
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._last_check = 0.0
+        self._dir_stats: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._file_stats: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._memo: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+        self._content: "OrderedDict[Tuple[str, int], Tuple[Tuple[int, int], str]]" = OrderedDict()
+        self._content_bytes = 0
+        self.max_memo_entries = 256
+
+    # -- validation -----------------------------------------------------------
+
+    def track(self, rels: List[str]) -> None:
+        """
+        Remembers the stat signature of a freshly listed file set and of the
+        directories holding it.
+        """
+        dirs = {""}
+        for rel in rels:
+            parent = os.path.dirname(rel)
+            while parent not in dirs:
+                dirs.add(parent)
+                parent = os.path.dirname(parent)
+        # merged, not replaced: listings with different excludes share the state
+        self._dir_stats.update({d: _stat_key(self.root / d) for d in dirs})
+        for marker in _GIT_MARKERS:
+            self._dir_stats[marker] = _stat_key(self.root / marker)
+        self._file_stats.update({rel: _stat_key(self.root / rel) for rel in rels})
+        self._last_check = time.monotonic()
+
+    def check(self, force: bool = False) -> None:
+        """
+        Bumps the generation if any tracked directory or file changed.
+        A changed directory (file added/removed/renamed) also drops the
+        cached file list.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval_s:
+            return
+        self._last_check = now
+        dirs_changed = any(_stat_key(self.root / d) != v for d, v in self._dir_stats.items())
+        files_changed = dirs_changed or any(_stat_key(self.root / r) != v for r, v in self._file_stats.items())
+        if files_changed:
+            self.generation += 1
+            if dirs_changed:
+                self._dir_stats = {}
+                self._file_stats = {}
+                self._memo = OrderedDict((k, v) for k, v in self._memo.items() if not _is_listing(k))
+
+    # -- memo -------------------------------------------------------------------
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Value of `compute()` memoized for the current generation. File listings
+        (keys starting with "files") survive content-only changes.
+        """
+        self.check()
+        entry = self._memo.get(key)
+        if entry is not None and (entry[0] == self.generation or _is_listing(key)):
+            self._memo.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = compute()
+        self._memo[key] = (self.generation, value)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.max_memo_entries:
+            self._memo.popitem(last=False)
+        return value
+
+    def is_fresh(self, key: Hashable) -> bool:
+        """
+        True if `key` was marked done in the current generation (see mark()).
+        """
+        self.check()
+        entry = self._memo.get(key)
+        return entry is not None and entry[0] == self.generation
+
+    def mark(self, key: Hashable) -> None:
+        self._memo[key] = (self.generation, True)
+
+    # -- file contents ------------------------------------------------------------
+
+    def read(self, rel: str, max_chars: int, load: Callable[[], str]) -> str:
+        sig = _stat_key(self.root / rel)
+        key = (rel, max_chars)
+        entry = self._content.get(key)
+        if entry is not None and sig is not None and entry[0] == sig:
+            self._content.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        text = load()
+        if entry is not None:
+            self._content_bytes -= len(entry[1])
+            del self._content[key]
+        if sig is not None and len(text) <= self.max_bytes:
+            self._content[key] = (sig, text)
+            self._content_bytes += len(text)
+            while self._content_bytes > self.max_bytes and self._content:
+                _, (_, old) = self._content.popitem(last=False)
+                self._content_bytes -= len(old)
+        return text
+
+
+def _is_listing(key: Hashable) -> bool:
+    return isinstance(key, tuple) and bool(key) and key[0] == "files"
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .prompts import SYSTEM_SUMMARIZE
+from .sharedcache import SharedCache
+from .utils import CODE_EXTS, file_digest, read_text_limited, state_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    hash TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    model TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+MAX_SUMMARY_BYTES = 400_000  # larger files are not worth a model call
+SHARED_KIND = "summary/1"
+
+
+class RepoMap:
+    """
+    One-paragraph summaries of repo files, generated by the model and stored
+    by content hash in <repo>/.local-agent/index/repomap.sqlite: a file is
+    only summarized again when its content changes (renames are free).
+    Paths map to their last seen hash via (mtime, size), so looking up
+    summaries for the prompt costs a stat per file, not a read.
+    With a `shared` cache, summaries are also taken from and given to other
+    clones of the same code.
+    """
+
+    def __init__(self, root: Path, db_path: Optional[Path] = None, shared: Optional[SharedCache] = None) -> None:
+        self.root = root
+        self.shared = shared
+        self.db_path = db_path or (state_dir(root, "index") / "repomap.sqlite")
+        self.db = sqlite3.connect(str(self.db_path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _known(self) -> Dict[str, Tuple[str, int, int]]:
+        return {p: (h, m, s) for p, h, m, s in self.db.execute("SELECT path, hash, mtime_ns, size FROM files")}
+
+    def summaries_for(self, rel_paths: Iterable[str]) -> Dict[str, str]:
+        """
+        Current summaries of `rel_paths`; files changed since they were
+        summarized are left out.
+        """
+        known = self._known()
+        hashes: Dict[str, str] = {}
+        for rel in rel_paths:
+            prev = known.get(rel)
+            if prev is None:
+                continue
+            try:
+                st = (self.root / rel).stat()
+            except OSError:
+                continue
+            if (st.st_mtime_ns, st.st_size) == prev[1:]:
+                hashes[rel] = prev[0]
+        if not hashes:
+            return {}
+        found = dict(self.db.execute("SELECT hash, summary FROM summaries"))
+        return {rel: found[h] for rel, h in hashes.items() if h in found}
+
+    def pending(self, rel_paths: Iterable[str]) -> List[Tuple[str, str]]:
+        """
+        (rel, hash) of files without a summary of their current content.
+        Records the current hash of every file it had to read; summaries found
+        in the shared cache are copied in rather than reported.
+        """
+        known = self._known()
+        have = {h for (h,) in self.db.execute("SELECT hash FROM summaries")}
+        out: List[Tuple[str, str]] = []
+        with self.db:
+            for rel in rel_paths:
+                if Path(rel).suffix.lower() not in CODE_EXTS:
+                    continue
+                p = self.root / rel
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                prev = known.get(rel)
+                if prev and prev[1:] == (st.st_mtime_ns, st.st_size) and prev[0] in have:
+                    continue
+                if st.st_size > MAX_SUMMARY_BYTES:
+                    continue
+                try:
+                    data = p.read_bytes()
+                except OSError:
+                    continue
+                digest = file_digest(data)
+                self.db.execute(
+                    "INSERT OR REPLACE INTO files (path, hash, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                    (rel, digest, st.st_mtime_ns, st.st_size),
+                )
+                if digest in have:
+                    continue
+                cached = self.shared.get(SHARED_KIND, digest) if self.shared is not None else None
+                if cached is not None:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO summaries (hash, summary, model, created) VALUES (?, ?, ?, ?)",
+                        (digest, cached["summary"], cached["model"], time.time()),
+                    )
+                    have.add(digest)
+                else:
+                    out.append((rel, digest))
+        return out
+
+    def put(self, digest: str, summary: str, model: str) -> None:
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO summaries (hash, summary, model, created) VALUES (?, ?, ?, ?)",
+                (digest, summary.strip(), model, time.time()),
+            )
+        if self.shared is not None:
+            self.shared.put(SHARED_KIND, digest, {"summary": summary.strip(), "model": model})
+
+
+def _summary_messages(root: Path, rel: str, max_chars: int) -> List[Dict[str, str]]:
+    text = read_text_limited(root / rel, max_chars=max_chars)
+    return [
+        {"role": "system", "content": SYSTEM_SUMMARIZE},
+        {"role": "user", "content": f"FILE: {rel}\n\n{text}"},
+    ]
+
+
+def build_repo_map(
+    repo_map: RepoMap,
+    client,
+    model: str,
+    rel_paths: Iterable[str],
+    parallelism: int = 2,
+    max_chars: int = 12_000,
+    limit: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Summarizes files that have no summary for their current content, with
+    up to `parallelism` model calls in flight. Each summary is stored as soon
+    as it arrives, so an interrupted run keeps its progress; on an error
+    the requests not yet started are cancelled.
+    Returns the number of files summarized.
+    """
+    todo = repo_map.pending(rel_paths)
+    if limit is not None:
+        todo = todo[:limit]
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, parallelism)) as pool:
+        futures = {
+            pool.submit(lambda rel: client.chat(_summary_messages(repo_map.root, rel, max_chars)), rel): digest
+            for rel, digest in todo
+        }
+        try:
+            for fut in as_completed(futures):
+                repo_map.put(futures[fut], fut.result(), model)
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, len(todo))
+        except BaseException:
+            for fut in futures:
+                fut.cancel()  # do not keep summarizing the rest after a failure or Ctrl-C
+            raise
+    return done
+
+
+def render_repo_map(tree_order: List[str], summaries: Dict[str, str], max_chars: int) -> str:
+    """
+    REPO MAP block: `path: summary` lines in `tree_order`, cut at `max_chars`.
+    """
+    lines = ["REPO MAP (one-line file summaries; relevant first):"]
+    size = len(lines[0])
+    shown = 0
+    for rel in tree_order:
+        s = summaries.get(rel)
+        if not s:
+            continue
+        line = f"- {rel}: {' '.join(s.split())}"
+        if size + len(line) + 1 > max_chars:
+            break
+        lines.append(line)
+        size += len(line) + 1
+        shown += 1
+    rest = len(tree_order) - shown
+    if rest > 0:
+        lines.append(f"(+{rest} more files not summarized here)")
+    return "\n".join(lines)
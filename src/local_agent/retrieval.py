@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+RRF_K = 60  # the usual reciprocal-rank-fusion constant: damps the weight of top ranks
+GRACE_FACTOR = 10  # with nothing found at the deadline, wait up to this many deadlines more
+
+# A strategy appends (rel, score) as it finds them and should return soon after
+# `stop` is set. Higher score = better; ties keep the order they were found in.
+Strategy = Callable[[List[Tuple[str, float]], threading.Event], None]
+
+
+@dataclass
+class Retrieval:
+    ranked: List[str]
+    finished: List[str] = field(default_factory=list)  # strategies that completed
+    cut: List[str] = field(default_factory=list)  # strategies stopped at the deadline (partial results)
+    elapsed_s: float = 0.0
+
+
+def rank(found: List[Tuple[str, float]], tiebreak: Optional[Dict[str, float]] = None) -> List[str]:
+    """
+    Best score first; equal scores by `tiebreak` (higher first), then in
+    the order they were found.
+    """
+    best: Dict[str, float] = {}
+    for rel, score in found:
+        if rel not in best or score > best[rel]:
+            best[rel] = score
+    order = {rel: i for i, rel in enumerate(best)}
+    tb = tiebreak or {}
+    return sorted(best, key=lambda rel: (-best[rel], -tb.get(rel, 0.0), order[rel]))
+
+
+def rrf(rankings: Dict[str, List[str]], weights: Optional[Dict[str, float]] = None, k: int = RRF_K) -> Dict[str, float]:
+    """
+    Reciprocal rank fusion: sum over rankings of weight / (k + rank).
+    Files found by several strategies rise; no score calibration is needed.
+    """
+    scores: Dict[str, float] = {}
+    for name, ranked in rankings.items():
+        w = (weights or {}).get(name, 1.0)
+        for i, rel in enumerate(ranked):
+            scores[rel] = scores.get(rel, 0.0) + w / (k + i + 1)
+    return scores
+
+
+def _run(
+    fn: Strategy, out: List[Tuple[str, float]], stop: threading.Event, done: threading.Event, wake: threading.Event
+) -> None:
+    try:
+        fn(out, stop)
+    except Exception:
+        pass  # a failing strategy just contributes what it found
+    finally:
+        done.set()
+        wake.set()
+
+
+def retrieve(
+    strategies: Dict[str, Strategy],
+    deadline_s: float,
+    weights: Optional[Dict[str, float]] = None,
+    tiebreak: Optional[Dict[str, float]] = None,
+) -> Retrieval:
+    """
+    Runs all strategies at once (daemon threads, so a stuck filesystem call
+    can not hold up the process) and fuses whatever they have found when the
+    last one finishes or `deadline_s` passes, whichever is first.
+    Strategies still running are told to stop and their partial results are
+    used. If nothing at all was found by the deadline, waits a little longer
+    for the first result. `deadline_s` <= 0 waits for every strategy.
+    `tiebreak` orders equally scored files within each strategy.
+    """
+    t0 = time.perf_counter()
+    stop, wake = threading.Event(), threading.Event()
+    outs: Dict[str, List[Tuple[str, float]]] = {name: [] for name in strategies}
+    dones: Dict[str, threading.Event] = {name: threading.Event() for name in strategies}
+    for name, fn in strategies.items():
+        threading.Thread(target=_run, args=(fn, outs[name], stop, dones[name], wake), daemon=True).start()
+
+    def all_done() -> bool:
+        return all(d.is_set() for d in dones.values())
+
+    deadline = t0 + deadline_s if deadline_s > 0 else None
+    hard = t0 + deadline_s * (1 + GRACE_FACTOR) if deadline_s > 0 else None
+    while not all_done():
+        now = time.perf_counter()
+        if deadline is None:
+            timeout = None
+        elif now < deadline:
+            timeout = deadline - now
+        elif any(outs.values()) or now >= hard:
+            break
+        else:
+            timeout = 0.01  # grace period: poll for a first result
+        wake.wait(timeout)
+        wake.clear()
+    stop.set()
+
+    snapshot = {name: rank(list(out), tiebreak) for name, out in outs.items()}
+    scores = rrf(snapshot, weights)
+    order = {rel: i for i, rel in enumerate(scores)}
+    return Retrieval(
+        ranked=sorted(scores, key=lambda rel: (-scores[rel], order[rel])),
+        finished=[n for n, d in dones.items() if d.is_set()],
+        cut=[n for n, d in dones.items() if not d.is_set()],
+        elapsed_s=time.perf_counter() - t0,
+    )
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+from .utils import state_dir
+
+# Wording that asks the model to reason or produce code: always the heavy model.
+_HEAVY_RE = re.compile(
+    r"\b(why|explain|design|architect\w*|refactor\w*|implement\w*|write|rewrite|fix\w*|debug\w*|"
+    r"optimi[sz]\w*|review\w*|bug|compare|trade-?offs?|migrat\w*|improve\w*|plan)\b",
+    re.IGNORECASE,
+)
+# Lookups the fast model answers well from the retrieved context.
+_LOOKUP_RE = re.compile(
+    r"\b(where\s+is|where\s+are|where\s+do|which\s+files?|what\s+files?|defined|defines|"
+    r"list|locate|find|what\s+does\s+\S+\s+return|what\s+is\s+the\s+(name|path|type|default))\b",
+    re.IGNORECASE,
+)
+
+TIERS = ("fast", "heavy")
+
+
+@dataclass(frozen=True)
+class Route:
+    model: str
+    tier: str  # "fast" | "heavy"
+    reason: str
+
+
+def route_query(question: str, context_chars: int, cfg, override: Optional[str] = None) -> Route:
+    """
+    Picks the fast or heavy model for a question using local heuristics only:
+    reasoning/code-writing wording, lookup intent, question length and the
+    size of the context that will be sent. `override` ("fast" / "heavy")
+    wins; without a configured fast_model everything goes to cfg.model.
+    """
+    if not cfg.fast_model:
+        return Route(cfg.model, "heavy", "no fast_model configured")
+    if override in TIERS:
+        model = cfg.fast_model if override == "fast" else cfg.model
+        return Route(model, override, "user override")
+
+    if context_chars > cfg.route_max_context_chars:
+        return Route(cfg.model, "heavy", f"large context ({context_chars} chars)")
+    m = _HEAVY_RE.search(question)
+    if m:
+        return Route(cfg.model, "heavy", f"reasoning request ({m.group(0).lower()!r})")
+    if _LOOKUP_RE.search(question):
+        return Route(cfg.fast_model, "fast", "lookup")
+    if len(question) <= cfg.route_max_question_chars:
+        return Route(cfg.fast_model, "fast", "short question")
+    return Route(cfg.model, "heavy", "long question")
+
+
+def log_route(
+    root: Path,
+    command: str,
+    route: Route,
+    question_chars: int,
+    context_chars: int,
+    latency_s: float,
+    ok: bool,
+) -> None:
+    """
+    Appends one decision to .local-agent/routing/decisions.jsonl, for tuning
+    the thresholds. Logging failures are ignored.
+    """
+    rec = {
+        "ts": time.time(),
+        "command": command,
+        **asdict(route),
+        "question_chars": question_chars,
+        "context_chars": context_chars,
+        "latency_s": round(latency_s, 3),
+        "ok": ok,
+    }
+    try:
+        with (state_dir(root, "routing") / "decisions.jsonl").open("a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+    except OSError:
+        pass
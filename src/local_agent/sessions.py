@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .utils import state_dir
+
+
+@dataclass
+class ChatSession:
+    """
+    Append-only chat transcript at <repo>/.local-agent/sessions/<id>.jsonl.
+
+    Each completed turn is one JSON line holding the user message as sent,
+    the assistant reply, the hashes of the files included in the message and
+    of the repo tree the model last saw, so a resumed chat knows what the
+    model has already seen.
+    """
+
+    path: Path
+    id: str
+    history: List[Dict[str, str]] = field(default_factory=list)
+    sent_files: Dict[str, str] = field(default_factory=dict)  # rel path -> content hash
+    sent_tree: str = ""  # hash of the last tree rendering sent
+    model: Optional[str] = None
+
+    @staticmethod
+    def sessions_dir(repo_root: Path) -> Path:
+        return state_dir(repo_root, "sessions")
+
+    @classmethod
+    def create(cls, repo_root: Path, model: str) -> "ChatSession":
+        sid = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        # Nothing is written until the first turn completes.
+        return cls(path=cls.sessions_dir(repo_root) / f"{sid}.jsonl", id=sid, model=model)
+
+    @classmethod
+    def load(cls, repo_root: Path, session_id: Optional[str] = None) -> Optional["ChatSession"]:
+        """
+        Loads a session by id, or the most recently used one if id is None.
+        """
+        d = cls.sessions_dir(repo_root)
+        if session_id:
+            path = d / f"{session_id.removesuffix('.jsonl')}.jsonl"
+            if not path.exists():
+                return None
+        else:
+            found = sorted(d.glob("*.jsonl"), key=lambda p: p.stat().st_mtime)
+            if not found:
+                return None
+            path = found[-1]
+
+        s = cls(path=path, id=path.stem)
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crashed process
+                kind = rec.get("type")
+                if kind == "meta":
+                    s.model = rec.get("model") or s.model
+                elif kind == "model":
+                    s.model = rec.get("model") or s.model
+                elif kind == "turn":
+                    s.history.append({"role": "user", "content": rec.get("user", "")})
+                    s.history.append({"role": "assistant", "content": rec.get("assistant", "")})
+                    s.sent_files.update(rec.get("files") or {})
+                    s.sent_tree = rec.get("tree") or s.sent_tree
+        return s
+
+    def _append(self, rec: dict) -> None:
+        lines = []
+        if not self.path.exists():
+            lines.append({"type": "meta", "id": self.id, "created": time.time(), "model": self.model})
+        lines.append(rec)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in lines))
+
+    def record_turn(self, user: str, assistant: str, files: Dict[str, str], tree: str = "") -> None:
+        self.history.append({"role": "user", "content": user})
+        self.history.append({"role": "assistant", "content": assistant})
+        self.sent_files.update(files)
+        self.sent_tree = tree or self.sent_tree
+        rec = {"type": "turn", "ts": time.time(), "user": user, "assistant": assistant, "files": files}
+        if tree:
+            rec["tree"] = tree
+        self._append(rec)
+
+    def record_model(self, model: str) -> None:
+        self.model = model
+        self._append({"type": "model", "ts": time.time(), "model": model})
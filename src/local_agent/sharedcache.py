@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,     -- what was derived, with a format version: "symbols/1.py", "summary/1"
+    hash TEXT NOT NULL,     -- content hash of the source file (utils.file_digest)
+    value TEXT NOT NULL,    -- JSON
+    size INTEGER NOT NULL,
+    used REAL NOT NULL,     -- last access, coarse (see TOUCH_INTERVAL_S)
+    PRIMARY KEY (kind, hash)
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries(used);
+"""
+
+TOUCH_INTERVAL_S = 3600.0  # reads refresh `used` at most this often: keeps reads mostly write-free
+EVICT_EVERY = 500  # writes between size checks
+EVICT_TO = 0.9  # eviction frees space down to this share of max_bytes
+BUSY_TIMEOUT_MS = 30_000
+
+
+def default_cache_dir() -> Path:
+    return Path.home() / ".local-agent" / "cache"
+
+
+class SharedCache:
+    """
+    User-level, content-addressed store of per-file derived data (symbols,
+    summaries, ...) in ~/.local-agent/cache/derived.sqlite, shared by every
+    clone and worktree: a file only has to be processed once per content,
+    wherever it lives. Per-repo indexes keep their own rows and only consult
+    this store for content they have not seen.
+
+    Several processes may use it at once (SQLite WAL + busy timeout).
+    Least recently used entries are evicted past `max_bytes`.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.path = path or (default_cache_dir() / "derived.sqlite")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_MS / 1000)
+        self.db.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._writes = 0
+
+    def close(self) -> None:
+        self.db.close()
+
+    def get(self, kind: str, digest: str) -> Optional[Any]:
+        row = self.db.execute("SELECT value, used FROM entries WHERE kind = ? AND hash = ?", (kind, digest)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL_S:
+            with self.db:
+                self.db.execute("UPDATE entries SET used = ? WHERE kind = ? AND hash = ?", (now, kind, digest))
+        return json.loads(row[0])
+
+    def put(self, kind: str, digest: str, value: Any) -> None:
+        self.put_many([(kind, digest, value)])
+
+    def put_many(self, items: Iterable[Tuple[str, str, Any]]) -> None:
+        """
+        Stores several entries in one transaction.
+        """
+        now = time.time()
+        rows = []
+        for kind, digest, value in items:
+            data = json.dumps(value, separators=(",", ":"))
+            rows.append((kind, digest, data, len(data), now))
+        if not rows:
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO entries (kind, hash, value, size, used) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        self._writes += len(rows)
+        if self._writes >= EVICT_EVERY:
+            self._writes = 0
+            self.evict()
+
+    def size(self) -> int:
+        return int(self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0])
+
+    def evict(self) -> int:
+        """
+        Drops least recently used entries until the store is below
+        EVICT_TO * max_bytes. Returns the number of entries removed.
+        """
+        total = self.size()
+        if total <= self.max_bytes:
+            return 0
+        target = total - int(self.max_bytes * EVICT_TO)
+        victims = []
+        freed = 0
+        for kind, digest, size in self.db.execute("SELECT kind, hash, size FROM entries ORDER BY used"):
+            victims.append((kind, digest))
+            freed += size
+            if freed >= target:
+                break
+        with self.db:
+            self.db.executemany("DELETE FROM entries WHERE kind = ? AND hash = ?", victims)
+        return len(victims)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import ast
+import re
+from pathlib import PurePosixPath
+from typing import List, Optional, Set
+
+BRACE_EXTS = {
+    ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".go", ".rs", ".c", ".h", ".cpp", ".hpp",
+    ".cc", ".cs", ".php", ".swift", ".scala",
+}
+INDENT_EXTS = {".rb", ".sh", ".zsh"}
+
+# Blocks whose members stay visible: a class body keeps its method signatures.
+_CONTAINER_RE = re.compile(
+    r"\b(class|interface|struct|impl|trait|enum|namespace|object|module|extension|protocol|record)\b"
+)
+# String literals and line comments, removed before counting braces.
+_NOISE_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|//.*$')
+
+MAX_SKELETON_LINES = 200
+SKELETON_MAX_CHARS = 1_000_000  # larger files are read snipped, like any other file
+MIN_SAVING = 0.3  # a skeleton must drop at least this share of lines to be worth sending
+
+
+def _python_lines(text: str) -> Optional[Set[int]]:
+    """
+    1-based line numbers to keep: imports, module-level assignments, class and
+    def signatures (with decorators) and the first line of their docstrings.
+    Function bodies are dropped, including nested functions.
+    """
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    lines = text.splitlines()
+    keep: Set[int] = set()
+
+    def docstring(body: list) -> None:
+        if body and isinstance(body[0], ast.Expr) and isinstance(getattr(body[0], "value", None), ast.Constant):
+            if isinstance(body[0].value.value, str):
+                ln = body[0].lineno
+                keep.add(ln)
+                # `"""` alone on its line: the summary is on the next one
+                if lines[ln - 1].strip().lstrip("rbuRBU") in ('"""', "'''") and ln < len(lines):
+                    keep.add(ln + 1)
+
+    def visit(body: list) -> None:
+        for node in body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                keep.update(range(node.lineno, (node.end_lineno or node.lineno) + 1))
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                keep.add(node.lineno)  # big literals only show their first line
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+                end = max(node.lineno, node.body[0].lineno - 1)
+                keep.update(range(start, end + 1))
+                docstring(node.body)
+                if isinstance(node, ast.ClassDef):
+                    visit(node.body)
+            elif isinstance(node, (ast.If, ast.Try)):
+                # `if TYPE_CHECKING:` / `try: import x`: keep what they define
+                keep.add(node.lineno)
+                visit(node.body)
+
+    docstring(tree.body)
+    visit(tree.body)
+    return {ln for ln in keep if ln <= len(lines)}
+
+
+def _brace_lines(text: str) -> Set[int]:
+    """
+    Lines outside function bodies: everything at top level plus the members
+    of class-like blocks. A block is skipped if it was opened by a line that
+    does not look like a container declaration.
+    """
+    keep: Set[int] = set()
+    stack: List[bool] = []  # per open brace: True = container (members visible)
+    in_comment = False
+    for ln, raw in enumerate(text.splitlines(), start=1):
+        line = raw.strip()
+        visible = all(stack)
+        if in_comment:
+            in_comment = "*/" not in line
+            continue
+        if line.startswith("/*"):
+            in_comment = "*/" not in line
+            if visible and line.startswith("/**"):
+                keep.add(ln)
+            continue
+        code = _NOISE_RE.sub("", line)
+        if visible and line:
+            keep.add(ln)
+        container = bool(_CONTAINER_RE.search(code))
+        for ch in code:
+            if ch == "{":
+                stack.append(container and all(stack))
+            elif ch == "}" and stack:
+                stack.pop()
+        if not visible and all(stack) and line.startswith("}"):
+            keep.add(ln)  # the brace closing a skipped body
+    return keep
+
+
+def _indent_lines(text: str) -> Set[int]:
+    """
+    Top-level lines and one indentation level below them.
+    """
+    lines = text.splitlines()
+    widths = [len(s.expandtabs(4)) - len(s.expandtabs(4).lstrip()) for s in lines]
+    unit = min((w for s, w in zip(lines, widths) if s.strip() and w > 0), default=0)
+    return {i + 1 for i, (s, w) in enumerate(zip(lines, widths)) if s.strip() and w <= unit}
+
+
+def skeleton_lines(rel: str, text: str) -> Optional[Set[int]]:
+    """
+    Line numbers forming `rel`'s skeleton, or None if there is no skeleton
+    renderer for its language.
+    """
+    ext = PurePosixPath(rel).suffix.lower()
+    if ext == ".py":
+        keep = _python_lines(text)
+        return keep if keep is not None else _indent_lines(text)
+    if ext in BRACE_EXTS:
+        return _brace_lines(text)
+    if ext in INDENT_EXTS:
+        return _indent_lines(text)
+    return None
+
+
+def render_skeleton(rel: str, text: str, max_lines: int = MAX_SKELETON_LINES) -> Optional[str]:
+    """
+    `  12 | line` rows of the skeleton with original line numbers; each run
+    of omitted lines becomes one `...` row indented under the line above it.
+    None if `rel` has no skeleton renderer or the skeleton would not save
+    MIN_SAVING of the lines (the file is then better sent in full).
+    """
+    keep = skeleton_lines(rel, text)
+    lines = text.splitlines()
+    if not keep or len(keep) > (1 - MIN_SAVING) * len(lines):
+        return None
+    out: List[str] = []
+    prev = 0
+    for ln in sorted(keep)[:max_lines]:
+        if any(s.strip() for s in lines[prev : ln - 1]):  # blank-only gaps are not marked
+            above = lines[prev - 1] if prev else ""
+            indent = above[: len(above) - len(above.lstrip())]
+            if above.rstrip().endswith((":", "{", "(")):
+                indent += "    "
+            out.append(f"     | {indent}...")
+        out.append(f"{ln:>4} | {lines[ln - 1]}")
+        prev = ln
+    if any(s.strip() for s in lines[prev:]):
+        out.append("     | ...")
+    return "\n".join(out)
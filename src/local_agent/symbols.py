@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import ast
+import re
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .sharedcache import SharedCache
+from .utils import CODE_EXTS, STOPWORDS, file_digest, state_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS defs (
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS defs_name ON defs(name);
+CREATE INDEX IF NOT EXISTS defs_path ON defs(path);
+CREATE INDEX IF NOT EXISTS refs_name ON refs(name);
+CREATE INDEX IF NOT EXISTS refs_path ON refs(path);
+"""
+
+# Extensions with symbols worth indexing (data/config formats are skipped).
+SYMBOL_EXTS = CODE_EXTS - {".yaml", ".yml", ".toml", ".json", ".md"}
+
+MAX_INDEX_BYTES = 1_000_000
+SHARED_FORMAT = 1  # bump when extraction output changes: entries in the shared cache are keyed by it
+
+
+@dataclass(frozen=True)
+class Symbol:
+    name: str
+    kind: str  # "function" | "class" | "method" | "type" | "variable" | ...
+    path: str
+    line: int
+    end_line: int
+
+
+Defs = List[Tuple[str, str, int, int]]  # (name, kind, line, end_line)
+Refs = List[Tuple[str, int]]  # (name, line)
+
+
+# ---------------------------------------------------------------------------
+# Extractors
+# ---------------------------------------------------------------------------
+
+def extract_python(text: str) -> Tuple[Defs, Refs]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return [], []
+
+    defs: Defs = []
+    refs: Refs = []
+
+    def visit_body(body: Sequence[ast.stmt], in_class: bool) -> None:
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if in_class else "function"
+                defs.append((node.name, kind, node.lineno, node.end_lineno or node.lineno))
+                visit_body(node.body, in_class=False)
+            elif isinstance(node, ast.ClassDef):
+                defs.append((node.name, "class", node.lineno, node.end_lineno or node.lineno))
+                visit_body(node.body, in_class=True)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and not in_class:
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for t in targets:
+                    if isinstance(t, ast.Name):
+                        defs.append((t.id, "variable", node.lineno, node.end_lineno or node.lineno))
+
+    visit_body(tree.body, in_class=False)
+
+    seen: set[Tuple[str, int]] = set()
+    for node in ast.walk(tree):
+        name: Optional[str] = None
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            name = node.id
+        elif isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Load):
+            name = node.attr
+        elif isinstance(node, ast.alias):
+            name = node.name.rsplit(".", 1)[-1]
+        if name and len(name) > 2 and (name, getattr(node, "lineno", 0)) not in seen:
+            seen.add((name, getattr(node, "lineno", 0)))
+            refs.append((name, getattr(node, "lineno", 0)))
+    return defs, refs
+
+
+_C_LIKE_KEYWORDS = {
+    "if", "for", "while", "switch", "catch", "return", "sizeof", "else", "do", "new",
+    "function", "typeof", "await", "elif", "when", "match", "try", "with", "defer", "go",
+}
+
+
+def _patterns(*pairs: Tuple[str, str], flags: int = re.MULTILINE) -> List[Tuple[str, re.Pattern]]:
+    return [(kind, re.compile(rx, flags)) for kind, rx in pairs]
+
+
+_JS = _patterns(
+    ("function", r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)"),
+    ("class", r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)"),
+    ("function", r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|[A-Za-z_$][\w$]*\s*=>)"),
+    ("type", r"^\s*(?:export\s+)?(?:interface|type|enum)\s+([A-Za-z_$][\w$]*)"),
+    ("method", r"^[ \t]+(?:(?:public|private|protected|static|async|readonly|get|set)\s+)*([A-Za-z_$][\w$]*)\s*\([^)]*\)\s*(?::[^{]+)?\{"),
+)
+_GO = _patterns(
+    ("function", r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)"),
+    ("type", r"^type\s+([A-Za-z_]\w*)"),
+)
+_RUST = _patterns(
+    ("function", r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+([A-Za-z_]\w*)"),
+    ("type", r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|type|union|mod)\s+([A-Za-z_]\w*)"),
+)
+_JVM = _patterns(
+    ("class", r"^\s*(?:(?:public|private|protected|internal|static|final|abstract|sealed|data|open|partial)\s+)*(?:class|interface|enum|record|struct|object|trait|protocol)\s+([A-Za-z_]\w*)"),
+    ("function", r"^\s*(?:(?:public|private|protected|internal|static|final|override|open|suspend|inline)\s+)*(?:fun|func|def)\s+(?:<[^>]*>\s*)?([A-Za-z_]\w*)"),
+    ("method", r"^\s+(?:(?:public|private|protected|internal|static|final|abstract|synchronized|override|virtual|async)\s+)+[\w<>\[\],.? ]+\s+([A-Za-z_]\w*)\s*\("),
+)
+_C = _patterns(
+    ("function", r"^(?!\s)(?:[\w*&:<>,]+\s+)+\**&?([A-Za-z_][\w:~]*)\s*\([^;]*$"),
+    ("class", r"^\s*(?:typedef\s+)?(?:class|struct|enum|union|namespace)\s+([A-Za-z_]\w*)"),
+)
+_RUBY = _patterns(
+    ("function", r"^\s*def\s+(?:self\.)?([A-Za-z_]\w*[?!=]?)"),
+    ("class", r"^\s*(?:class|module)\s+([A-Z]\w*)"),
+)
+_PHP = _patterns(
+    ("function", r"^\s*(?:(?:public|private|protected|static|final|abstract)\s+)*function\s+&?([A-Za-z_]\w*)"),
+    ("class", r"^\s*(?:(?:final|abstract)\s+)?(?:class|interface|trait|enum)\s+([A-Za-z_]\w*)"),
+)
+_SHELL = _patterns(
+    ("function", r"^\s*(?:function\s+)?([A-Za-z_][\w:-]*)\s*\(\)\s*\{?"),
+    ("function", r"^\s*function\s+([A-Za-z_][\w:-]*)"),
+)
+_SQL = _patterns(
+    ("type", r"^\s*create\s+(?:or\s+replace\s+)?(?:temp(?:orary)?\s+)?(?:table|view|function|procedure|index|trigger|type)\s+(?:if\s+not\s+exists\s+)?([\w.\"]+)"),
+    flags=re.MULTILINE | re.IGNORECASE,
+)
+
+_DEF_PATTERNS: Dict[str, List[Tuple[str, re.Pattern]]] = {
+    ".js": _JS, ".jsx": _JS, ".ts": _JS, ".tsx": _JS,
+    ".go": _GO,
+    ".rs": _RUST,
+    ".java": _JVM, ".kt": _JVM, ".cs": _JVM, ".scala": _JVM, ".swift": _JVM,
+    ".c": _C, ".cpp": _C,
+    ".rb": _RUBY,
+    ".php": _PHP,
+    ".sh": _SHELL, ".zsh": _SHELL,
+    ".sql": _SQL,
+}
+
+_BRACE_EXTS = {".js", ".jsx", ".ts", ".tsx", ".go", ".rs", ".java", ".kt", ".cs", ".scala", ".swift", ".c", ".cpp", ".php", ".sh", ".zsh"}
+_CALL_RE = re.compile(r"\b([A-Za-z_$][\w$]*)\s*\(")
+_MAX_BLOCK_LINES = 400
+
+
+def _block_end(lines: List[str], start: int, ext: str) -> int:
+    """
+    Best-effort end line (1-based, inclusive) of a definition starting at
+    index `start`: brace matching for C-like languages, `end`/indentation
+    otherwise.
+    """
+    last = min(len(lines), start + _MAX_BLOCK_LINES)
+    if ext in _BRACE_EXTS:
+        depth = 0
+        opened = False
+        for i in range(start, last):
+            for ch in lines[i]:
+                if ch == "{":
+                    depth += 1
+                    opened = True
+                elif ch == "}":
+                    depth -= 1
+            if opened and depth <= 0:
+                return i + 1
+            if not opened and lines[i].rstrip().endswith(";"):
+                return i + 1
+        return last
+    if ext == ".sql":
+        for i in range(start, last):
+            if lines[i].rstrip().endswith(";"):
+                return i + 1
+        return last
+    indent = len(lines[start]) - len(lines[start].lstrip())
+    for i in range(start + 1, last):
+        s = lines[i]
+        if not s.strip():
+            continue
+        cur = len(s) - len(s.lstrip())
+        if cur <= indent:
+            return i + 1 if s.strip() == "end" else i
+    return last
+
+
+def extract_regex(text: str, ext: str) -> Tuple[Defs, Refs]:
+    patterns = _DEF_PATTERNS.get(ext)
+    if not patterns:
+        return [], []
+
+    lines = text.splitlines()
+    line_starts = [0]
+    for ln in lines:
+        line_starts.append(line_starts[-1] + len(ln) + 1)
+
+    def line_of(offset: int) -> int:
+        lo, hi = 0, len(line_starts) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if line_starts[mid] <= offset:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo  # 0-based
+
+    defs: Defs = []
+    def_lines: set[int] = set()
+    for kind, rx in patterns:
+        for m in rx.finditer(text):
+            name = m.group(1).strip('"')
+            if name in _C_LIKE_KEYWORDS:
+                continue
+            idx = line_of(m.start(1))
+            if idx in def_lines:
+                continue
+            def_lines.add(idx)
+            defs.append((name, kind, idx + 1, _block_end(lines, idx, ext)))
+
+    refs: Refs = []
+    for i, ln in enumerate(lines):
+        if i in def_lines:
+            continue
+        for m in _CALL_RE.finditer(ln):
+            name = m.group(1)
+            if len(name) > 2 and name not in _C_LIKE_KEYWORDS:
+                refs.append((name, i + 1))
+    return defs, refs
+
+
+def extract_symbols(rel_path: str, text: str) -> Tuple[Defs, Refs]:
+    ext = Path(rel_path).suffix.lower()
+    if ext == ".py":
+        return extract_python(text)
+    return extract_regex(text, ext)
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+class SymbolIndex:
+    """
+    Definitions and references of repo symbols, kept in SQLite at
+    <repo>/.local-agent/index/symbols.sqlite and refreshed incrementally:
+    files whose (mtime, size) are unchanged are skipped without reading them,
+    and files whose content hash is unchanged are not re-parsed.
+    """
+
+    def __init__(self, root: Path, db_path: Optional[Path] = None, shared: Optional[SharedCache] = None) -> None:
+        self.root = root
+        self.shared = shared  # extraction results by content hash, shared across clones
+        self.db_path = db_path or (state_dir(root, "index") / "symbols.sqlite")
+        self.db = sqlite3.connect(str(self.db_path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def update(self, rel_paths: Iterable[str], candidates: Optional[Set[str]] = None) -> int:
+        """
+        Bring the index in line with `rel_paths` (the current file list).
+        If `candidates` is given (e.g. from git), already-indexed files outside
+        it are assumed unchanged and not even stat'ed.
+        Returns the number of files (re)parsed.
+        """
+        known: Dict[str, Tuple[str, int, int]] = {
+            p: (h, m, s) for p, h, m, s in self.db.execute("SELECT path, hash, mtime_ns, size FROM files")
+        }
+        seen: set[str] = set()
+        parsed = 0
+        new_shared: List[Tuple[str, str, dict]] = []
+
+        with self.db:
+            for rel in rel_paths:
+                if Path(rel).suffix.lower() not in SYMBOL_EXTS:
+                    continue
+                seen.add(rel)
+                if candidates is not None and rel in known and rel not in candidates:
+                    continue
+                try:
+                    st = (self.root / rel).stat()
+                except OSError:
+                    continue
+                prev = known.get(rel)
+                if prev and prev[1] == st.st_mtime_ns and prev[2] == st.st_size:
+                    continue
+                if st.st_size > MAX_INDEX_BYTES:
+                    if prev:  # grew past the limit: drop what was indexed for it
+                        self._replace(rel, [], [])
+                        self.db.execute("DELETE FROM files WHERE path = ?", (rel,))
+                    continue
+                try:
+                    data = (self.root / rel).read_bytes()
+                except OSError:
+                    continue
+                digest = file_digest(data)
+                if prev and prev[0] == digest:
+                    self.db.execute(
+                        "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                        (st.st_mtime_ns, st.st_size, rel),
+                    )
+                    continue
+
+                kind = f"symbols/{SHARED_FORMAT}{Path(rel).suffix.lower()}"
+                cached = self.shared.get(kind, digest) if self.shared is not None else None
+                if cached is not None:
+                    defs = [tuple(d) for d in cached["defs"]]
+                    refs = [tuple(r) for r in cached["refs"]]
+                else:
+                    defs, refs = extract_symbols(rel, data.decode("utf-8", errors="replace"))
+                    new_shared.append((kind, digest, {"defs": defs, "refs": refs}))
+                    parsed += 1
+                self._replace(rel, defs, refs)
+                self.db.execute(
+                    "INSERT OR REPLACE INTO files (path, hash, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                    (rel, digest, st.st_mtime_ns, st.st_size),
+                )
+
+            for rel in set(known) - seen:
+                self._replace(rel, [], [])
+                self.db.execute("DELETE FROM files WHERE path = ?", (rel,))
+        if new_shared and self.shared is not None:
+            self.shared.put_many(new_shared)
+        return parsed
+
+    def _replace(self, rel: str, defs: Defs, refs: Refs) -> None:
+        self.db.execute("DELETE FROM defs WHERE path = ?", (rel,))
+        self.db.execute("DELETE FROM refs WHERE path = ?", (rel,))
+        self.db.executemany(
+            "INSERT INTO defs (name, kind, path, line, end_line) VALUES (?, ?, ?, ?, ?)",
+            [(n, k, rel, a, b) for n, k, a, b in defs],
+        )
+        self.db.executemany(
+            "INSERT INTO refs (name, path, line) VALUES (?, ?, ?)",
+            [(n, rel, ln) for n, ln in refs],
+        )
+
+    def definitions(self, name: str) -> List[Symbol]:
+        rows = self.db.execute(
+            "SELECT name, kind, path, line, end_line FROM defs WHERE name = ? ORDER BY path, line",
+            (name,),
+        )
+        return [Symbol(*r) for r in rows]
+
+    def files_defining(self, terms: Sequence[str], limit: int = 50) -> List[Tuple[str, int]]:
+        """
+        Files defining symbols whose names contain any of `terms`
+        (case-insensitive), most such definitions first.
+        """
+        if not terms:
+            return []
+        where = " OR ".join("name LIKE ?" for _ in terms)
+        rows = self.db.execute(
+            f"SELECT path, COUNT(*) AS n FROM defs WHERE {where} GROUP BY path ORDER BY n DESC, path LIMIT ?",
+            [f"%{t}%" for t in terms] + [limit],
+        )
+        return [(p, int(n)) for p, n in rows]
+
+    def callers(self, name: str, limit: int = 5) -> List[Tuple[str, int]]:
+        """
+        Files referencing `name` (excluding its definition lines), most references first.
+        """
+        rows = self.db.execute(
+            """
+            SELECT r.path, COUNT(*) AS n FROM refs r
+            WHERE r.name = ? AND NOT EXISTS (
+                SELECT 1 FROM defs d WHERE d.name = r.name AND d.path = r.path AND d.line = r.line
+            )
+            GROUP BY r.path ORDER BY n DESC, r.path LIMIT ?
+            """,
+            (name, limit),
+        )
+        return [(p, int(n)) for p, n in rows]
+
+
+_BACKTICK_RE = re.compile(r"`([^`\s]+)`")
+_IDENT_RE = re.compile(r"[A-Za-z_$][\w$]*")
+
+
+def question_identifiers(question: str) -> List[str]:
+    """
+    Identifier candidates in a question, most explicit first: `backticked`
+    names, then snake_case / camelCase / call-like tokens, then other words.
+    """
+    out: list[str] = []
+    for m in _BACKTICK_RE.finditer(question):
+        for part in re.split(r"[.:/()]+", m.group(1)):
+            if _IDENT_RE.fullmatch(part):
+                out.append(part)
+    words = _IDENT_RE.findall(question)
+    out += [w for w in words if "_" in w or re.search(r"[a-z][A-Z]", w) or f"{w}(" in question]
+    out += [w for w in words if len(w) > 3 and w.lower() not in STOPWORDS]
+
+    seen: set[str] = set()
+    return [w for w in out if not (w in seen or seen.add(w))]
+
+
+@dataclass(frozen=True)
+class SymbolHit:
+    symbol: Symbol
+    callers: List[Tuple[str, int]]
+
+
+def lookup_question(index: SymbolIndex, question: str, max_hits: int = 5, max_callers: int = 5) -> List[SymbolHit]:
+    hits: list[SymbolHit] = []
+    for name in question_identifiers(question):
+        for sym in index.definitions(name):
+            hits.append(SymbolHit(symbol=sym, callers=index.callers(name, limit=max_callers)))
+            if len(hits) >= max_hits:
+                return hits
+    return hits
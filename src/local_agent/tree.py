@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import Dict, Iterable, List, Sequence
+
+# Files listed before the tree is rendered; the rendered tree itself is
+# bounded by a line budget and summarizes what does not fit.
+TREE_SCAN_LIMIT = 20_000
+
+
+@dataclass
+class _Node:
+    name: str
+    dirs: Dict[str, "_Node"] = field(default_factory=dict)
+    files: List[str] = field(default_factory=list)
+    total: int = 0  # files in this subtree
+    score: float = 0.0  # best relevance in this subtree
+
+
+def _build(paths: Iterable[str], score_of) -> _Node:
+    root = _Node("")
+    for rel in paths:
+        parts = rel.split("/")
+        s = score_of(rel)
+        node = root
+        node.total += 1
+        node.score = max(node.score, s)
+        for part in parts[:-1]:
+            node = node.dirs.setdefault(part, _Node(part))
+            node.total += 1
+            node.score = max(node.score, s)
+        node.files.append(parts[-1])
+    return root
+
+
+def _ext_mix(node: _Node, top: int = 3) -> str:
+    exts: Counter[str] = Counter()
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        exts.update(PurePosixPath(f).suffix or PurePosixPath(f).name for f in n.files)
+        stack.extend(n.dirs.values())
+    mix = ", ".join(f"{c} {e}" for e, c in exts.most_common(top))
+    if len(exts) > top:
+        mix += ", ..."
+    return mix
+
+
+def render_tree(
+    paths: Sequence[str],
+    relevant: Iterable[str] = (),
+    terms: Iterable[str] = (),
+    max_lines: int = 250,
+    expand_limit: int = 12,
+) -> str:
+    """
+    Compact, relevance-ordered rendering of a file list.
+
+    - Paths are folded into an indented trie; single-child directory chains
+      are collapsed into one line (`src/pkg/`).
+    - Entries are ordered by relevance: files in `relevant` (marked `*`)
+      and names containing one of `terms` come first.
+    - If the repo has more files than `max_lines`, directories with more
+      than `expand_limit` files and nothing relevant inside are summarized
+      as `dir/ (N files: a .py, b .md)`; long file lists end with
+      `... +N more`.
+    - At most `max_lines` lines; every directory keeps room for a line per
+      later sibling, so less relevant parts shrink to summaries instead of
+      disappearing.
+    """
+    relevant_set = set(relevant)
+    terms = [t.lower() for t in terms if t]
+
+    def score_of(rel: str) -> float:
+        s = 3.0 if rel in relevant_set else 0.0
+        low = rel.lower()
+        return s + sum(1.0 for t in terms if t in low)
+
+    root = _build(paths, score_of)
+    if root.total <= max_lines:
+        expand_limit = root.total  # everything fits: list it all, just compactly
+    def walk(node: _Node, prefix: str, depth: int, budget: int) -> List[str]:
+        pad = "  " * depth
+        entries: List[tuple[float, int, str, object]] = []
+        for name, child in node.dirs.items():
+            entries.append((child.score, 0, name, child))
+        files = sorted(((score_of(prefix + n), n) for n in node.files), key=lambda e: (-e[0], e[1]))
+        hidden = [n for i, (sc, n) in enumerate(files) if sc <= 0 and i >= expand_limit]
+        hidden_set = set(hidden)
+        for sc, n in files:
+            if n not in hidden_set:
+                entries.append((sc, 1, n, None))
+        entries.sort(key=lambda e: (-e[0], e[1], e[2]))
+        if hidden:
+            mix = Counter(PurePosixPath(h).suffix or h for h in hidden).most_common(3)
+            entries.append((-1.0, 1, f"... +{len(hidden)} more ({', '.join(f'{c} {e}' for e, c in mix)})", None))
+
+        out: List[str] = []
+        for i, (score, is_file, name, child) in enumerate(entries):
+            left = budget - len(out)
+            after = len(entries) - i - 1
+            if after and left <= 1:
+                out.append(f"{pad}... +{after + 1} more entries")
+                break
+            if left <= 0:
+                break
+            if is_file:
+                out.append(f"{pad}{name}{' *' if prefix + name in relevant_set else ''}")
+                continue
+            assert isinstance(child, _Node)
+            label, sub = name, child
+            while not sub.files and len(sub.dirs) == 1:
+                (next_name, next_child), = sub.dirs.items()
+                label, sub = f"{label}/{next_name}", next_child
+            # keep one line for each later sibling (up to half the budget left)
+            avail = left - min(after, left // 2)
+            if (sub.score <= 0 and sub.total > expand_limit) or avail < 2:
+                out.append(f"{pad}{label}/ ({sub.total} files: {_ext_mix(sub)})")
+                continue
+            out.append(f"{pad}{label}/")
+            out += walk(sub, f"{prefix}{label}/", depth + 1, avail - 1)
+        return out
+
+    lines = walk(root, "", 0, max_lines)
+    header = f"REPO FILE TREE ({root.total} files; relevant first, * = included below):"
+    return "\n".join([header] + lines)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import re
 from pathlib import Path
 from typing import Iterable
 
@@ -21,6 +23,12 @@ DEFAULT_EXCLUDES = {
 }
 
 
+# Per-repo state written by local-agent itself lives under .local-agent/<subdir>.
+# These subdirs are never part of the repo tree or search results.
+STATE_DIR = ".local-agent"
+STATE_SUBDIRS = {"index", "sessions", "profiles", "routing", "bench", "eval"}
+
+
 CODE_EXTS = {
     ".py", ".js", ".ts", ".tsx", ".jsx", ".java", ".kt", ".go", ".rs", ".cpp", ".c",
     ".cs", ".rb", ".php", ".swift", ".scala", ".sql", ".sh", ".zsh", ".yaml", ".yml",
@@ -28,6 +36,21 @@ CODE_EXTS = {
 }
 
 
+STOPWORDS = {
+    "the", "and", "or", "to", "of", "in", "on", "for", "with", "a", "an",
+    "is", "are", "was", "were", "be", "does", "do", "did", "what", "where",
+    "which", "how", "why", "show", "quote", "relevant", "lines", "exact",
+}
+
+
+def query_terms(query: str, limit: int = 6) -> list[str]:
+    """
+    Lowercased identifier-like tokens of a question, minus stopwords.
+    """
+    tokens = re.findall(r"[a-zA-Z_][a-zA-Z0-9_]{2,}", query.lower())
+    return [t for t in tokens if t not in STOPWORDS][:limit]
+
+
 def find_repo_root(start: Path | None = None) -> Path:
     start = start or Path.cwd()
     cur = start.resolve()
@@ -44,6 +67,24 @@ def is_probably_code_file(path: Path) -> bool:
     return path.suffix.lower() in CODE_EXTS
 
 
+def is_state_path(parts: tuple[str, ...]) -> bool:
+    """
+    True if repo-relative path parts point inside local-agent's own state dirs.
+    """
+    return len(parts) > 1 and parts[0] == STATE_DIR and parts[1] in STATE_SUBDIRS
+
+
+def state_dir(root: Path, name: str) -> Path:
+    """
+    Returns <root>/.local-agent/<name>, creating it (git-ignored) if needed.
+    """
+    d = root / STATE_DIR / name
+    if not d.exists():
+        d.mkdir(parents=True, exist_ok=True)
+        (d / ".gitignore").write_text("*\n", encoding="utf-8")
+    return d
+
+
 def iter_files(root: Path, excludes: set[str] | None = None) -> Iterable[Path]:
     excludes = excludes or set()
     for p in root.rglob("*"):
@@ -52,9 +93,21 @@ def iter_files(root: Path, excludes: set[str] | None = None) -> Iterable[Path]:
         parts = set(p.parts)
         if parts.intersection(DEFAULT_EXCLUDES | excludes):
             continue
+        if is_state_path(p.relative_to(root).parts):
+            continue
         yield p
 
 
+def file_digest(data: bytes) -> str:
+    """
+    Content hash used by the on-disk indexes.
+    """
+    return hashlib.sha1(data).hexdigest()
+
+
+SNIP_MARKER = "\n\n...<snip>...\n\n"  # between the head and tail of text cut to a size
+
+
 def read_text_limited(path: Path, max_chars: int) -> str:
     try:
         data = path.read_text(encoding="utf-8", errors="replace")
@@ -64,7 +117,7 @@ def read_text_limited(path: Path, max_chars: int) -> str:
         return data
     head = data[: max_chars // 2]
     tail = data[-max_chars // 2 :]
-    return head + "\n\n...<snip>...\n\n" + tail
+    return head + SNIP_MARKER + tail
 
 
 def atomic_write(path: Path, content: str) -> None:
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import tomllib  # py3.11+
+except Exception:  # pragma: no cover
+    import tomli as tomllib  # type: ignore
+
+# Files that make a directory a package of its own inside a monorepo.
+WORKSPACE_MANIFESTS = ("pyproject.toml", "package.json", "go.mod", "Cargo.toml")
+
+MAX_SCOPE_DIRS = 50  # dependency closure cap: past this, scoping buys little
+
+_REQ_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+_GO_REQUIRE_RE = re.compile(r"^\s*(?:require\s+)?([\w.\-/~]+)\s+v[\w.\-+]+", re.MULTILINE)
+_GO_REPLACE_RE = re.compile(r"^\s*(?:replace\s+)?([\w.\-/~]+)(?:\s+v\S+)?\s+=>\s+(\.{1,2}/\S*|/\S+)", re.MULTILINE)
+
+
+@dataclass
+class Workspace:
+    path: str  # repo-relative directory ("" = repo root)
+    manifest: str
+    name: Optional[str] = None
+    deps: List[str] = field(default_factory=list)  # declared dependency names (normalized)
+    dep_paths: List[str] = field(default_factory=list)  # repo-relative dirs of path dependencies
+
+
+def _norm(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name.strip().lower())
+
+
+def _load_toml(p: Path) -> dict:
+    try:
+        return tomllib.loads(p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _table(data: dict, key: str) -> dict:
+    """
+    data[key] if it is a table/object; anything else (a malformed manifest) is empty.
+    """
+    value = data.get(key)
+    return value if isinstance(value, dict) else {}
+
+
+def _parse(p: Path) -> Tuple[Optional[str], List[str], List[str]]:
+    """
+    (package name, dependency names, path-dependency dirs relative to the
+    manifest's directory) from one manifest. Unreadable files give nothing.
+    """
+    names: List[str] = []
+    paths: List[str] = []
+    if p.name == "package.json":
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None, [], []
+        if not isinstance(data, dict):
+            return None, [], []
+        for key in ("dependencies", "devDependencies", "peerDependencies", "optionalDependencies"):
+            for dep, spec in _table(data, key).items():
+                names.append(dep)
+                if isinstance(spec, str) and spec.startswith(("file:", "link:")):
+                    paths.append(spec.split(":", 1)[1])
+        name = data.get("name")
+        return (name if isinstance(name, str) else None), names, paths
+
+    if p.name == "go.mod":
+        try:
+            text = p.read_text(encoding="utf-8")
+        except OSError:
+            return None, [], []
+        m = re.search(r"^\s*module\s+(\S+)", text, re.MULTILINE)
+        names = [mod for mod in _GO_REQUIRE_RE.findall(text) if mod not in ("module", "go")]
+        paths = [target for _mod, target in _GO_REPLACE_RE.findall(text)]
+        return (m.group(1) if m else None), names, paths
+
+    data = _load_toml(p)
+    if p.name == "Cargo.toml":
+        for key in ("dependencies", "dev-dependencies", "build-dependencies"):
+            for dep, spec in _table(data, key).items():
+                names.append(dep)
+                if isinstance(spec, dict) and isinstance(spec.get("path"), str):
+                    paths.append(spec["path"])
+        name = _table(data, "package").get("name")
+        return (name if isinstance(name, str) else None), names, paths
+
+    # pyproject.toml: PEP 621, Poetry, and uv path sources
+    project = _table(data, "project")
+    tool = _table(data, "tool")
+    poetry = _table(tool, "poetry")
+    reqs = list(project.get("dependencies") or []) if isinstance(project.get("dependencies"), list) else []
+    for extra in _table(project, "optional-dependencies").values():
+        reqs += extra if isinstance(extra, list) else []
+    for req in reqs:
+        m = _REQ_NAME_RE.match(str(req))
+        if m:
+            names.append(m.group(1))
+    for table in (_table(poetry, "dependencies"), _table(_table(tool, "uv"), "sources")):
+        for dep, spec in table.items():
+            names.append(dep)
+            if isinstance(spec, dict) and isinstance(spec.get("path"), str):
+                paths.append(spec["path"])
+    name = project.get("name") or poetry.get("name")
+    return (name if isinstance(name, str) else None), names, paths
+
+
+def _rel_dir(root: Path, base: Path, target: str) -> Optional[str]:
+    try:
+        p = (base / target).resolve()
+        rel = p.relative_to(root.resolve()).as_posix()
+    except (OSError, ValueError):
+        return None  # outside the repo
+    if p.is_file():
+        rel = PurePosixPath(rel).parent.as_posix()
+    return "" if rel == "." else rel
+
+
+def load_workspace(root: Path, rel_dir: str) -> Optional[Workspace]:
+    """
+    The package rooted at `rel_dir`, or None if it has no manifest.
+    Several manifests in one directory are merged.
+    """
+    base = root / rel_dir
+    found = [m for m in WORKSPACE_MANIFESTS if (base / m).is_file()]
+    if not found:
+        return None
+    ws = Workspace(path=rel_dir, manifest=found[0])
+    for m in found:
+        name, deps, paths = _parse(base / m)
+        ws.name = ws.name or name
+        ws.deps += [_norm(d) for d in deps]
+        ws.dep_paths += [r for r in (_rel_dir(root, base, t) for t in paths) if r is not None]
+    ws.deps = list(dict.fromkeys(ws.deps))
+    ws.dep_paths = list(dict.fromkeys(ws.dep_paths))
+    return ws
+
+
+def find_workspace(root: Path, cwd: Path) -> Optional[Workspace]:
+    """
+    Nearest package at or above `cwd`, below the repo root. None when cwd
+    is not inside a nested package (the repo is then one package).
+    """
+    try:
+        rel = cwd.resolve().relative_to(root.resolve())
+    except ValueError:
+        return None
+    parts = rel.parts
+    for n in range(len(parts), 0, -1):
+        ws = load_workspace(root, "/".join(parts[:n]))
+        if ws is not None:
+            return ws
+    return None
+
+
+def package_dirs(root: Path, rel_paths: Iterable[str]) -> Dict[str, str]:
+    """
+    Normalized package name -> repo-relative directory, from the manifests
+    among `rel_paths`.
+    """
+    out: Dict[str, str] = {}
+    for rel in rel_paths:
+        p = PurePosixPath(rel)
+        if p.name not in WORKSPACE_MANIFESTS:
+            continue
+        d = p.parent.as_posix()
+        name = _parse(root / rel)[0]
+        if name and d != ".":
+            out.setdefault(_norm(name), d)
+    return out
+
+
+def _collapse(dirs: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Drops directories nested in another one; () if the repo root is included.
+    """
+    out: List[str] = []
+    for d in sorted(set(dirs), key=lambda d: (d.count("/"), d)):
+        if d == "":
+            return ()
+        if not any(d == o or d.startswith(o + "/") for o in out):
+            out.append(d)
+    return tuple(sorted(out))
+
+
+def resolve_scope(
+    root: Path,
+    cwd: Path,
+    setting: str,
+    list_files: Callable[[], Iterable[str]],
+) -> Tuple[str, ...]:
+    """
+    Repo-relative directories retrieval is limited to; () = the whole repo.
+
+    setting: "repo" = whole repo; "auto" = the package containing cwd plus
+    the in-repo packages it depends on (transitively), or the whole repo if
+    that is more than MAX_SCOPE_DIRS directories; anything else is a
+    comma-separated list of repo-relative directories.
+    `list_files` (all repo files) is only called to resolve dependencies
+    declared by name rather than by path.
+    """
+    setting = (setting or "auto").strip()
+    if setting == "repo":
+        return ()
+    if setting != "auto":
+        dirs = [d.strip().strip("/") for d in setting.split(",")]
+        return _collapse(d for d in dirs if d not in ("", "."))
+
+    ws = find_workspace(root, cwd)
+    if ws is None:
+        return ()
+    dirs = [ws.path]
+    by_name: Optional[Dict[str, str]] = None
+    todo, seen = [ws], {ws.path}
+    while todo:
+        cur = todo.pop()
+        found = list(cur.dep_paths)
+        if cur.deps:
+            if by_name is None:
+                by_name = package_dirs(root, list_files())
+            found += [by_name[d] for d in cur.deps if d in by_name]
+        for d in found:
+            if d in seen:
+                continue
+            seen.add(d)
+            dirs.append(d)
+            if len(dirs) > MAX_SCOPE_DIRS:
+                return ()  # a partial closure would hide dependencies; use the whole repo
+            dep = load_workspace(root, d)
+            if dep is not None:
+                todo.append(dep)
+    return _collapse(dirs)
+
@@ -4,3 +4,18 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 sys.path.insert(0, str(SRC))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_user_state(tmp_path_factory, monkeypatch):
+    # keep tests out of the real ~/.local-agent (shared cache, admission slots)
+    import local_agent.admission as admission
+    import local_agent.sharedcache as sharedcache
+
+    cache_dir = tmp_path_factory.mktemp("shared-cache")
+    slot_dir = tmp_path_factory.mktemp("slots")
+    monkeypatch.setattr(sharedcache, "default_cache_dir", lambda: cache_dir)
+    monkeypatch.setattr(admission, "default_slot_dir", lambda: slot_dir)
+    monkeypatch.delenv(admission.PRIORITY_ENV, raising=False)
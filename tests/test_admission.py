@@ -0,0 +1,128 @@
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.admission import BATCH, INTERACTIVE, Admission, AdmissionGroup
+from local_agent.ollama_client import OllamaConnectionError
+from local_agent.pool import OllamaPool
+
+
+runner = CliRunner()
+
+
+def _hold(admission: Admission, seconds: float) -> threading.Thread:
+    held = threading.Event()
+
+    def run():
+        with admission.slot():
+            held.set()
+            time.sleep(seconds)
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    held.wait(5)
+    return t
+
+
+def test_interactive_requests_are_admitted_before_batch(tmp_path: Path):
+    _hold(Admission("http://h:11434", 1, root=tmp_path), 0.3)
+    order = []
+
+    def request(priority: str, delay: float):
+        time.sleep(delay)
+        with Admission("http://h:11434", 1, priority=priority, root=tmp_path).slot() as waited:
+            order.append((priority, waited))
+            time.sleep(0.05)
+
+    threads = [
+        threading.Thread(target=request, args=(BATCH, 0.0)),  # queued first
+        threading.Thread(target=request, args=(INTERACTIVE, 0.1)),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert [p for p, _ in order] == [INTERACTIVE, BATCH]
+    assert order[0][1] >= 0.1  # waited for the held slot
+
+
+def test_slots_are_shared_across_processes_and_freed_on_exit(tmp_path: Path):
+    admission = Admission("http://h:11434", 2, root=tmp_path)
+    script = (
+        "import sys, time\n"
+        "from pathlib import Path\n"
+        "from local_agent.admission import Admission\n"
+        "with Admission('http://h:11434', 2, root=Path(sys.argv[1])).slot():\n"
+        "    print('held', flush=True)\n"
+        "    time.sleep(30)\n"
+    )
+    src = Path(cli.__file__).resolve().parents[1]
+    proc = subprocess.Popen(
+        [sys.executable, "-c", script, str(tmp_path)], stdout=subprocess.PIPE, text=True, env={"PYTHONPATH": str(src)}
+    )
+    try:
+        assert proc.stdout.readline().strip() == "held"
+        assert admission.in_flight() == 1
+    finally:
+        proc.kill()
+        proc.wait()
+    assert admission.in_flight() == 0  # the lock died with the process
+
+
+def test_slot_runs_unqueued_when_lock_dir_disappears(tmp_path: Path):
+    admission = Admission("http://h:11434", 1, root=tmp_path / "slots")
+    shutil.rmtree(tmp_path / "slots")
+    with admission.slot() as waited:
+        assert waited == 0.0
+
+
+def test_pool_queues_for_the_slots_of_the_host_it_picked(tmp_path: Path):
+    class Fake:
+        def __init__(self, host, model, timeout_s=120.0):
+            self.host = host
+
+        def list_models(self):
+            if self.host == "http://b:11434":
+                raise OllamaConnectionError("down")
+            return ["m"]
+
+        def chat(self, messages, **kwargs):
+            return self.host
+
+    group = AdmissionGroup(["http://a:11434", "http://b:11434"], 1, root=tmp_path)
+    pool = OllamaPool(["http://a:11434", "http://b:11434"], "m", client_factory=Fake, admission=group)
+    assert group.slots == 2
+    holder = _hold(Admission("http://a:11434", 1, root=tmp_path), 0.3)
+    assert pool.chat([{"role": "user", "content": "hi"}]) == "http://a:11434"
+    holder.join(5)
+    assert group.last_wait_s >= 0.2  # b's free slot does not admit a request bound for a
+
+
+def test_ask_reports_queue_wait(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / ".local-agent").mkdir(parents=True)
+    (repo / ".git").mkdir()
+    (repo / ".local-agent" / "config.toml").write_text(
+        'ollama_host = "http://q:11434"\nollama_max_inflight = 1\n', encoding="utf-8"
+    )
+    monkeypatch.chdir(repo)
+
+    class Fake:
+        def __init__(self, host, model, timeout_s=120.0):
+            pass
+
+        def chat(self, messages, **kwargs):
+            return "ok"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+    holder = _hold(Admission("http://q:11434", 1), 0.4)
+    res = runner.invoke(cli.app, ["ask", "what does this do"])
+    holder.join(5)
+    assert res.exit_code == 0, res.output
+    assert "queued 0." in res.output
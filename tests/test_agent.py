@@ -0,0 +1,138 @@
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.agent import RepoTools, run_agent
+from local_agent.context import RepoContext
+from local_agent.ollama_client import OllamaError
+
+
+runner = CliRunner()
+
+BILLING = "def charge(inv):\n    total = inv.total\n    return refund(total)\n\n\ndef refund(x):\n    return -x\n"
+
+
+def _repo(tmp_path: Path) -> Path:
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / ".git").mkdir()
+    (repo / "src" / "billing.py").write_text(BILLING, encoding="utf-8")
+    (repo / "src" / "other.py").write_text("x = 1\n" * 500, encoding="utf-8")
+    return repo
+
+
+def _call(tool: str, **args) -> dict:
+    return {"function": {"name": tool, "arguments": args}}
+
+
+class Scripted:
+    """Replies with the given assistant messages in turn; records what it was sent."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.sent = []
+
+    def chat_message(self, messages, options=None, tools=None):
+        self.sent.append((list(messages), tools))
+        return self.replies.pop(0)
+
+    def chat(self, messages, options=None):
+        self.sent.append((list(messages), None))
+        return "final"
+
+
+def test_tools_read_search_and_find_symbols(tmp_path: Path):
+    tools = RepoTools(RepoContext(root=_repo(tmp_path), file_source="walk"), set())
+    out = tools.call("read", {"path": "./src/billing.py", "start": 2, "end": 3})
+    assert out.splitlines() == ["src/billing.py (lines 2-3 of 7)", "   2 |     total = inv.total", "   3 |     return refund(total)"]
+    assert tools.call("read", {"path": "../outside.txt"}).startswith("error: ")
+    assert tools.call("read", {}).startswith("error: bad arguments")
+    assert tools.call("search", {"pattern": "def refund"}) == "src/billing.py:6:def refund(x):"
+    assert tools.call("find_symbol", {"name": "refund"}).splitlines() == [
+        "refund (function) src/billing.py:6-7",
+        "referenced in: src/billing.py (1)",
+    ]
+    assert tools.log[0] == "read(./src/billing.py:2-3)" and len(tools.log) == 4
+
+
+def test_tools_hide_excluded_files_from_search_and_read(tmp_path: Path):
+    repo = _repo(tmp_path)
+    (repo / "vendor").mkdir()
+    (repo / "vendor" / "refunds.py").write_text("def refund(x):\n    return 0\n", encoding="utf-8")
+    ctx = RepoContext(root=repo, file_source="walk")
+
+    tools = RepoTools(ctx, {"vendor"})
+    assert tools.call("search", {"pattern": "def refund"}) == "src/billing.py:6:def refund(x):"
+    assert tools.call("read", {"path": "vendor/refunds.py"}).startswith("error: vendor/refunds.py is not available")
+
+    rg_rows = f"{repo}/vendor/refunds.py:1:def refund(x):\n{repo}/src/billing.py:6:def refund(x):"
+    tools = RepoTools(ctx, {"vendor"}, grep=lambda pattern: rg_rows)
+    assert tools.call("search", {"pattern": "def refund"}) == "src/billing.py:6:def refund(x):"
+
+
+def test_agent_loop_feeds_tool_results_back_and_caps_turns(tmp_path: Path):
+    tools = RepoTools(RepoContext(root=_repo(tmp_path), file_source="walk"), set())
+    client = Scripted([
+        {"content": "", "tool_calls": [_call("find_symbol", name="charge")]},
+        {"content": "", "tool_calls": [_call("read", path="src/billing.py", start=1, end=3)]},
+        {"content": "charge() refunds the total (src/billing.py:1-3)"},
+    ])
+    messages = [{"role": "system", "content": "s"}, {"role": "user", "content": "what does charge do?"}]
+    result = run_agent(client, messages, tools, max_turns=5)
+    assert result.answer.startswith("charge() refunds") and result.turns == 3 and not result.capped
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "tool", "assistant", "tool", "assistant"]
+    assert "return refund(total)" in messages[5]["content"]
+    assert client.sent[0][1] is not None  # tools were offered
+
+    client = Scripted([{"content": "", "tool_calls": [_call("search", pattern="total")]}])
+    result = run_agent(client, [{"role": "user", "content": "q"}], tools, max_turns=1)
+    assert result.capped and result.answer == "final"
+    assert client.sent[-1][1] is None  # the last request withholds tools
+
+
+def test_ask_agent_sends_no_files_upfront(tmp_path: Path, monkeypatch):
+    repo = _repo(tmp_path)
+    monkeypatch.chdir(repo)
+    sent = []
+
+    class Fake:
+        def __init__(self, host, model, timeout_s=120.0):
+            pass
+
+        def chat_message(self, messages, options=None, tools=None):
+            sent.append([dict(m) for m in messages])
+            if len(sent) == 1:
+                return {"content": "", "tool_calls": [_call("read", path="src/billing.py", start=1, end=3)]}
+            return {"content": "It refunds the total."}
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+    res = runner.invoke(cli.app, ["ask", "--agent", "what does charge do"])
+    assert res.exit_code == 0, res.output
+    assert "It refunds the total." in res.output
+    assert "agent: 1 tool call(s) in 2 request(s)" in res.output
+    first = sent[0][1]["content"]
+    assert "billing.py" in first and "return refund" not in first  # the tree, not the contents
+    assert "return refund(total)" in sent[1][-1]["content"]
+
+
+def test_ask_agent_falls_back_without_tool_support(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(_repo(tmp_path))
+    prompts = []
+
+    class NoTools:
+        def __init__(self, host, model, timeout_s=120.0):
+            self.model = model
+
+        def chat_message(self, messages, options=None, tools=None):
+            raise OllamaError(f'Ollama API error: 400 - {{"error":"{self.model} does not support tools"}}')
+
+        def chat(self, messages, options=None):
+            prompts.append(str(messages[-1]["content"]))
+            return "answered upfront"
+
+    monkeypatch.setattr(cli, "OllamaClient", NoTools)
+    res = runner.invoke(cli.app, ["ask", "--agent", "what does charge do"])
+    assert res.exit_code == 0, res.output
+    assert "does not support tool calling" in res.output and "answered upfront" in res.output
+    assert "return refund(total)" in prompts[0]
@@ -0,0 +1,80 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+
+
+runner = CliRunner()
+
+
+def _serve():
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = json.dumps({"models": [{"name": "m"}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests.append(req)
+            loaded = len(requests) > 2  # first call after the unload is "cold"
+            chunks = [
+                {"response": "O", "done": False},
+                {
+                    "response": "K",
+                    "done": True,
+                    "load_duration": 50_000_000 if loaded else 2_000_000_000,
+                    "prompt_eval_count": 100,
+                    "prompt_eval_duration": 250_000_000,
+                    "eval_count": 20,
+                    "eval_duration": 500_000_000,
+                },
+            ]
+            body = "".join(json.dumps(c) + "\n" for c in chunks).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, requests
+
+
+def test_doctor_bench_table_and_json(tmp_path: Path, monkeypatch):
+    srv, requests = _serve()
+    try:
+        repo = tmp_path / "repo"
+        (repo / ".local-agent").mkdir(parents=True)
+        (repo / ".git").mkdir()
+        (repo / ".local-agent" / "config.toml").write_text(
+            f'ollama_host = "http://127.0.0.1:{srv.server_address[1]}"\nmodel = "m"\n', encoding="utf-8"
+        )
+        monkeypatch.chdir(repo)
+        out = tmp_path / "bench.json"
+
+        res = runner.invoke(cli.app, ["doctor", "--bench", "--sizes", "100,9000", "--ctx", "4096", "--json", str(out)])
+        assert res.exit_code == 0, res.stdout
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+    assert requests[0] == {"model": "m", "keep_alive": 0}  # evicted before the cold run
+    data = json.loads(out.read_text(encoding="utf-8"))
+    rows = data["results"]
+    assert [r["kind"] for r in rows] == ["cold", "warm", "run"]  # 9000 tokens does not fit num_ctx 4096
+    assert rows[0]["load_s"] == 2.0 and rows[1]["load_s"] == 0.05
+    assert rows[2]["prompt_tps"] == 400.0 and rows[2]["gen_tps"] == 40.0
+    assert requests[-1]["options"] == {"num_ctx": 4096, "num_predict": 64, "temperature": 0}
+    assert "Gen tok/s" in res.stdout
@@ -20,7 +20,7 @@ class FakeOllama:
     def list_models(self):
         return [self.model]
 
-    def chat(self, messages):
+    def chat(self, messages, **kwargs):
         # capture messages so we can assert stdin got included
         self.last_messages = messages
         return "FAKE_RESPONSE"
@@ -1,6 +1,22 @@
+import os
 from pathlib import Path
 
-from local_agent.commands import discover_commands, resolve_command, render_template
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+import local_agent.commands as commands
+from local_agent.commands import (
+    CommandDirectives,
+    CommandRegistry,
+    discover_commands,
+    expand_pinned,
+    parse_command,
+    resolve_command,
+    render_template,
+)
+
+
+runner = CliRunner()
 
 
 def test_discover_and_resolve_project_command(tmp_path: Path):
@@ -22,3 +38,88 @@ def test_discover_and_resolve_project_command(tmp_path: Path):
     text = spec.path.read_text(encoding="utf-8")
     out = render_template(text, "focus on errors")
     assert "focus on errors" in out
+
+
+def test_front_matter_directives():
+    d, body = parse_command(
+        "---\n"
+        "files:\n"
+        "  - src/app.py\n"
+        "  - docs/*.md\n"
+        "max_context_files: 3\n"
+        "model: qwen2.5-coder:14b  # bigger model for reviews\n"
+        "retrieval: off\n"
+        "---\n"
+        "Review $ARGUMENTS\n"
+    )
+    assert d.files == ("src/app.py", "docs/*.md")
+    assert (d.max_context_files, d.model, d.retrieval) == (3, "qwen2.5-coder:14b", False)
+    assert body == "Review $ARGUMENTS\n"
+    assert parse_command("no front matter") == (CommandDirectives(), "no front matter")
+
+    rels = ["src/app.py", "src/util.py", "docs/a.md", "docs/deep/b.md", "lib/x.py"]
+    assert expand_pinned(["docs/*.md", "./src/app.py", "lib"], rels) == [
+        "docs/a.md", "docs/deep/b.md", "src/app.py", "lib/x.py"
+    ]
+
+
+def test_registry_rescans_only_when_dirs_change(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    cmd_dir = repo / ".local-agent" / "commands"
+    cmd_dir.mkdir(parents=True)
+    (cmd_dir / "review.md").write_text("v1", encoding="utf-8")
+    monkeypatch.setattr(commands, "_user_commands_dir", lambda: tmp_path / "home-commands")
+
+    scans = []
+    real = commands.discover_commands
+    monkeypatch.setattr(commands, "discover_commands", lambda root: scans.append(1) or real(root))
+
+    reg = CommandRegistry(repo)
+    spec = reg.resolve("review")
+    assert reg.resolve("/project:review") == spec
+    assert reg.load(spec).template == "v1" and len(scans) == 1
+
+    (cmd_dir / "review.md").write_text("---\nretrieval: no\n---\nversion two", encoding="utf-8")
+    st = (cmd_dir / "review.md").stat()
+    os.utime(cmd_dir / "review.md", ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    loaded = reg.load(reg.resolve("review"))
+    assert loaded.template == "version two" and not loaded.directives.retrieval
+    assert len(scans) == 1
+
+    (cmd_dir / "fix.md").write_text("fix", encoding="utf-8")
+    st = cmd_dir.stat()
+    os.utime(cmd_dir, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    assert reg.resolve("fix") is not None and len(scans) == 2
+
+
+def test_chat_command_with_pinned_files_skips_retrieval(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / ".git").mkdir()
+    (repo / "src" / "app.py").write_text("def run():\n    pass\n", encoding="utf-8")
+    (repo / "src" / "review_notes.py").write_text("x = 1\n", encoding="utf-8")
+    cmd_dir = repo / ".local-agent" / "commands"
+    cmd_dir.mkdir(parents=True)
+    (cmd_dir / "review.md").write_text(
+        "---\nfiles: src/app.py\nretrieval: off\nmodel: big-model\n---\nReview $ARGUMENTS", encoding="utf-8"
+    )
+    monkeypatch.chdir(repo)
+    monkeypatch.setattr(commands, "_user_commands_dir", lambda: tmp_path / "home-commands")
+
+    sent = []
+
+    class Fake:
+        def __init__(self, host, model, timeout_s=120.0):
+            self.model = model
+
+        def chat(self, messages, **kwargs):
+            sent.append((self.model, str(messages[-1]["content"])))
+            return "ok"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+    res = runner.invoke(cli.app, ["chat"], input="/review the notes\n/exit\n")
+    assert res.exit_code == 0
+    model, prompt = sent[0]
+    assert model == "big-model"
+    assert "--- FILE: src/app.py" in prompt and "--- FILE: src/review_notes.py" not in prompt
+    assert "Review the notes" in prompt
@@ -32,3 +32,24 @@ extra_excludes = ["data", "logs"]
     assert cfg.max_tree_files == 42
     assert "data" in cfg.extra_excludes
     assert "logs" in cfg.extra_excludes
+
+
+def test_host_pool_survives_a_config_layer_without_host_keys(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / ".git").mkdir(parents=True)
+    (repo / ".local-agent").mkdir()
+    (repo / ".local-agent" / "config.toml").write_text(
+        'model = "repo-model"\nmax_tree_files = 9\n', encoding="utf-8"
+    )
+    sub = repo / "svc" / ".local-agent"
+    sub.mkdir(parents=True)
+    (sub / "config.toml").write_text(
+        'ollama_hosts = ["http://a:11434", "http://b:11434"]\nmodel = "m"\n', encoding="utf-8"
+    )
+
+    monkeypatch.chdir(repo / "svc")
+    cfg = load_config()
+
+    assert cfg.model == "m"
+    assert cfg.ollama_hosts == ["http://a:11434", "http://b:11434"]
+    assert cfg.ollama_host == "http://a:11434"
@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.evaluation import Target, load_cases, parse_target, recall_at, reciprocal_rank, visible_lines
+from local_agent.utils import read_text_limited
+
+
+runner = CliRunner()
+
+
+def test_targets_and_metrics(tmp_path: Path):
+    assert parse_target("./src/a.py") == Target("src/a.py")
+    assert parse_target("src/a.py:10-12") == Target("src/a.py", 10, 12)
+    assert parse_target({"path": "b.py", "lines": 7}) == Target("b.py", 7, 7)
+
+    qs = tmp_path / "q.jsonl"
+    qs.write_text(
+        '# retrieval questions\n{"id": "refunds", "question": "how are refunds retried?", "expected": "a.py"}\n\n'
+        '{"question": "where is X?", "expected": ["b.py:3-4", "c.py"]}\n',
+        encoding="utf-8",
+    )
+    cases = load_cases(qs)
+    assert [c.name for c in cases] == ["refunds", "2"] and cases[1].paths() == ["b.py", "c.py"]
+
+    assert recall_at(["x", "b.py", "c.py"], ["b.py", "c.py"], 2) == 0.5
+    assert reciprocal_rank(["x", "b.py"], ["b.py", "c.py"]) == 0.5
+    assert reciprocal_rank(["x"], ["b.py"]) == 0.0
+
+    text = "".join(f"line {i}\n" for i in range(1, 101))
+    (tmp_path / "big.txt").write_text(text, encoding="utf-8")
+    seen = visible_lines(read_text_limited(tmp_path / "big.txt", max_chars=200), 100)
+    assert {1, 2, 99, 100} <= seen and 50 not in seen
+    assert all(f"line {n}\n" in text for n in seen)
+
+
+def test_eval_command_reports_each_strategy(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / ".git").mkdir()
+    (repo / "src" / "refunds.py").write_text("def retry_refund(r):\n    return r\n", encoding="utf-8")
+    (repo / "src" / "util.py").write_text("def helper():\n    return 1\n", encoding="utf-8")
+    (repo / ".local-agent").mkdir()
+    (repo / ".local-agent" / "config.toml").write_text('file_source = "walk"\n', encoding="utf-8")
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    rg = bindir / "rg"
+    rg.write_text(f"#!{sys.executable}\nprint({str(repo / 'src' / 'util.py')!r} + ':3')\n", encoding="utf-8")
+    rg.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}:" + os.environ.get("PATH", ""))
+    monkeypatch.chdir(repo)
+    (repo / "q.jsonl").write_text(
+        json.dumps({"question": "how does retry_refund handle refunds", "expected": ["src/refunds.py:1-2"]}) + "\n", encoding="utf-8"
+    )
+
+    class NoModel:
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("eval must not call the model")
+
+    monkeypatch.setattr(cli, "OllamaClient", NoModel)
+    out = tmp_path / "eval.json"
+    res = runner.invoke(cli.app, ["eval", "q.jsonl", "--k", "1", "--json", str(out)])
+    assert res.exit_code == 0, res.output
+    rows = {r["strategy"]: r for r in json.loads(out.read_text(encoding="utf-8"))["results"]}
+    assert set(rows) == {"content", "path", "symbols", "fused", "ask"}
+    assert rows["content"]["recall@1"] == 0.0 and rows["content"]["cases"][0]["ranked"] == ["src/util.py"]
+    assert rows["path"]["recall@1"] == 1.0 and rows["symbols"]["mrr"] == 1.0
+    assert rows["ask"]["line_recall"] == 1.0 and rows["ask"]["tokens"] > 0
+
+    res = runner.invoke(cli.app, ["eval", "q.jsonl", "--strategy", "bogus"])
+    assert res.exit_code == 1 and "Unknown strategy" in res.output
@@ -0,0 +1,68 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from local_agent.context import RepoContext
+from local_agent.gitutils import changed_paths, current_state, dirty_files, ls_files
+
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def _init(tmp_path: Path) -> Path:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.email", "t@example.com")
+    _git(repo, "config", "user.name", "t")
+    (repo / ".gitignore").write_text("*.log\n", encoding="utf-8")
+    (repo / "old_report.py").write_text("x = 1\n", encoding="utf-8")
+    (repo / "new_report.py").write_text("x = 2\n", encoding="utf-8")
+    (repo / "gone.py").write_text("", encoding="utf-8")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "init")
+    return repo
+
+
+def test_ls_files_and_change_detection(tmp_path: Path):
+    repo = _init(tmp_path)
+    before = current_state(repo)
+    assert before is not None and before.dirty == []
+
+    (repo / "debug.log").write_text("ignored", encoding="utf-8")
+    (repo / "untracked.py").write_text("", encoding="utf-8")
+    (repo / "gone.py").unlink()
+
+    files = ls_files(repo)
+    assert "debug.log" not in files
+    assert "gone.py" not in files
+    assert {"untracked.py", "old_report.py", ".gitignore"} <= set(files)
+    assert dirty_files(repo) == {"gone.py", "untracked.py"}
+
+    (repo / "old_report.py").write_text("x = 3\n", encoding="utf-8")
+    _git(repo, "commit", "-q", "-am", "edit")
+    after = current_state(repo)
+    assert changed_paths(repo, before, after) == {"old_report.py", "gone.py", "untracked.py"}
+
+
+def test_recency_boost_ranks_uncommitted_and_recent_files_first(tmp_path: Path):
+    repo = _init(tmp_path)
+    (repo / "new_report.py").write_text("x = 4\n", encoding="utf-8")
+    _git(repo, "commit", "-q", "-am", "touch new")
+    (repo / "old_report.py").write_text("x = 5\n", encoding="utf-8")  # uncommitted
+
+    ctx = RepoContext(root=repo)
+    boost = ctx.recency_boost()
+    assert boost["old_report.py"] == 2.0
+    assert boost["new_report.py"] > boost.get("gone.py", 0.0)
+
+    # no file content mentions "report": the filename fallback ranks ties by recency
+    rels = ctx.select_relevant_files("report", max_files=2, extra_excludes=set())
+    assert rels == ["old_report.py", "new_report.py"]
+    assert RepoContext(root=repo, file_source="walk").recency_boost() == {}
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from local_agent.graph import ImportGraph, entry_point_paths, load_import_graph
+
+
+def _write(root: Path, files: dict[str, str]) -> list[str]:
+    for rel, text in files.items():
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+    return list(files)
+
+
+def test_python_and_js_imports_resolve_to_files(tmp_path: Path):
+    rels = _write(tmp_path, {
+        "src/app/__init__.py": "",
+        "src/app/cli.py": "from .core import run\nfrom app import util\nimport os\n",
+        "src/app/core.py": "from app.util import helper\n",
+        "src/app/util.py": "",
+        "web/src/main.ts": "import { api } from './api'\nconst x = require('../lib/fmt')\nimport React from 'react'\n",
+        "web/src/api/index.ts": "export * from './client'\n",
+        "web/src/api/client.ts": "",
+        "web/lib/fmt.js": "",
+    })
+    g = ImportGraph(tmp_path).build(rels)
+
+    assert g.edges["src/app/cli.py"] == {"src/app/core.py", "src/app/util.py"}
+    assert g.edges["src/app/core.py"] == {"src/app/util.py"}
+    assert g.edges["web/src/main.ts"] == {"web/src/api/index.ts", "web/lib/fmt.js"}
+    assert g.edges["web/src/api/index.ts"] == {"web/src/api/client.ts"}
+
+    rank = g.centrality()
+    assert max(rank, key=rank.get) == "src/app/util.py"
+    assert g.expand(["src/app/core.py"], budget=5) == ["src/app/util.py", "src/app/cli.py"]
+    assert g.expand(["src/app/core.py"], budget=1) == ["src/app/util.py"]
+
+
+def test_graph_cache_and_entry_points(tmp_path: Path):
+    rels = _write(tmp_path, {
+        "pyproject.toml": '[project]\nname = "x"\n\n[project.scripts]\nx = "pkg.main_cli:app"\n',
+        "pkg/__init__.py": "",
+        "pkg/main_cli.py": "",
+        "pkg/a.py": "",
+    })
+    g = load_import_graph(tmp_path, rels)
+    assert (tmp_path / ".local-agent" / "index" / "graph.json").exists()
+    assert g.edges["pkg/a.py"] == set()
+
+    (tmp_path / "pkg" / "a.py").write_text("from pkg import main_cli\n", encoding="utf-8")
+    g = load_import_graph(tmp_path, rels)
+    assert g.edges["pkg/a.py"] == {"pkg/main_cli.py"}
+
+    assert entry_point_paths(tmp_path, g)[:2] == ["pyproject.toml", "pkg/main_cli.py"]
@@ -0,0 +1,53 @@
+import random
+from pathlib import Path
+
+from local_agent.context import RepoContext
+from local_agent.junk import JunkIndex, generated_reason
+
+
+def _code(seed: int) -> str:
+    rnd = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", "parse", "token", "value", "index", "cache", "query"]
+    return "\n".join(
+        f"def f{i}({rnd.choice(words)}):\n    return {rnd.choice(words)} + {rnd.choice(words)}" for i in range(60)
+    )
+
+
+def test_generated_reasons():
+    assert generated_reason("web/package-lock.json", "{}") == "lockfile"
+    assert generated_reason("static/app.min.js", "x") == "generated name"
+    assert generated_reason("api/user_pb2.py", "x") == "generated name"
+    assert generated_reason("gen/models.go", "// Code generated by sqlc. DO NOT EDIT.\npackage gen\n") == "generated marker"
+    assert generated_reason("dist2/app.js", "var a=1;" * 400) == "minified"
+    assert generated_reason("src/pattern.py", 'MARKER = "DO NOT EDIT"\n') is None
+
+
+def test_near_duplicates_keep_the_shortest_path(tmp_path: Path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "vendor" / "lib").mkdir(parents=True)
+    (tmp_path / "src" / "parse.py").write_text(_code(1), encoding="utf-8")
+    (tmp_path / "vendor" / "lib" / "parse.py").write_text(_code(1) + "\n# vendored\n", encoding="utf-8")
+    (tmp_path / "src" / "other.py").write_text(_code(2), encoding="utf-8")
+
+    idx = JunkIndex(tmp_path)
+    files = ["src/parse.py", "vendor/lib/parse.py", "src/other.py"]
+    assert idx.update(files) == 3
+    assert idx.update(files) == 0  # cached by (mtime, size)
+    assert idx.flagged() == {"vendor/lib/parse.py": "near-duplicate of src/parse.py"}
+
+
+def test_retrieval_skips_generated_and_demotes_duplicates(tmp_path: Path):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "vendor").mkdir()
+    (repo / "src" / "parser.py").write_text(_code(3), encoding="utf-8")
+    (repo / "vendor" / "parser_copy.py").write_text(_code(3), encoding="utf-8")
+    (repo / "src" / "parser.min.js").write_text("var parser=1;", encoding="utf-8")
+
+    ctx = RepoContext(root=repo, file_source="walk")
+    assert ctx.select_relevant_files("parser", max_files=5, extra_excludes=set()) == [
+        "src/parser.py",
+        "vendor/parser_copy.py",
+    ]
+    # naming a generated file explicitly still finds it
+    assert "src/parser.min.js" in ctx.select_relevant_files("parser.min.js", max_files=5, extra_excludes=set())
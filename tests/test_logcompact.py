@@ -0,0 +1,44 @@
+import random
+
+from local_agent.logcompact import compact_log, looks_like_log, mask_line
+
+
+def _synthetic_log(n: int) -> list[str]:
+    rnd = random.Random(0)
+    lines = []
+    for i in range(n):
+        ts = f"2024-05-01T12:{i // 60 % 60:02d}:{i % 60:02d}.{rnd.randint(0, 999):03d}Z"
+        kind = i % 3
+        if kind == 0:
+            lines.append(f"{ts} INFO GET /api/items/{rnd.randint(1, 9999)} status=200 took {rnd.randint(1, 300)}ms\n")
+        elif kind == 1:
+            lines.append(f"{ts} DEBUG cache hit key={rnd.getrandbits(64):016x} size={rnd.randint(1, 10**6)}\n")
+        else:
+            lines.append(f"{ts} INFO worker-{rnd.randint(1, 8)} heartbeat from 10.0.0.{rnd.randint(1, 254)}:8080\n")
+    return lines
+
+
+def test_mask_line_masks_variable_fields():
+    out = mask_line("2024-05-01T12:00:01Z req 3f2a9c1e-1111-2222-3333-444455556666 from 10.1.2.3:80 took 12ms")
+    assert out == "<TS> req <UUID> from <IP> took <NUM>ms"
+
+
+def test_compact_log_shrinks_and_keeps_matching_lines_verbatim():
+    lines = _synthetic_log(3000)
+    lines.insert(1500, "2024-05-01T12:25:00.000Z ERROR payment failed: card_declined id=77\n")
+
+    res = compact_log(lines, keep_terms=["payment"])
+
+    raw = sum(len(x) for x in lines)
+    assert res.lines_in == 3001
+    assert res.templates <= 5
+    assert len(res.text) * 20 < raw
+    assert "L1501: 2024-05-01T12:25:00.000Z ERROR payment failed: card_declined id=77" in res.text
+    assert "x L1+: <TS> INFO GET /api/items/<NUM> status=<NUM> took <NUM>ms" in res.text
+
+
+def test_looks_like_log_tells_logs_from_code():
+    assert looks_like_log("".join(_synthetic_log(50)))
+    assert looks_like_log("Jan  5 10:00:01 host sshd[1]: ok\n" * 20)
+    code = "".join(f"def f{i}(x):\n    return x + {i}\n\n" for i in range(50))
+    assert not looks_like_log(code)
@@ -0,0 +1,151 @@
+import io
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.mapreduce import condense_stream, iter_chunks
+
+
+runner = CliRunner()
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def chat(self, messages, **kwargs):
+        with self.lock:
+            self.calls += 1
+        body = messages[-1]["content"]
+        return "- boom at worker" if "ERROR" in body else "NONE"
+
+
+def test_iter_chunks_line_aligned_with_prefix():
+    text = "".join(f"line {i}\n" for i in range(1, 101))
+    stream = io.StringIO(text)
+    prefix = stream.read(15)  # ends mid-line
+
+    chunks = list(iter_chunks(stream, chunk_chars=100, prefix=prefix))
+
+    assert "".join(c.text for c in chunks) == text
+    assert all(c.text.endswith("\n") for c in chunks)
+    assert chunks[0].start_line == 1
+    assert chunks[-1].end_line == 100
+    for a, b in zip(chunks, chunks[1:]):
+        assert b.start_line == a.end_line + 1
+
+
+def test_condense_stream_keeps_only_relevant_notes():
+    lines = ["ok\n"] * 500 + ["ERROR worker crashed\n"] + ["ok\n"] * 500
+    client = CountingClient()
+
+    notes = condense_stream(client, "why did it fail", iter_chunks(io.StringIO("".join(lines)), 200), parallelism=3)
+
+    assert client.calls > 5
+    assert "boom at worker" in notes
+    assert notes.count("[lines") == 1
+
+
+def test_condense_stream_cancels_queued_chunks_when_one_fails():
+    class Failing(CountingClient):
+        def chat(self, messages, **kwargs):
+            super().chat(messages)
+            if "line 1\n" in messages[-1]["content"]:
+                raise ConnectionError("ollama is down")
+            time.sleep(0.3)
+            return "NONE"
+
+    client = Failing()
+    text = "".join(f"line {i}\n" for i in range(1, 401))
+    with pytest.raises(ConnectionError):
+        condense_stream(client, "q", iter_chunks(io.StringIO(text), 200), parallelism=2)
+    assert client.calls < 4  # the window held 4 chunks; the queued ones never ran
+
+
+def test_ask_map_reduces_large_stdin(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / ".git").mkdir()
+    (repo / ".local-agent").mkdir()
+    (repo / ".local-agent" / "config.toml").write_text(
+        "stdin_max_chars = 500\nstdin_chunk_chars = 200\n", encoding="utf-8"
+    )
+    monkeypatch.chdir(repo)
+
+    sent = []
+
+    class Fake(CountingClient):
+        def __init__(self, host: str, model: str, timeout_s: float = 120.0):
+            super().__init__()
+
+        def chat(self, messages, **kwargs):
+            sent.append(messages)
+            return super().chat(messages)
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+
+    big = "ok\n" * 1000 + "ERROR disk full\n" + "ok\n" * 1000
+    res = runner.invoke(cli.app, ["ask", "why did it fail"], input=big)
+    assert res.exit_code == 0
+
+    final = sent[-1][-1]["content"]
+    assert "notes extracted" in final
+    assert "boom at worker" in final
+    assert len(final) < len(big)
+
+
+def test_ask_sends_fitting_non_log_stdin_unchanged(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / ".git").mkdir()
+    monkeypatch.chdir(repo)
+    sent = []
+
+    class Fake(CountingClient):
+        def __init__(self, host: str, model: str, timeout_s: float = 120.0):
+            super().__init__()
+
+        def chat(self, messages, **kwargs):
+            sent.append(str(messages[-1]["content"]))
+            return "ok"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+    source = "".join(f"def handler_{i}(event):\n    return process(event, retries={i})\n\n" for i in range(300))
+    assert 8_000 < len(source) < 80_000  # over stdin_compact_min_chars, under stdin_max_chars
+    res = runner.invoke(cli.app, ["ask", "what do these handlers do"], input=source)
+    assert res.exit_code == 0
+    assert len(sent) == 1
+    assert "STDIN (piped input):\n" + source in sent[0]
+    assert "compacted log" not in sent[0]
+
+
+def test_ask_map_reduces_large_non_log_stdin_without_compacting(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / ".git").mkdir(parents=True)
+    (repo / ".local-agent").mkdir()
+    (repo / ".local-agent" / "config.toml").write_text(
+        "stdin_max_chars = 2000\nstdin_chunk_chars = 1000\nstdin_compact_min_chars = 500\n", encoding="utf-8"
+    )
+    monkeypatch.chdir(repo)
+    sent = []
+
+    class Fake(CountingClient):
+        def __init__(self, host: str, model: str, timeout_s: float = 120.0):
+            super().__init__()
+
+        def chat(self, messages, **kwargs):
+            sent.append(str(messages[-1]["content"]))
+            return "- handlers call process()"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+    source = "".join(f"def handler_{i}(event):\n    return process(event, retries={i})\n\n" for i in range(100))
+    res = runner.invoke(cli.app, ["ask", "what do these handlers do"], input=source)
+    assert res.exit_code == 0
+    assert len(sent) > 2  # map requests, then the answer
+    assert "    return process(event, retries=42)\n" in "".join(sent[:-1])
+    assert "compacted log" not in sent[-1] and "notes extracted" in sent[-1]
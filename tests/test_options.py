@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.config import load_config
+from local_agent.options import ctx_bucket, resolve_options
+
+
+runner = CliRunner()
+
+
+def test_auto_num_ctx_rounds_to_buckets():
+    assert ctx_bucket(100) == 4096
+    assert ctx_bucket(4097) == 8192
+    assert ctx_bucket(10**6) == 32768
+    assert ctx_bucket(10**6, max_ctx=16384) == 16384
+
+    small = [{"role": "user", "content": "x" * 300}]
+    big = [{"role": "user", "content": "x" * 30_000}]
+    assert resolve_options({}, small) == {"num_ctx": 4096}
+    assert resolve_options({}, big) == {"num_ctx": 16384}
+    assert resolve_options({}, small, floor=8192) == {"num_ctx": 8192}
+    # num_predict counts as the expected output; fixed and disabled num_ctx pass through
+    assert resolve_options({"num_predict": 6000}, small)["num_ctx"] == 8192
+    assert resolve_options({"num_ctx": 2048, "temperature": 0.1, "bogus": 1}, small) == {
+        "num_ctx": 2048,
+        "temperature": 0.1,
+    }
+    assert resolve_options({"num_ctx": 0, "stop": ["```"]}, small) == {"stop": ["```"]}
+
+
+def test_capped_num_ctx_warns_when_the_prompt_does_not_fit(capsys):
+    big = [{"role": "user", "content": "x" * 30_000}]
+    assert resolve_options({"num_ctx_max": 16384}, big) == {"num_ctx": 16384}
+    assert capsys.readouterr().err == ""
+    assert resolve_options({"num_ctx_max": 8192}, big) == {"num_ctx": 8192}
+    assert "capped at 8192" in capsys.readouterr().err
+
+
+def test_per_command_options_reach_the_client(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / ".local-agent").mkdir(parents=True)
+    (repo / ".git").mkdir()
+    (repo / ".local-agent" / "config.toml").write_text(
+        "[options]\ntemperature = 0.2\nnum_thread = 4\n\n[options.ask]\ntemperature = 0.0\nnum_ctx = 8192\n",
+        encoding="utf-8",
+    )
+    monkeypatch.chdir(repo)
+
+    cfg = load_config()
+    assert cfg.options_for("chat") == {"temperature": 0.2, "num_thread": 4}
+    assert cfg.options_for("ask") == {"temperature": 0.0, "num_thread": 4, "num_ctx": 8192}
+
+    seen = []
+
+    class Fake:
+        def __init__(self, host: str, model: str, timeout_s: float = 120.0):
+            pass
+
+        def chat(self, messages, options=None):
+            seen.append(options)
+            return "ok"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+    res = runner.invoke(cli.app, ["ask", "hello"])
+    assert res.exit_code == 0
+    assert seen == [{"temperature": 0.0, "num_thread": 4, "num_ctx": 8192}]
@@ -0,0 +1,91 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from local_agent.cli import _with_line_numbers
+from local_agent.ollama_client import OllamaClient
+from local_agent.payload import NumberedText, Prompt, iter_chat_body
+
+
+def _messages():
+    text = "".join(f'line {i} "quoted" \\ tab\there ünï\n' for i in range(1, 700))
+    nt = NumberedText(text)
+    prompt = Prompt(["TREE", f"\n--- FILE: a.py (lines 1-{nt.end_line}) ---", nt, "\nQUESTION:\nwhy?"])
+    return [{"role": "system", "content": "sys"}, {"role": "user", "content": prompt}], text
+
+
+def test_numbered_text_matches_eager_numbering():
+    _, text = _messages()
+    numbered, end_line = _with_line_numbers(text, start_line=1)
+    nt = NumberedText(text)
+    assert nt.end_line == end_line == 400
+    assert "".join(nt.iter_chunks(batch=7)) == numbered
+
+
+def test_streamed_body_decodes_to_the_materialized_request():
+    messages, _ = _messages()
+    chunks = list(iter_chat_body("m", messages, options={"num_ctx": 8192}, chunk_bytes=4096))
+    assert len(chunks) > 1
+    body = json.loads(b"".join(chunks))
+    assert body == {
+        "model": "m",
+        "stream": False,
+        "options": {"num_ctx": 8192},
+        "messages": [{"role": m["role"], "content": str(m["content"])} for m in messages],
+    }
+    assert len(messages[1]["content"]) == len(body["messages"][1]["content"])
+
+
+def test_streamed_body_keeps_tool_call_history_byte_for_byte():
+    messages, _ = _messages()
+    call = {"function": {"name": "read", "arguments": {"path": "src/app.py", "start": 1}}}
+    messages += [
+        {"role": "assistant", "content": "", "tool_calls": [call]},
+        {"role": "tool", "content": "src/app.py (lines 1-1 of 9)\n   1 | \"\u00e9\"", "tool_name": "read"},
+        {"role": "user", "content": "and this?", "images": ["aGk="]},
+    ]
+    expected = {
+        "model": "m",
+        "stream": False,
+        "tools": [{"type": "function"}],
+        "messages": [{k: str(v) if k == "content" else v for k, v in m.items()} for m in messages],
+    }
+    body = b"".join(iter_chat_body("m", messages, chunk_bytes=4096, tools=[{"type": "function"}]))
+    assert body == json.dumps(expected).encode()
+
+
+def test_client_sends_prompt_with_chunked_transfer():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            assert self.headers.get("Transfer-Encoding") == "chunked"
+            data = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                data += self.rfile.read(size)
+                self.rfile.readline()
+            received.append(json.loads(data))
+            body = json.dumps({"message": {"content": "ok"}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        messages, _ = _messages()
+        client = OllamaClient(host=f"http://127.0.0.1:{srv.server_address[1]}", model="m", timeout_s=10)
+        assert client.chat(messages) == "ok"
+        assert received[0]["messages"][1]["content"] == str(messages[1]["content"])
+    finally:
+        srv.shutdown()
@@ -0,0 +1,109 @@
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from local_agent.ollama_client import OllamaConnectionError
+from local_agent.pool import OllamaPool
+
+
+@contextmanager
+def fake_ollama(name: str, models=("m",), delay_s: float = 0.0):
+    """Minimal stand-in for an Ollama server (/api/tags + /api/chat)."""
+    served = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, obj):
+            body = json.dumps(obj).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._json({"models": [{"name": m} for m in models]})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(delay_s)
+            served.append(self.path)
+            self._json({"message": {"role": "assistant", "content": name}})
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    try:
+        yield f"http://127.0.0.1:{srv.server_address[1]}", served
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def _dead_host() -> str:
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return f"http://127.0.0.1:{port}"
+
+
+def test_pool_fails_over_and_skips_hosts_without_model():
+    with fake_ollama("A", models=("other",)) as (a, served_a), fake_ollama("B") as (b, _):
+        dead = _dead_host()
+        pool = OllamaPool([dead, a, b], model="m", timeout_s=5.0)
+
+        assert pool.chat([{"role": "user", "content": "hi"}]) == "B"
+        assert served_a == []
+
+        ok, msg = pool.healthcheck()
+        assert ok and "2/3" in msg
+        stats = {s.host: s for s in pool.stats()}
+        assert not stats[dead].healthy
+        assert stats[b].latencies and stats[b].probe_ms
+
+
+def test_pool_spreads_concurrent_requests_by_outstanding_count():
+    with fake_ollama("A", delay_s=0.2) as (a, served_a), fake_ollama("B", delay_s=0.2) as (b, served_b):
+        pool = OllamaPool([a, b], model="m", timeout_s=5.0)
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            answers = list(ex.map(lambda _: pool.chat([{"role": "user", "content": "x"}]), range(4)))
+
+        assert sorted(answers) == ["A", "A", "B", "B"]
+        assert len(served_a) == len(served_b) == 2
+
+
+def test_pool_raises_connection_error_when_all_hosts_down():
+    pool = OllamaPool([_dead_host(), _dead_host()], model="m", timeout_s=2.0)
+    with pytest.raises(OllamaConnectionError, match="All Ollama hosts failed"):
+        pool.chat([{"role": "user", "content": "x"}])
+    assert pool.healthcheck()[0] is False
+
+
+def test_doctor_lists_each_pooled_host(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    import local_agent.cli as cli
+
+    repo = tmp_path / "repo"
+    (repo / ".git").mkdir(parents=True)
+    (repo / ".local-agent").mkdir()
+    with fake_ollama("A") as (a, _):
+        dead = _dead_host()
+        (repo / ".local-agent" / "config.toml").write_text(
+            f'model = "m"\nollama_hosts = ["{a}", "{dead}"]\n', encoding="utf-8"
+        )
+        monkeypatch.chdir(repo)
+        res = CliRunner().invoke(cli.app, ["doctor"], terminal_width=200)
+
+    assert res.exit_code == 0
+    assert f"host {a}" in res.stdout and "model present" in res.stdout
+    assert f"host {dead}" in res.stdout and "FAIL" in res.stdout
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+
+
+runner = CliRunner()
+
+
+def test_profile_flag_writes_reports(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / ".git").mkdir()
+    (repo / "app.py").write_text("x = 1\n", encoding="utf-8")
+    monkeypatch.chdir(repo)
+
+    class Fake:
+        def __init__(self, host: str, model: str, timeout_s: float = 120.0):
+            pass
+
+        def chat(self, messages, **kwargs):
+            return "ok"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+
+    res = runner.invoke(cli.app, ["--profile", "ask", "what does app do"])
+    assert res.exit_code == 0, res.stdout
+    assert "Profile written to" in res.stdout
+
+    d = repo / ".local-agent" / "profiles"
+    reports = list(d.glob("*-ask.txt"))
+    assert len(reports) == 1 and list(d.glob("*-ask.pstats"))
+    text = reports[0].read_text(encoding="utf-8")
+    assert "by cumulative time" in text and "peak:" in text
+    assert (d / ".gitignore").exists()
@@ -1,3 +1,8 @@
+import os
+import sys
+import time
+
+import pytest
 from typer.testing import CliRunner
 
 import local_agent.cli as cli
@@ -38,3 +43,62 @@ def test_quote_mode_with_hits_prints_hits(tmp_path, monkeypatch):
     res = runner.invoke(cli.app, ["ask", "Quote the exact line where we connect to Postgres."])
     assert res.exit_code == 0
     assert "src/db.py:12:conn = connect(...)" in res.stdout
+
+
+def _fake_rg(tmp_path, monkeypatch, body: str):
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    rg = bindir / "rg"
+    rg.write_text(f"#!{sys.executable}\nimport sys, time\n{body}\n", encoding="utf-8")
+    rg.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}:" + os.environ.get("PATH", ""))
+    return tmp_path / "args.txt"
+
+
+def test_rg_search_stops_reading_after_max_lines(tmp_path, monkeypatch):
+    args = _fake_rg(
+        tmp_path,
+        monkeypatch,
+        f"open({str(tmp_path / 'args.txt')!r}, 'w').write(' '.join(sys.argv[1:]))\n"
+        "i = 0\n"
+        "while True:\n"
+        "    i += 1\n"
+        "    print(f'src/a.py:{i}:connect()', flush=True)",
+    )
+    t0 = time.monotonic()
+    out = cli._rg_search(tmp_path, ["connect"], extra_excludes=set(), max_lines=5, deadline_s=10)
+    assert time.monotonic() - t0 < 5
+    assert out.splitlines() == [f"src/a.py:{i}:connect()" for i in range(1, 6)]
+    argv = args.read_text()
+    assert "--max-count 20" in argv and "--max-filesize 1M" in argv and "--no-heading" in argv
+    assert "--ignore-case" not in argv
+
+    cli._rg_search(tmp_path, ["Connect"], extra_excludes=set(), max_lines=1, ignore_case=True)
+    assert "--ignore-case" in args.read_text()  # the agent's search tool matches like its Python fallback
+
+
+def test_rg_search_deadline_and_grouped_context(tmp_path, monkeypatch):
+    _fake_rg(
+        tmp_path,
+        monkeypatch,
+        "print('src/a.py', flush=True)\n"
+        "print('3-before', flush=True)\n"
+        "print('4:connect()', flush=True)\n"
+        "time.sleep(30)",
+    )
+    t0 = time.monotonic()
+    out = cli._rg_search(tmp_path, ["connect"], extra_excludes=set(), context=1, deadline_s=0.5)
+    assert time.monotonic() - t0 < 5
+    assert out.splitlines() == ["src/a.py", "3-before", "4:connect()"]
+
+
+def test_rg_search_reports_invalid_regex_when_asked(tmp_path, monkeypatch):
+    _fake_rg(
+        tmp_path,
+        monkeypatch,
+        "sys.stderr.write('regex parse error:\\n    (refund\\n    ^\\nerror: unclosed group\\n')\n"
+        "sys.exit(2)",
+    )
+    assert cli._rg_search(tmp_path, ["(refund"], extra_excludes=set()) == ""
+    with pytest.raises(ValueError, match="unclosed group"):
+        cli._rg_search(tmp_path, ["(refund"], extra_excludes=set(), raise_errors=True)
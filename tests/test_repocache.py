@@ -0,0 +1,61 @@
+import os
+from pathlib import Path
+
+from local_agent.context import RepoContext
+
+
+def _repo(tmp_path: Path) -> Path:
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "src" / "database.py").write_text("x = 1\n", encoding="utf-8")
+    (repo / "src" / "auth.py").write_text("y = 2\n", encoding="utf-8")
+    (repo / ".local-agent" / "index").mkdir(parents=True)  # state from earlier runs
+    return repo
+
+
+def _bump_mtime(path: Path) -> None:
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+
+def test_cached_context_reuses_results_until_files_change(tmp_path: Path, monkeypatch):
+    repo = _repo(tmp_path)
+    ctx = RepoContext(root=repo, file_source="walk")
+    cache = ctx.enable_cache()
+    cache.check_interval_s = 0.0
+
+    scans = []
+    real_scan = ctx._scan_files
+    monkeypatch.setattr(ctx, "_scan_files", lambda ex: scans.append(1) or real_scan(ex))
+
+    assert sorted(ctx.file_tree(100, set())) == ["src/auth.py", "src/database.py"]
+    first = ctx.select_relevant_files("database", max_files=5, extra_excludes=set())
+    assert ctx.file_tree(100, set()) and len(scans) == 1
+    hits = cache.hits
+    assert ctx.select_relevant_files("database", max_files=5, extra_excludes=set()) == first
+    assert cache.hits > hits
+
+    # content-only edit: listing survives, content and derived results refresh
+    assert ctx.read_file("src/auth.py", 1000)[1] == "y = 2\n"
+    (repo / "src" / "auth.py").write_text("y = 22\n", encoding="utf-8")
+    _bump_mtime(repo / "src" / "auth.py")
+    gen = cache.generation
+    assert ctx.read_file("src/auth.py", 1000)[1] == "y = 22\n"
+    ctx.file_tree(100, set())
+    assert cache.generation == gen + 1 and len(scans) == 1
+
+    # new file: directory mtime moves, listing is rebuilt
+    (repo / "src" / "cache.py").write_text("z = 3\n", encoding="utf-8")
+    _bump_mtime(repo / "src")
+    assert "src/cache.py" in ctx.file_tree(100, set())
+    assert len(scans) == 2
+
+
+def test_content_cache_respects_byte_cap(tmp_path: Path):
+    repo = _repo(tmp_path)
+    ctx = RepoContext(root=repo, file_source="walk")
+    cache = ctx.enable_cache(max_bytes=8)
+    ctx.read_file("src/database.py", 1000)
+    ctx.read_file("src/auth.py", 1000)
+    assert cache._content_bytes <= 8
+    assert [k[0] for k in cache._content] == ["src/auth.py"]
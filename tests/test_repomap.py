@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.repomap import RepoMap, build_repo_map
+
+
+runner = CliRunner()
+
+
+class Summarizer:
+    calls: list = []
+
+    def __init__(self, host: str = "", model: str = "", timeout_s: float = 120.0):
+        pass
+
+    def chat(self, messages, **kwargs):
+        Summarizer.calls.append(str(messages[-1]["content"]).splitlines()[0])
+        if "REPO MAP" in messages[-1]["content"]:
+            return "answer"
+        return "Summary of " + str(messages[-1]["content"]).splitlines()[0]
+
+
+def test_summaries_are_keyed_by_content(tmp_path: Path):
+    (tmp_path / "a.py").write_text("x = 1\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("y = 2\n", encoding="utf-8")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG")
+    rmap = RepoMap(tmp_path)
+    files = ["a.py", "b.py", "logo.png"]
+
+    assert build_repo_map(rmap, Summarizer(), "m", files) == 2
+    assert build_repo_map(rmap, Summarizer(), "m", files) == 0
+    assert rmap.summaries_for(files) == {"a.py": "Summary of FILE: a.py", "b.py": "Summary of FILE: b.py"}
+
+    (tmp_path / "a.py").write_text("x = 10\n", encoding="utf-8")
+    st = (tmp_path / "a.py").stat()
+    os.utime(tmp_path / "a.py", ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    assert set(rmap.summaries_for(files)) == {"b.py"}  # stale summary is not served
+    assert build_repo_map(rmap, Summarizer(), "m", files) == 1
+
+
+def test_failed_summary_cancels_pending_requests(tmp_path: Path):
+    files = [f"m{i}.py" for i in range(20)]
+    for rel in files:
+        (tmp_path / rel).write_text(f"{rel[:-3]} = 1\n", encoding="utf-8")
+
+    class Down:
+        calls = 0
+
+        def chat(self, messages, **kwargs):
+            Down.calls += 1
+            raise ConnectionError("ollama is down")
+
+    with pytest.raises(ConnectionError):
+        build_repo_map(RepoMap(tmp_path), Down(), "m", files, parallelism=2)
+    assert Down.calls < len(files)
+
+
+def test_ask_uses_repo_map_when_retrieval_is_weak(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / ".git").mkdir()
+    (repo / "billing.py").write_text("def charge():\n    pass\n", encoding="utf-8")
+    monkeypatch.chdir(repo)
+    monkeypatch.setattr(cli, "OllamaClient", Summarizer)
+    Summarizer.calls = []
+
+    res = runner.invoke(cli.app, ["map"])
+    assert res.exit_code == 0, res.stdout
+    assert "1/1 files covered" in res.stdout
+
+    res = runner.invoke(cli.app, ["ask", "how do refunds work?"])
+    assert res.exit_code == 0
+    assert Summarizer.calls[-1].startswith("REPO MAP")
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+from local_agent.context import RepoContext
+from local_agent.retrieval import retrieve, rrf
+
+
+def test_rrf_prefers_files_found_by_several_strategies():
+    scores = rrf({"content": ["a.py", "b.py", "c.py"], "path": ["c.py", "d.py"]})
+    ranked = sorted(scores, key=lambda r: -scores[r])
+    assert ranked[0] == "c.py"
+    assert rrf({"x": ["a"]}, weights={"x": 2.0})["a"] == 2 * rrf({"x": ["a"]})["a"]
+
+
+def test_retrieve_returns_partial_results_at_the_deadline():
+    def fast(out, stop):
+        out += [("a.py", 2.0), ("b.py", 1.0)]
+
+    def slow(out, stop):
+        out.append(("b.py", 5.0))
+        stop.wait(5)  # would run for seconds without the deadline
+        out.append(("late.py", 9.0))
+
+    t0 = time.monotonic()
+    res = retrieve({"fast": fast, "slow": slow}, deadline_s=0.2)
+    assert time.monotonic() - t0 < 1.0
+    assert res.finished == ["fast"] and res.cut == ["slow"]
+    assert res.ranked[0] == "b.py" and "late.py" not in res.ranked
+
+    def broken(out, stop):
+        raise OSError("stale NFS handle")
+
+    assert retrieve({"fast": fast, "broken": broken}, deadline_s=0).ranked == ["a.py", "b.py"]
+
+
+def test_retrieve_waits_past_the_deadline_for_a_first_result():
+    def late(out, stop):
+        time.sleep(0.15)
+        out.append(("x.py", 1.0))
+
+    res = retrieve({"late": late}, deadline_s=0.05)
+    assert res.ranked == ["x.py"]
+
+
+def test_repo_search_fuses_content_and_path_matches(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    for name in ("billing.py", "invoice.py", "util.py"):
+        (repo / "src" / name).write_text("x = 1\n", encoding="utf-8")
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    rg = bindir / "rg"
+    # content hits: util.py mentions billing a lot, billing.py once
+    rg.write_text(
+        f"#!{sys.executable}\nimport sys\n"
+        f"print({str(repo / 'src' / 'util.py')!r} + ':7')\n"
+        f"print({str(repo / 'src' / 'billing.py')!r} + ':1')\n",
+        encoding="utf-8",
+    )
+    rg.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}:" + os.environ.get("PATH", ""))
+
+    ctx = RepoContext(root=repo, file_source="walk")
+    rels = ctx.select_relevant_files("billing", max_files=5, extra_excludes=set())
+    assert rels == ["src/billing.py", "src/util.py"]
+    assert sorted(ctx.last_retrieval.finished) == ["content", "path"]
@@ -0,0 +1,49 @@
+import json
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.config import AppConfig
+from local_agent.routing import route_query
+
+
+runner = CliRunner()
+
+
+def test_route_query_heuristics():
+    cfg = AppConfig(model="big", fast_model="small")
+    assert route_query("where is load_config defined?", 1000, cfg).tier == "fast"
+    assert route_query("why does the retry loop never exit?", 1000, cfg).tier == "heavy"
+    assert route_query("what does ask do", 10**6, cfg).reason.startswith("large context")
+    assert route_query("x " * 200, 1000, cfg).reason == "long question"
+    assert route_query("refactor this", 1000, cfg, override="fast").model == "small"
+    assert route_query("where is x", 1000, AppConfig(model="big")).model == "big"
+
+
+def test_ask_routes_and_logs(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / ".local-agent").mkdir(parents=True)
+    (repo / ".git").mkdir()
+    (repo / ".local-agent" / "config.toml").write_text('model = "big"\nfast_model = "small"\n', encoding="utf-8")
+    monkeypatch.chdir(repo)
+
+    used = []
+
+    class Fake:
+        def __init__(self, host: str, model: str, timeout_s: float = 120.0):
+            self.model = model
+
+        def chat(self, messages, **kwargs):
+            used.append(self.model)
+            return "ok"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+    assert runner.invoke(cli.app, ["ask", "which file defines main?"]).exit_code == 0
+    assert runner.invoke(cli.app, ["ask", "which file defines main?", "--heavy"]).exit_code == 0
+    assert used == ["small", "big"]
+
+    log = repo / ".local-agent" / "routing" / "decisions.jsonl"
+    recs = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    assert [(r["model"], r["reason"], r["ok"]) for r in recs] == [("small", "lookup", True), ("big", "user override", True)]
+    assert all(r["latency_s"] >= 0 and r["context_chars"] > 0 for r in recs)
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.sessions import ChatSession
+
+
+runner = CliRunner()
+
+
+def test_session_roundtrip_skips_torn_lines(tmp_path: Path):
+    s = ChatSession.create(tmp_path, "m1")
+    assert not s.path.exists()  # nothing written before the first turn
+
+    s.record_turn("q1", "a1", {"a.py": "h1"})
+    s.record_model("m2")
+    s.record_turn("q2", "a2", {"a.py": "h2", "b.py": "h3"}, tree="t1")
+    with s.path.open("a", encoding="utf-8") as f:
+        f.write('{"type": "turn", "us')  # crashed mid-write
+
+    loaded = ChatSession.load(tmp_path)
+    assert loaded is not None and loaded.id == s.id
+    assert loaded.model == "m2"
+    assert [m["content"] for m in loaded.history] == ["q1", "a1", "q2", "a2"]
+    assert loaded.sent_files == {"a.py": "h2", "b.py": "h3"} and loaded.sent_tree == "t1"
+    assert ChatSession.load(tmp_path, "nope") is None
+
+
+def test_chat_resume_reuses_history_and_skips_unchanged_files(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / ".git").mkdir()
+    (repo / "database.py").write_text("def connect():\n    pass\n", encoding="utf-8")
+    monkeypatch.chdir(repo)
+
+    calls = []
+
+    class Fake:
+        def __init__(self, host: str, model: str, timeout_s: float = 120.0):
+            self.model = model
+
+        def chat(self, messages, **kwargs):
+            calls.append([dict(m) for m in messages])
+            return f"ANSWER{len(calls)}"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+
+    res = runner.invoke(cli.app, ["chat"], input="how does database connect work\n/exit\n")
+    assert res.exit_code == 0
+    assert "--- FILE: database.py (lines 1-2) ---" in calls[0][-1]["content"]
+
+    res = runner.invoke(cli.app, ["chat", "--resume"], input="and database connect again?\n/exit\n")
+    assert res.exit_code == 0
+    assert "Resumed session" in res.stdout
+
+    resumed = calls[1]
+    assert [m["role"] for m in resumed] == ["system", "user", "assistant", "user"]
+    assert resumed[2]["content"] == "ANSWER1"
+    assert "database.py (unchanged" in resumed[-1]["content"]
+    assert "REPO FILE TREE: unchanged" in resumed[-1]["content"]
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import local_agent.symbols as symbols
+from local_agent.context import RepoContext
+from local_agent.repomap import RepoMap, build_repo_map
+from local_agent.sharedcache import SharedCache
+
+
+def _clone(base: Path, name: str) -> Path:
+    repo = base / name
+    (repo / ".git").mkdir(parents=True)
+    (repo / "src").mkdir()
+    (repo / "src" / "billing.py").write_text("def charge(inv):\n    return total(inv)\n", encoding="utf-8")
+    (repo / "src" / "util.py").write_text("def total(inv):\n    return 1\n", encoding="utf-8")
+    return repo
+
+
+def test_entries_round_trip_and_evict_least_recently_used(tmp_path: Path):
+    cache = SharedCache(tmp_path / "c.sqlite", max_bytes=100)
+    cache.put("summary/1", "aa", {"summary": "x" * 40})
+    cache.put_many([("summary/1", "bb", {"summary": "y" * 40}), ("symbols/1.py", "aa", [[1, 2]])])
+    assert cache.get("summary/1", "aa") == {"summary": "x" * 40}
+    assert cache.get("symbols/1.py", "aa") == [[1, 2]]
+    assert cache.get("summary/1", "zz") is None
+
+    cache.put("summary/1", "cc", {"summary": "z" * 40})
+    assert cache.evict() == 2  # the two oldest entries
+    assert cache.get("summary/1", "aa") is None and cache.get("summary/1", "cc") is not None
+    assert cache.size() <= 100
+
+
+def test_second_clone_reuses_symbols_and_summaries(tmp_path: Path, monkeypatch):
+    parsed = []
+    extract = symbols.extract_symbols
+    monkeypatch.setattr(symbols, "extract_symbols", lambda rel, text: parsed.append(rel) or extract(rel, text))
+
+    first = RepoContext(root=_clone(tmp_path, "a"), file_source="walk", shared_cache_mb=16)
+    hits = first.symbol_index(set()).definitions("charge")
+    assert sorted(parsed) == ["src/billing.py", "src/util.py"]
+
+    parsed.clear()
+    second = RepoContext(root=_clone(tmp_path, "b"), file_source="walk", shared_cache_mb=16)
+    idx = second.symbol_index(set())
+    assert idx.definitions("charge") == hits and idx.callers("total") == [("src/billing.py", 1)]
+    assert parsed == []
+
+    class Summarizer:
+        calls = 0
+
+        def chat(self, messages, **kwargs):
+            Summarizer.calls += 1
+            return "summary"
+
+    files = ["src/billing.py", "src/util.py"]
+    assert build_repo_map(RepoMap(first.root, shared=first.shared_cache()), Summarizer(), "m", files) == 2
+    rmap = RepoMap(second.root, shared=second.shared_cache())
+    assert build_repo_map(rmap, Summarizer(), "m", files) == 0
+    assert Summarizer.calls == 2
+    assert rmap.summaries_for(files) == {"src/billing.py": "summary", "src/util.py": "summary"}
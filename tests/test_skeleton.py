@@ -0,0 +1,109 @@
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.skeleton import render_skeleton
+
+
+runner = CliRunner()
+
+PY = '''"""Billing helpers."""
+import os
+from typing import (
+    List,
+)
+
+RATE = 3
+
+
+@dataclass
+class Invoice:
+    """
+    One invoice.
+    More text.
+    """
+
+    total: int = 0
+
+    def add(self, amount: int) -> None:
+        """Adds an amount."""
+        self.total += amount
+        self.total = max(self.total, 0)
+
+    async def send(
+        self, to: str
+    ) -> bool:
+        def helper():
+            return 1
+        return bool(helper())
+
+
+def charge(inv: Invoice) -> int:
+    x = inv.total * RATE
+    y = x + 1
+    return y
+'''
+
+
+def _rows(skeleton: str) -> dict:
+    return {int(r.split("|")[0]): r.split("| ", 1)[1] for r in skeleton.splitlines() if r.split("|")[0].strip()}
+
+
+def test_python_skeleton_keeps_signatures_with_line_numbers():
+    rows = _rows(render_skeleton("billing.py", PY))
+    assert rows[1] == '"""Billing helpers."""'
+    assert [rows[n] for n in (3, 4, 5)] == ["from typing import (", "    List,", ")"]
+    assert rows[10] == "@dataclass" and rows[11] == "class Invoice:"
+    assert rows[13] == "    One invoice." and 14 not in rows
+    assert rows[19] == "    def add(self, amount: int) -> None:" and rows[20] == '        """Adds an amount."""'
+    assert 21 not in rows
+    assert [rows[n] for n in (24, 25, 26)] == ["    async def send(", "        self, to: str", "    ) -> bool:"]
+    assert 27 not in rows  # nested def is part of the body
+    assert rows[32] == "def charge(inv: Invoice) -> int:" and 33 not in rows
+
+
+def test_brace_skeleton_keeps_class_members_and_drops_bodies():
+    ts = (
+        "export class Store {\n"
+        "  private items = new Map();\n"
+        "  get(key: string): number {\n"
+        "    if (key === '}') { return 0; }\n"
+        "    return this.items.get(key);\n"
+        "  }\n"
+        "}\n"
+        "export function load(path: string) {\n"
+        "  return read(path);\n"
+        "}\n"
+    )
+    rows = _rows(render_skeleton("store.ts", ts))
+    assert sorted(rows) == [1, 2, 3, 6, 7, 8, 10]
+    assert render_skeleton("README.md", "# x\n" * 50) is None
+
+
+def test_ask_sends_lower_ranked_files_as_skeletons(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / "pkg").mkdir(parents=True)
+    (repo / ".git").mkdir()
+    (repo / "pkg" / "billing.py").write_text(PY, encoding="utf-8")
+    (repo / "pkg" / "billing_api.py").write_text(PY.replace("Invoice", "ApiInvoice"), encoding="utf-8")
+    (repo / ".local-agent").mkdir()
+    (repo / ".local-agent" / "config.toml").write_text("full_context_files = 1\n", encoding="utf-8")
+    monkeypatch.chdir(repo)
+
+    sent = []
+
+    class Fake:
+        def __init__(self, host, model, timeout_s=120.0):
+            pass
+
+        def chat(self, messages, **kwargs):
+            sent.append(str(messages[-1]["content"]))
+            return "ok"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+    res = runner.invoke(cli.app, ["ask", "how does invoice charge work"])
+    assert res.exit_code == 0
+    prompt = sent[0]
+    assert prompt.count("(skeleton: signatures only, 35 lines; ... = omitted) ---") == 1
+    assert prompt.count("(lines 1-35) ---") == 1
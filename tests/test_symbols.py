@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import local_agent.symbols as symbols
+from local_agent.context import RepoContext
+from local_agent.symbols import SymbolIndex, extract_regex, lookup_question, question_identifiers
+
+
+def _repo(tmp_path: Path) -> Path:
+    repo = tmp_path / "repo"
+    (repo / ".git").mkdir(parents=True)
+    (repo / "src").mkdir()
+    (repo / "src" / "safety.py").write_text(
+        "def safe_apply(path, content):\n    backup(path)\n    write(path, content)\n\n\nclass Backup:\n    pass\n",
+        encoding="utf-8",
+    )
+    (repo / "src" / "cli.py").write_text(
+        "from safety import safe_apply\n\ndef edit():\n    safe_apply('a', 'b')\n    safe_apply('c', 'd')\n",
+        encoding="utf-8",
+    )
+    (repo / "src" / "other.py").write_text("# mentions safe_apply in a comment only\n", encoding="utf-8")
+    return repo
+
+
+def test_extract_regex_js_and_go():
+    js = "export async function loadUser(id) {\n  return fetchUser(id);\n}\nconst render = (x) => {\n  draw(x);\n};\n"
+    defs, refs = extract_regex(js, ".js")
+    assert ("loadUser", "function", 1, 3) in defs
+    assert ("render", "function", 4, 6) in defs
+    assert ("fetchUser", 2) in refs
+
+    go = "package main\n\nfunc (s *Server) Handle(w http.ResponseWriter) {\n\ts.log()\n}\n\ntype Server struct {\n}\n"
+    defs, _ = extract_regex(go, ".go")
+    assert ("Handle", "function", 3, 5) in defs
+    assert ("Server", "type", 7, 8) in defs
+
+
+def test_index_is_incremental_and_finds_definitions_and_callers(tmp_path: Path):
+    repo = _repo(tmp_path)
+    rels = ["src/safety.py", "src/cli.py", "src/other.py"]
+    idx = SymbolIndex(repo)
+
+    assert idx.update(rels) == 3
+    assert idx.update(rels) == 0  # nothing changed
+
+    (repo / "src" / "other.py").write_text("def helper():\n    safe_apply(1, 2)\n", encoding="utf-8")
+    assert idx.update(rels) == 1
+
+    [sym] = idx.definitions("safe_apply")
+    assert (sym.path, sym.kind, sym.line, sym.end_line) == ("src/safety.py", "function", 1, 3)
+    assert idx.callers("safe_apply")[0] == ("src/cli.py", 3)  # import + two calls
+
+    idx.update(["src/safety.py"])
+    assert idx.definitions("edit") == []
+
+
+def test_file_grown_past_size_limit_leaves_the_index(tmp_path: Path, monkeypatch):
+    repo = _repo(tmp_path)
+    rels = ["src/safety.py", "src/cli.py", "src/other.py"]
+    idx = SymbolIndex(repo)
+    idx.update(rels)
+    assert idx.definitions("safe_apply") and idx.callers("safe_apply")
+
+    monkeypatch.setattr(symbols, "MAX_INDEX_BYTES", 200)
+    with (repo / "src" / "safety.py").open("a", encoding="utf-8") as f:
+        f.write("# padding\n" * 30)
+    with (repo / "src" / "cli.py").open("a", encoding="utf-8") as f:
+        f.write("# padding\n" * 30)
+    idx.update(rels)
+    assert idx.definitions("safe_apply") == [] and idx.callers("safe_apply") == []
+    assert "src/safety.py" not in {p for (p,) in idx.db.execute("SELECT path FROM files")}
+
+
+def test_select_relevant_files_puts_definition_first(tmp_path: Path):
+    repo = _repo(tmp_path)
+    ctx = RepoContext(root=repo)
+
+    assert question_identifiers("where is `safe_apply` called?")[0] == "safe_apply"
+    hits = ctx.symbol_hits("where is `safe_apply` called?", extra_excludes=set())
+    assert hits and hits[0].symbol.path == "src/safety.py"
+
+    rels = ctx.select_relevant_files("where is `safe_apply` called?", max_files=2, extra_excludes=set(), symbol_hits=hits)
+    assert rels == ["src/safety.py", "src/cli.py"]
+    assert not any(p.startswith(".local-agent/") for p in ctx.file_tree(max_files=50, extra_excludes=set()))
+    assert lookup_question(ctx.symbol_index(set()), "what does Backup do")[0].symbol.kind == "class"
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import local_agent.cli as cli
+from local_agent.tree import render_tree
+
+
+runner = CliRunner()
+
+
+def test_tree_collapses_orders_and_summarizes():
+    paths = ["README.md", "src/pkg/db.py", "src/pkg/auth.py"]
+    paths += [f"vendor/lib{i}/m{j}.js" for i in range(10) for j in range(10)]
+    out = render_tree(paths, relevant=["src/pkg/db.py"], terms=["auth"], max_lines=20).splitlines()
+
+    assert out[0].startswith("REPO FILE TREE (103 files")
+    assert out[1:4] == ["src/pkg/", "  db.py *", "  auth.py"]
+    assert "vendor/ (100 files: 100 .js)" in out
+    assert "README.md" in out
+
+
+def test_tree_respects_line_budget_without_dropping_siblings():
+    paths = [f"a/f{i}.py" for i in range(50)] + [f"b/g{i}.py" for i in range(50)] + ["top.txt"]
+    out = render_tree(paths, terms=["f1"], max_lines=12).splitlines()[1:]
+    assert len(out) <= 12
+    assert out[0] == "a/"
+    assert any(line.startswith("b/") for line in out)
+    assert any("more" in line for line in out)
+
+
+def test_chat_sends_tree_once(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / ".git").mkdir()
+    (repo / "app.py").write_text("x = 1\n", encoding="utf-8")
+    monkeypatch.chdir(repo)
+
+    turns = []
+
+    class Fake:
+        def __init__(self, host: str, model: str, timeout_s: float = 120.0):
+            pass
+
+        def chat(self, messages, **kwargs):
+            turns.append(str(messages[-1]["content"]))
+            return "ok"
+
+    monkeypatch.setattr(cli, "OllamaClient", Fake)
+    res = runner.invoke(cli.app, ["chat"], input="what is app\nand again\n/exit\n")
+    assert res.exit_code == 0
+    assert "app.py" in turns[0].split("RELEVANT FILES")[0]
+    assert "REPO FILE TREE: unchanged" in turns[1]
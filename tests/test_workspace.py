@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import local_agent.workspace as workspace
+from local_agent.config import AppConfig
+from local_agent.context import RepoContext
+from local_agent.workspace import load_workspace, resolve_scope
+
+
+def _monorepo(tmp_path: Path) -> Path:
+    repo = tmp_path / "mono"
+    (repo / ".git").mkdir(parents=True)
+    (repo / "pyproject.toml").write_text('[project]\nname = "company"\n', encoding="utf-8")
+    files = {
+        "services/payments/pyproject.toml": '[project]\nname = "payments"\ndependencies = ["shared_db>=1.0", "requests"]\n',
+        "services/payments/src/charge.py": "def charge():\n    pass\n",
+        "services/search/pyproject.toml": '[project]\nname = "search"\n',
+        "services/search/src/charge_index.py": "x = 1\n",
+        "libs/shared-db/pyproject.toml": '[project]\nname = "shared-db"\n\n[tool.uv.sources]\ncore = { path = "../core" }\n',
+        "libs/shared-db/db.py": "y = 2\n",
+        "libs/core/pyproject.toml": '[project]\nname = "core"\n',
+        "libs/core/core.py": "z = 3\n",
+    }
+    for rel, text in files.items():
+        (repo / rel).parent.mkdir(parents=True, exist_ok=True)
+        (repo / rel).write_text(text, encoding="utf-8")
+    return repo
+
+
+def test_scope_is_package_plus_transitive_deps(tmp_path: Path, monkeypatch):
+    repo = _monorepo(tmp_path)
+    monkeypatch.chdir(repo / "services" / "payments" / "src")
+    cfg = AppConfig(file_source="walk")
+
+    ctx = RepoContext.from_config(cfg)
+    assert ctx.scope == ("libs/core", "libs/shared-db", "services/payments")
+    files = ctx.file_tree(100, set())
+    assert "services/payments/src/charge.py" in files and "libs/core/core.py" in files
+    assert not any(f.startswith("services/search/") for f in files)
+    assert ctx.select_relevant_files("charge", max_files=5, extra_excludes=set()) == [
+        "services/payments/src/charge.py"
+    ]
+    assert ctx.index_dir() != repo / ".local-agent" / "index"
+
+    wide = RepoContext.from_config(cfg, scope="repo")
+    assert wide.scope == ()
+    assert "services/search/src/charge_index.py" in wide.file_tree(100, set())
+
+
+def test_scope_falls_back_to_repo_when_closure_is_too_large(tmp_path: Path, monkeypatch):
+    repo = _monorepo(tmp_path)
+    payments = repo / "services" / "payments"
+    files = lambda: [p.relative_to(repo).as_posix() for p in repo.rglob("*") if p.is_file()]
+    assert len(resolve_scope(repo, payments, "auto", files)) == 3
+    monkeypatch.setattr(workspace, "MAX_SCOPE_DIRS", 2)
+    assert resolve_scope(repo, payments, "auto", files) == ()
+
+
+def test_malformed_manifests_do_not_break_scope(tmp_path: Path):
+    repo = _monorepo(tmp_path)
+    app = repo / "apps" / "web"
+    app.mkdir(parents=True)
+    (app / "package.json").write_text(
+        '{"name": "web", "dependencies": ["core"], "devDependencies": "x"}', encoding="utf-8"
+    )
+    (app / "Cargo.toml").write_text('package = "web"\ndependencies = ["core"]\n', encoding="utf-8")
+    ws = load_workspace(repo, "apps/web")
+    assert ws is not None and ws.name == "web" and ws.deps == []
+    assert resolve_scope(repo, app, "auto", lambda: []) == ("apps/web",)
+
+
+def test_scope_at_repo_root_and_explicit_dirs(tmp_path: Path):
+    repo = _monorepo(tmp_path)
+    assert resolve_scope(repo, repo, "auto", lambda: []) == ()
+    assert resolve_scope(repo, repo, "libs/core/, libs", lambda: []) == ("libs",)
+
+
+def test_go_and_cargo_path_dependencies(tmp_path: Path):
+    repo = tmp_path / "r"
+    (repo / "svc").mkdir(parents=True)
+    (repo / "crates" / "app").mkdir(parents=True)
+    (repo / "svc" / "go.mod").write_text(
+        "module example.com/svc\n\ngo 1.22\n\nrequire (\n\texample.com/lib v0.0.0\n)\n\n"
+        "replace example.com/lib => ../lib\n",
+        encoding="utf-8",
+    )
+    (repo / "crates" / "app" / "Cargo.toml").write_text(
+        '[package]\nname = "app"\n\n[dependencies]\nutil = { path = "../util" }\nserde = "1"\n',
+        encoding="utf-8",
+    )
+    go = load_workspace(repo, "svc")
+    assert go.name == "example.com/svc" and go.deps == ["example-com/lib"] and go.dep_paths == ["lib"]
+    cargo = load_workspace(repo, "crates/app")
+    assert cargo.deps == ["util", "serde"] and cargo.dep_paths == ["crates/util"]